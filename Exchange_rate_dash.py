@@ -1,13 +1,30 @@
 import dash
 import dash_bootstrap_components as dbc
-from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash import Patch, ctx, dcc, html, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import pandas as pd
 import plotly.graph_objs as go
-import plotly.express as px
 import numpy as np
-from scipy import stats
 import os
+import re
+from flask import request
+
+from data_store import load_exchange_data, source_fingerprint
+from figure_cache import cache_from_env, canonical_currencies, code_version
+from rollups import RESOLUTIONS
+from downsampling import downsample_indices, downsample_xy
+from analytics import summarize_window
+from forecasting import DEFAULT_MODEL, MODELS, forecast
+from rolling_corr import WINDOWS as rolling_windows
+from ingest import feed_from_env
+from instrumentation import format_counters, instrument_dash, metrics_from_env
+from typed_arrays import encode_figure, encode_traces
+from client_dataset import ClientDataset
+from cross_rates import pair_name
+from export_api import export_blueprint
+from inflation import InflationTable
+from overlays import COMPONENTS as overlay_components, KINDS as overlay_labels, MIN_WINDOW, Overlays
+from snapshot import DataSnapshot
 
 # สร้างแอป Dash พร้อม Theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP])
@@ -17,17 +34,89 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 exchange_rates_path = os.path.join(current_dir, "Foreign_Exchange_Rates.csv")
 inflation_path = os.path.join(current_dir, "Filtered_Inflation_Data.csv")
 
-exchange_data = pd.read_csv(exchange_rates_path)
+store_dir = os.environ.get('FX_STORE_DIR', os.path.join(current_dir, "fx_store"))
+
+# โหลดข้อมูลจาก columnar store (memory-mapped) และกลับไปอ่าน CSV ถ้าใช้ store ไม่ได้
+# ขนาดไฟล์ก่อนโหลดคือจุดเริ่มอ่านแถวใหม่ของ ingestion
+exchange_rates_offset = os.path.getsize(exchange_rates_path)
+exchange_data = load_exchange_data(exchange_rates_path, store_dir)
 inflation_data = pd.read_csv(inflation_path)
+currency_columns = list(exchange_data.columns[2:])
+
+# อัตราเงินเฟ้อเป็น array (series x ประเทศ x ปี)
+inflation_table = InflationTable(inflation_data)
+
+# cache ของผลลัพธ์กราฟที่ใช้ร่วมกันทุก worker (SQLite) - ตั้งค่าผ่าน FX_FIGURE_CACHE_*
+# key ของ cache ขึ้นกับ revision ของทั้งสองไฟล์ เวอร์ชันโค้ด และจำนวนแถวที่รับเข้ามาแล้ว (generation ของ data)
+# (แก้ CSV โดยจำนวนแถวเท่าเดิม หรือ deploy โค้ดใหม่ จึงไม่ได้กราฟเก่าจาก cache)
+figure_cache = cache_from_env(os.path.join(current_dir, "fx_cache", "figures.sqlite"))
+cache_revision = (f"{source_fingerprint(exchange_rates_path)}:{source_fingerprint(inflation_path)}:"
+                  f"{code_version(current_dir)}")
+
+# ตารางอัตราแลกเปลี่ยนและทุก index ที่สร้างจากตาราง (range stats, histogram, quantile, rollup, cross rate,
+# real rate, rolling correlation, anomaly) เป็นค่าเดียว - รับแถวใหม่แล้วแทนทั้งชุดด้วยการกำหนดค่าครั้งเดียว
+# callback อ่าน data ครั้งเดียวแล้วส่ง snapshot นั้นต่อ จึงไม่ได้ตารางกับ index คนละรุ่นกัน
+# correlation และสถานะของ anomaly detector คำนวณครั้งเดียวต่อ revision ของ CSV แล้วอ่านจากไฟล์
+data = DataSnapshot.build(
+    exchange_data, currency_columns, cache_revision, inflation_table,
+    os.path.join(os.environ.get('FX_ROLLING_CORR_DIR', os.path.join(current_dir, "fx_cache", "rolling_corr")),
+                 source_fingerprint(exchange_rates_path)),
+    os.path.join(os.environ.get('FX_ANOMALY_DIR', os.path.join(current_dir, "fx_cache", "anomaly")),
+                 f"{source_fingerprint(exchange_rates_path)}.npz"),
+)
+
+# SMA/EMA/Bollinger/ความผันผวนแบบ rolling ของทั้งคอลัมน์ คำนวณครั้งเดียวต่อ (สกุลเงิน, ชนิด, window)
+# แล้วตัดตามช่วง slider - แถวที่รับเข้ามาใหม่คำนวณต่อจากท้ายเมื่อใช้ครั้งถัดไป
+overlays = Overlays()
+
+# เวลา/ขนาดของทุก callback และเวลาสร้างกราฟแต่ละชนิด (/metrics) - ตั้งค่าผ่าน FX_METRICS_PATH, FX_PROFILE_*
+metrics, profile_options = metrics_from_env(os.path.join(current_dir, "fx_cache", "metrics.sqlite"),
+                                            os.path.join(current_dir, "fx_cache", "profiles"))
+
+# โหมดตัดช่วงข้อมูลใน browser: ส่งตารางอัตราแลกเปลี่ยนครั้งเดียว แล้วเลื่อน slider ได้โดยไม่เรียก server
+# สำหรับกราฟเส้น, area chart และวันที่ที่เลือก (กราฟที่ต้องคำนวณยังใช้ server)
+client_windowing = os.environ.get('FX_CLIENT_WINDOWING') == '1'
+client_dataset = ClientDataset(source_fingerprint(exchange_rates_path))
+
+# รับแถวใหม่ที่ต่อท้าย CSV (หรือไฟล์ใน FX_INGEST_DIR) โดยไม่ต้องโหลดข้อมูลทั้งหมดใหม่
+exchange_feed = feed_from_env(data.frame, exchange_rates_path, exchange_rates_offset)
+
+
+def _on_new_rows(frame, new_values):
+    global data
+    # ต่อแถวทุกแถวที่ snapshot ยังไม่มี (รวมแถวของรอบก่อนที่ล้มเหลว) ลงในสำเนาของทุก index
+    # ถ้าขั้นใดล้มเหลว data เดิมยังใช้ได้ครบ - snapshot ใหม่ (พร้อม generation ใหม่ของ cache) เข้าแทนในครั้งเดียว
+    data = data.extend(frame)
+
+
+exchange_feed.add_listener(_on_new_rows)
 
-# ทำความสะอาดข้อมูล Exchange Rates
-exchange_data.rename(columns={'Time Serie': 'Date'}, inplace=True)
-exchange_data['Date'] = pd.to_datetime(exchange_data['Date'])
-exchange_data = exchange_data.replace('ND', None).dropna()
 
-# แปลงคอลัมน์เป็นตัวเลข
-for column in exchange_data.columns[2:]:
-    exchange_data[column] = pd.to_numeric(exchange_data[column], errors='coerce')
+def _background_manager(cache_dir):
+    # งานที่หนัก (การพยากรณ์) รันใน process แยกผ่าน diskcache - ถ้าไม่ได้ติดตั้ง dash[diskcache] จะคำนวณใน request ตามเดิม
+    try:
+        import diskcache
+        return dash.DiskcacheManager(
+            diskcache.Cache(cache_dir),
+            cache_by=[lambda: data.generation],  # ข้อมูลใหม่ -> ผลลัพธ์ชุดใหม่
+            expire=figure_cache.ttl,
+        )
+    except ImportError:
+        return None
+
+
+background_manager = _background_manager(
+    os.environ.get('FX_BACKGROUND_CACHE_DIR', os.path.join(current_dir, "fx_cache", "background"))
+)
+
+
+@server.before_request
+def _ingest_new_rows():
+    try:
+        exchange_feed.maybe_poll()
+    except (OSError, ValueError) as e:
+        # ปัญหาของไฟล์ใหม่ต้องไม่ทำให้ request ล้มเหลว - ใช้ข้อมูลเดิมต่อไป
+        server.logger.warning("Exchange-rate ingestion failed: %s", e)
 
 # Melt Inflation Data เพื่อทำให้ง่ายต่อการใช้งาน
 inflation_data_melted = pd.melt(
@@ -52,220 +141,725 @@ enhanced_palette = [
     '#17becf'   # สีฟ้า
 ]
 
+# ความกว้างหน้าจอเริ่มต้น (px) ถ้า browser ยังไม่ส่งค่ามา
+default_viewport_width = 1200
+
+max_currencies_to_show = 10  # กราฟเส้น: จำกัดจำนวนเส้นในกราฟเพื่อความชัดเจน
+max_currencies_area = 5  # area chart: ถ้ามีมากกว่านี้ แสดงเป็นค่าเฉลี่ยการเปลี่ยนแปลง
+
+# โหมดหลายสกุลเงิน (WebGL) ไม่จำกัดจำนวนเส้น - กราฟเส้นแสดง max_currencies_to_show เส้นแรกก่อน
+# แล้วทยอยส่งเส้นที่เหลือใน callback ต่อกันอีกเท่านี้รอบ
+line_stream_stages = 3
+
+# ชั้น overlay ของกราฟเส้นและกราฟพยากรณ์ - window (วันทำการ) คั่นด้วย comma ได้ไม่เกิน max_overlay_windows ค่า
+default_overlay_windows = '20, 50'
+max_overlay_windows = 4
+
+# ระยะพยากรณ์ที่เลือกได้ (วัน) และจำนวนขั้นของแถบความคืบหน้า
+forecast_horizons = [7, 30, 90, 180, 365]
+default_forecast_horizon = 30
+forecast_progress_steps = 3
+
+# หน้าต่าง rolling correlation เริ่มต้น (วันทำการ)
+default_rolling_window = 90
+
+# ความละเอียดของ area chart และ candlestick - 'auto' เลือกคาบที่ละเอียดที่สุดที่ไม่เกินจำนวนจุดของกราฟ
+default_rollup_resolution = 'auto'
+
+def _client_dataset_stores(snapshot):
+    if not client_windowing:
+        return []
+    # version บอกให้ browser โหลดชุดข้อมูลใหม่เมื่อมีแถวเพิ่ม; ค่าคงที่ที่ client_windowing.js ต้องใช้ให้ตรงกับ server
+    source = {
+        'version': client_dataset.version(snapshot.generation),
+        'url': app.get_relative_path('/_dataset'),
+        'max_currencies_to_show': max_currencies_to_show,
+        'max_currencies_area': max_currencies_area,
+        'default_viewport_width': default_viewport_width,
+        'currency_codes': snapshot.cross_rates.codes,  # สำหรับคำนวณคู่ cross rate ใน browser
+    }
+    return [dcc.Store(id='dataset-source', data=source), dcc.Store(id='client-dataset')]
+
+
 # Layout ของ Dashboard
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col(html.H1("💱 Global Financial Exchange Dashboard", 
-                        className="text-center text-primary my-4 fw-bold"), 
-                width=12)
-    ]),
-
-    # Currency Selector
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Currencies:", className="fw-bold"),
-            dcc.Dropdown(
-                id='currency-dropdown',
-                options=[{'label': col, 'value': col} for col in exchange_data.columns[2:]],
-                value=[exchange_data.columns[2], exchange_data.columns[3]],
-                multi=True,
-                className="mb-3",
-                style={'color': 'black'}
-            )
-        ], width=12)       
-    ]),
+def serve_layout():
+    # สร้าง layout ใหม่ทุกครั้งที่โหลดหน้า เพื่อให้ขอบเขตของ slider ครอบคลุมแถวที่เพิ่งรับเข้ามา
+    snapshot = data
+    frame, cross_rates = snapshot.frame, snapshot.cross_rates
+    return dbc.Container([
+        # ความกว้างหน้าจอ สำหรับกำหนดจำนวนจุดที่ส่งไปยังกราฟ
+        dcc.Store(id='viewport-width'),
+        *_client_dataset_stores(snapshot),
+        # ส่วนของกราฟเส้นที่ยังต้องทยอยส่ง (โหมดหลายสกุลเงิน) - store ละรอบ
+        *[dcc.Store(id=f'line-stream-{stage}') for stage in range(line_stream_stages)],
+
+        # Header
+        dbc.Row([
+            dbc.Col(html.H1("💱 Global Financial Exchange Dashboard", 
+                            className="text-center text-primary my-4 fw-bold"), 
+                    width=12)
+        ]),
+
+        # Currency Selector
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Currencies:", className="fw-bold"),
+                dcc.Dropdown(
+                    id='currency-dropdown',
+                    options=[{'label': col, 'value': col} for col in frame.columns[2:]],
+                    value=[frame.columns[2], frame.columns[3]],
+                    multi=True,
+                    className="mb-2",
+                    style={'color': 'black'}
+                ),
+                html.Div([
+                    dbc.Button("Select all", id='select-all-currencies', size="sm", color="secondary",
+                               outline=True, className="me-2"),
+                    dbc.Button("Clear", id='clear-currencies', size="sm", color="secondary",
+                               outline=True, className="me-3"),
+                    # WebGL: แสดงทุกสกุลเงินที่เลือก (ไม่จำกัดจำนวนเส้น/ไม่จัดกลุ่ม)
+                    dbc.Switch(id='high-cardinality', label="Show every selected currency (WebGL)",
+                               value=False, className="mb-0")
+                ], className="d-flex align-items-center mb-2"),
+                # คู่ cross rate ที่คำนวณจากสองคอลัมน์ที่เทียบกับ US$ เช่น EUR/JPY
+                html.Div([
+                    html.Label("Cross rate :", className="fw-bold me-2 mb-0"),
+                    dcc.Dropdown(
+                        id='pair-base',
+                        options=cross_rates.currencies,
+                        value='EUR' if 'EUR' in cross_rates.currencies else cross_rates.currencies[0],
+                        clearable=False,
+                        style={'color': 'black', 'width': '9em'}
+                    ),
+                    html.Span("/", className="mx-2"),
+                    dcc.Dropdown(
+                        id='pair-quote',
+                        options=cross_rates.currencies,
+                        value='JPY' if 'JPY' in cross_rates.currencies else cross_rates.currencies[-1],
+                        clearable=False,
+                        style={'color': 'black', 'width': '9em'}
+                    ),
+                    dbc.Button("Add pair", id='add-pair', size="sm", color="secondary", outline=True, className="ms-2")
+                ], className="d-flex align-items-center mb-3")
+            ], width=12)       
+        ]),
     
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Date Range:", className="fw-bold"),
-            # เปลี่ยนจาก DatePickerRange เป็น RangeSlider
-            dcc.RangeSlider(
-                id='date-range-slider',
-                min=0,
-                max=len(exchange_data) - 1,  # ใช้ index ของข้อมูลแทนวันที่จริง
-                step=1,
-                value=[0, len(exchange_data) - 1],  # เริ่มต้นด้วยช่วงข้อมูลทั้งหมด
-                marks={
-                    0: {'label': exchange_data['Date'].min().strftime('%Y-%m-%d')},
-                    len(exchange_data) - 1: {'label': exchange_data['Date'].max().strftime('%Y-%m-%d')},
-                    len(exchange_data) // 4: {'label': exchange_data['Date'].iloc[len(exchange_data) // 4].strftime('%Y-%m-%d')},
-                    len(exchange_data) // 2: {'label': exchange_data['Date'].iloc[len(exchange_data) // 2].strftime('%Y-%m-%d')},
-                    3 * len(exchange_data) // 4: {'label': exchange_data['Date'].iloc[3 * len(exchange_data) // 4].strftime('%Y-%m-%d')}
-                },
-                className="mb-3"
-            ),
-            # เพิ่มข้อความแสดงวันที่ที่เลือก
-            html.Div(id='date-range-display', className="text-center mb-3")
-        ], width=12)
-    ], className="mb-4"),
-
-    # Graphs Grid - เลือกแค่กราฟที่จำเป็นและใช้ง่าย
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Exchange Rate Trends Over Time"),
-            dcc.Graph(id='line-chart')
-        ], className="shadow-sm"), width=12),
-    ], className="mb-4"),
-
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Histogram of Currency Distribution"),
-            dcc.Graph(id='histogram-chart')
-        ], className="shadow-sm"), width=12, lg=6),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Date Range:", className="fw-bold"),
+                # เปลี่ยนจาก DatePickerRange เป็น RangeSlider
+                dcc.RangeSlider(
+                    id='date-range-slider',
+                    min=0,
+                    max=len(frame) - 1,  # ใช้ index ของข้อมูลแทนวันที่จริง
+                    step=1,
+                    value=[0, len(frame) - 1],  # เริ่มต้นด้วยช่วงข้อมูลทั้งหมด
+                    marks={
+                        0: {'label': frame['Date'].min().strftime('%Y-%m-%d')},
+                        len(frame) - 1: {'label': frame['Date'].max().strftime('%Y-%m-%d')},
+                        len(frame) // 4: {'label': frame['Date'].iloc[len(frame) // 4].strftime('%Y-%m-%d')},
+                        len(frame) // 2: {'label': frame['Date'].iloc[len(frame) // 2].strftime('%Y-%m-%d')},
+                        3 * len(frame) // 4: {'label': frame['Date'].iloc[3 * len(frame) // 4].strftime('%Y-%m-%d')}
+                    },
+                    className="mb-3"
+                ),
+                # เพิ่มข้อความแสดงวันที่ที่เลือก
+                html.Div(id='date-range-display', className="text-center mb-3")
+            ], width=12)
+        ], className="mb-4"),
+
+        # SMA/EMA/Bollinger/ความผันผวนแบบ rolling บนกราฟเส้นและกราฟพยากรณ์
+        dbc.Row([
+            dbc.Col([
+                html.Label("Overlays (line and forecast charts) :", className="fw-bold"),
+                dcc.Dropdown(
+                    id='overlay-kinds',
+                    options=[{'label': label, 'value': kind} for kind, label in overlay_labels.items()],
+                    value=[],
+                    multi=True,
+                    placeholder="None",
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=12, lg=8),
+            dbc.Col([
+                html.Label("Overlay windows (days) :", className="fw-bold"),
+                dbc.Input(id='overlay-windows', type='text', value=default_overlay_windows, debounce=True,
+                          className="mb-3")
+            ], width=12, lg=4)
+        ], className="mb-2"),
+
+        # Graphs Grid - เลือกแค่กราฟที่จำเป็นและใช้ง่าย
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Exchange Rate Trends Over Time"),
+                dcc.Graph(id='line-chart')
+            ], className="shadow-sm"), width=12),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Histogram of Currency Distribution"),
+                dcc.Graph(id='histogram-chart')
+            ], className="shadow-sm"), width=12, lg=6),
         
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Exchange Rate Distribution"),
-            dcc.Graph(id='box-plot')
-        ], className="shadow-sm"), width=12, lg=6),
-    ], className="mb-4"),
-
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Currency Correlation (Select 2 Currencies)"),
-            dcc.Graph(id='bubble-chart')
-        ], className="shadow-sm"), width=12, lg=6),
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Exchange Rate Distribution"),
+                dcc.Graph(id='box-plot')
+            ], className="shadow-sm"), width=12, lg=6),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                html.Label("Aggregation period :", className="fw-bold"),
+                dcc.Dropdown(
+                    id='rollup-resolution',
+                    options=[{'label': 'Auto', 'value': 'auto'}] +
+                            [{'label': label, 'value': resolution} for resolution, label in RESOLUTIONS.items()],
+                    value=default_rollup_resolution,
+                    clearable=False,
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=12, lg=6)
+        ]),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Currency Correlation (Select 2 Currencies)"),
+                dcc.Graph(id='bubble-chart')
+            ], className="shadow-sm"), width=12, lg=6),
         
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Monthly Change Overview"),
-            dcc.Graph(id='area-chart')
-        ], className="shadow-sm"), width=12, lg=6),
-    ], className="mb-4"),
-
-    # Inflation Section
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Inflation Series:", className="fw-bold"),
-            dcc.Dropdown(
-                id='inflation-series-dropdown',
-                options=[{'label': series, 'value': series} for series in inflation_data['Series_Name'].unique()],
-                value='Headline Consumer Price Inflation',
-                multi=False,
-                className="mb-3",
-                style={'color': 'black'}
-            )
-        ], width=12)
-    ]),
-
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Inflation Trends Across Countries"),
-            dcc.Graph(id='inflation-line-chart')
-        ], className="shadow-sm"), width=12),
-    ], className="mb-4"),
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Monthly Change Overview"),
+                dcc.Graph(id='area-chart')
+            ], className="shadow-sm"), width=12, lg=6),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("OHLC Candlestick"),
+                dcc.Dropdown(
+                    id='ohlc-currency-dropdown',
+                    options=[],  # อัปเดตตามสกุลเงินที่เลือก
+                    value=None,
+                    clearable=False,
+                    className="m-2",
+                    style={'color': 'black'}
+                ),
+                dcc.Graph(id='ohlc-chart')
+            ], className="shadow-sm"), width=12),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Rolling Correlation"),
+                dcc.Dropdown(
+                    id='rolling-window',
+                    options=[{'label': f"{days}-day window", 'value': days} for days in rolling_windows],
+                    value=default_rolling_window,
+                    clearable=False,
+                    className="m-2",
+                    style={'color': 'black'}
+                ),
+                dcc.Graph(id='rolling-corr-chart')
+            ], className="shadow-sm"), width=12, lg=8),
+
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Pair Ranking"),
+                html.Div(id='correlation-ranking', className="p-3")
+            ], className="shadow-sm"), width=12, lg=4),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Cross-Rate Matrix"),
+                dcc.Graph(id='cross-rate-matrix')
+            ], className="shadow-sm"), width=12),
+        ], className="mb-4"),
+
+        # Inflation Section
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Inflation Series:", className="fw-bold"),
+                dcc.Dropdown(
+                    id='inflation-series-dropdown',
+                    options=[{'label': series, 'value': series} for series in inflation_data['Series_Name'].unique()],
+                    value='Headline Consumer Price Inflation',
+                    multi=False,
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=12)
+        ]),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Inflation Trends Across Countries"),
+                dcc.Graph(id='inflation-line-chart')
+            ], className="shadow-sm"), width=12),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Real Exchange Rates"),
+                dcc.Graph(id='real-rate-chart')
+            ], className="shadow-sm"), width=12, lg=8),
+
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Nominal vs Real Change"),
+                html.Div(id='real-rate-stats', className="p-3")
+            ], className="shadow-sm"), width=12, lg=4),
+        ], className="mb-4"),
     
     
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select currency for forecasting :", className="fw-bold"),
-            dcc.Dropdown(
-                id='forecast-currency-dropdown',
-                options=[],  # เราจะอัปเดตตัวเลือกนี้ตาม callback
-                value=None,  # ค่าเริ่มต้นจะถูกกำหนดโดย callback
-                multi=False,
-                className="mb-3",
-                style={'color': 'black'}
-            )
-        ], width=12)
-    ], className="mb-3"),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select currency for forecasting :", className="fw-bold"),
+                dcc.Dropdown(
+                    id='forecast-currency-dropdown',
+                    options=[],  # เราจะอัปเดตตัวเลือกนี้ตาม callback
+                    value=None,  # ค่าเริ่มต้นจะถูกกำหนดโดย callback
+                    multi=False,
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=6),
+            dbc.Col([
+                html.Label("Forecast model :", className="fw-bold"),
+                dcc.Dropdown(
+                    id='forecast-model',
+                    options=[{'label': model.label, 'value': name} for name, model in MODELS.items()],
+                    value=DEFAULT_MODEL,
+                    clearable=False,
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=3),
+            dbc.Col([
+                html.Label("Forecast horizon :", className="fw-bold"),
+                dcc.Dropdown(
+                    id='forecast-horizon',
+                    options=[{'label': f"{days} days", 'value': days} for days in forecast_horizons],
+                    value=default_forecast_horizon,
+                    clearable=False,
+                    className="mb-3",
+                    style={'color': 'black'}
+                )
+            ], width=3)
+        ], className="mb-3"),
     
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dbc.CardHeader("Trend Analysis & Forecasting"),
-            dcc.Graph(id='forecast-chart')
-        ], className="shadow-sm"), width=12),
-    ], className="mb-4"),
-
-    # Simple Statistics Section
-    dbc.Row([
-        dbc.Col(html.Div(id='statistics-output', 
-                         className="p-3 bg-light rounded"), 
-                width=12)
-    ]),
-
-    dbc.Row([
-        dbc.Col(html.H3("Key Insights", className="mt-4 mb-3 text-primary"), width=12),
-        dbc.Col(html.Div(id='key-insights'), width=12)
-    ], className="mb-4"),
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardHeader("Trend Analysis & Forecasting"),
+                # แสดงความคืบหน้าขณะคำนวณการพยากรณ์ใน background
+                dbc.Progress(id='forecast-progress', value=0, max=forecast_progress_steps,
+                             striped=True, animated=True, style={'display': 'none'}),
+                dcc.Graph(id='forecast-chart')
+            ], className="shadow-sm"), width=12),
+        ], className="mb-4"),
+
+        # Simple Statistics Section
+        dbc.Row([
+            dbc.Col(html.Div(id='statistics-output', 
+                             className="p-3 bg-light rounded"), 
+                    width=12)
+        ]),
+
+        dbc.Row([
+            dbc.Col(html.H3("Key Insights", className="mt-4 mb-3 text-primary"), width=12),
+            dbc.Col(html.Div(id='key-insights'), width=12)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(html.H3("Anomalies & Regime Shifts", className="mt-2 mb-3 text-primary"), width=12),
+            dbc.Col(html.Div(id='anomaly-insights'), width=12)
+        ], className="mb-4"),
     
-    # Footer
-    html.Footer(
-        "© 2025 Global Financial Dashboard - All Rights Reserved",
-        className="text-center text-light py-3 bg-dark mt-4"
-    )   
-], fluid=True)
+        # Footer
+        html.Footer(
+            "© 2025 Global Financial Dashboard - All Rights Reserved",
+            className="text-center text-light py-3 bg-dark mt-4"
+        )   
+    ], fluid=True)
+
+
+app.layout = serve_layout
 
 # Callback สำหรับแสดงวันที่ที่เลือกจาก RangeSlider
-@app.callback(
-    Output('date-range-display', 'children'),
-    [Input('date-range-slider', 'value')]
-)
 def update_date_display(date_indices):
     if date_indices is None:
         return "Please select a date range"
     
-    start_date = exchange_data['Date'].iloc[date_indices[0]].strftime('%Y-%m-%d')
-    end_date = exchange_data['Date'].iloc[date_indices[1]].strftime('%Y-%m-%d')
+    snapshot = data
+    start_idx, end_idx = _date_window(snapshot, date_indices)
+    start_date = snapshot.frame['Date'].iloc[start_idx].strftime('%Y-%m-%d')
+    end_date = snapshot.frame['Date'].iloc[end_idx].strftime('%Y-%m-%d')
     
     return html.P([
         "Selected period: ",
         html.Strong(f"{start_date} to {end_date}")
     ])
+
+
+# slider เปลี่ยนเฉพาะช่วง - ในโหมด client กราฟเส้นและ area ถูกตัดช่วงใน browser จึงอ่าน slider เป็น State
+_window_trigger = State if client_windowing else Input
+
+if client_windowing:
+    app.clientside_callback(
+        ClientsideFunction('fx', 'loadDataset'),
+        Output('client-dataset', 'data'),
+        Input('dataset-source', 'data')
+    )
+    app.clientside_callback(
+        ClientsideFunction('fx', 'dateDisplay'),
+        Output('date-range-display', 'children'),
+        [Input('date-range-slider', 'value'),
+         Input('client-dataset', 'data')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('fx', 'lineWindow'),
+        Output('line-chart', 'figure', allow_duplicate=True),
+        Input('date-range-slider', 'value'),
+        [State('line-chart', 'figure'),
+         State('currency-dropdown', 'value'),
+         State('viewport-width', 'data'),
+         State('client-dataset', 'data'),
+         State('dataset-source', 'data'),
+         State('high-cardinality', 'value')],
+        prevent_initial_call=True
+    )
+    app.clientside_callback(
+        ClientsideFunction('fx', 'areaWindow'),
+        Output('area-chart', 'figure', allow_duplicate=True),
+        Input('date-range-slider', 'value'),
+        [State('area-chart', 'figure'),
+         State('currency-dropdown', 'value'),
+         State('rollup-resolution', 'value'),
+         State('viewport-width', 'data'),
+         State('client-dataset', 'data'),
+         State('dataset-source', 'data'),
+         State('high-cardinality', 'value')],
+        prevent_initial_call=True
+    )
+else:
+    app.callback(
+        Output('date-range-display', 'children'),
+        [Input('date-range-slider', 'value')]
+    )(update_date_display)
+
+
+@server.route('/_dataset')
+def client_dataset_payload():
+    # ตารางอัตราแลกเปลี่ยนแบบ typed array สำหรับโหมด client (ETag ตาม revision ของข้อมูล)
+    snapshot = data
+    return client_dataset.response(
+        request, snapshot.generation,
+        lambda: (snapshot.dates, snapshot.frame[currency_columns].to_numpy(), currency_columns)
+    )
+
+
+# อ่านความกว้างหน้าจอจาก browser ครั้งเดียวตอนโหลดหน้า
+app.clientside_callback(
+    "function(_) { return window.innerWidth; }",
+    Output('viewport-width', 'data'),
+    Input('viewport-width', 'id')
+)
     
 @app.callback(
     [Output('forecast-currency-dropdown', 'options'),
-     Output('forecast-currency-dropdown', 'value')],
+     Output('forecast-currency-dropdown', 'value'),
+     Output('ohlc-currency-dropdown', 'options'),
+     Output('ohlc-currency-dropdown', 'value')],
     [Input('currency-dropdown', 'value')]
 )
 def update_forecast_dropdown(selected_currencies):
     options = [{'label': currency, 'value': currency} for currency in selected_currencies] if selected_currencies else []
     default_value = selected_currencies[0] if selected_currencies else None
-    return options, default_value
+    # candlestick ใช้ rollup ของคอลัมน์ จึงเลือกได้เฉพาะสกุลเงินปกติ (ไม่รวมคู่ cross rate)
+    ohlc_options = [option for option in options if not data.cross_rates.parse(option['value'])]
+    return options, default_value, ohlc_options, ohlc_options[0]['value'] if ohlc_options else None
+
+
+def _pair_option(pair):
+    return {'label': f"{pair} (cross rate)", 'value': pair}
+
 
-# Callback สำหรับอัปเดตกราฟและสถิติ
 @app.callback(
-    [Output('line-chart', 'figure'),
-     Output('histogram-chart', 'figure'),
-     Output('bubble-chart', 'figure'),
-     Output('box-plot', 'figure'),
-     Output('area-chart', 'figure'),
-     Output('inflation-line-chart', 'figure'),
-     Output('forecast-chart', 'figure'),
-     Output('statistics-output', 'children')],
-    [Input('currency-dropdown', 'value'),
-     Input('inflation-series-dropdown', 'value'),
-     Input('date-range-slider', 'value'),
-     Input('forecast-currency-dropdown', 'value')]
+    [Output('currency-dropdown', 'value'),
+     Output('currency-dropdown', 'options')],
+    [Input('select-all-currencies', 'n_clicks'),
+     Input('clear-currencies', 'n_clicks'),
+     Input('add-pair', 'n_clicks')],
+    [State('pair-base', 'value'),
+     State('pair-quote', 'value'),
+     State('currency-dropdown', 'value'),
+     State('currency-dropdown', 'options')],
+    prevent_initial_call=True
 )
+def select_currencies(select_all_clicks, clear_clicks, add_pair_clicks, base, quote, selected_currencies, options):
+    if ctx.triggered_id == 'select-all-currencies':
+        return list(currency_columns), no_update
+    if ctx.triggered_id == 'clear-currencies':
+        return [], no_update
+    pair = pair_name(base, quote)
+    if not data.cross_rates.parse(pair):
+        return no_update, no_update
+    # เพิ่มคู่ cross rate เป็นตัวเลือกของ dropdown (ครั้งเดียว) แล้วเลือกคู่นั้นด้วย
+    if all(option['value'] != pair for option in options):
+        options = options + [_pair_option(pair)]
+    return list(dict.fromkeys((selected_currencies or []) + [pair])), options
+
+def _selected_currencies(selected_currencies):
+    # เรียงสกุลเงินตามลำดับคอลัมน์ เพื่อให้ลำดับการเลือกที่ต่างกันใช้ cache เดียวกัน (ไม่รวมคู่ cross rate)
+    selected_currencies = canonical_currencies(selected_currencies, currency_columns)
 
-def update_dashboard(selected_currencies, selected_inflation_series, date_indices, forecast_currency):
     # ตรวจสอบว่ามีการเลือกสกุลเงินหรือไม่
-    if not selected_currencies:
-        selected_currencies = [exchange_data.columns[2]]  # default to first currency
-    
+    return selected_currencies or (currency_columns[0],)  # default to first currency
+
+
+def _selected_series(snapshot, selected_currencies):
+    # กราฟเส้น สถิติ และการพยากรณ์รับคู่ cross rate ด้วย - ต่อท้ายสกุลเงินปกติตามลำดับที่เลือก
+    pairs = tuple(dict.fromkeys(name for name in selected_currencies or [] if snapshot.cross_rates.parse(name)))
+    return canonical_currencies(selected_currencies, currency_columns) + pairs or (currency_columns[0],)
+
+
+def _date_window(snapshot, date_indices):
+    # worker อื่นอาจรับแถวใหม่ก่อน worker นี้ - slider จาก browser จึงอาจเกินแถวสุดท้ายที่มี
+    last = len(snapshot.frame) - 1
+    if not date_indices:
+        return 0, last
+    start, end = (min(max(int(index), 0), last) for index in date_indices)
+    return start, end
+
+
+def _filtered_exchange_data(snapshot, date_window):
     # กรองข้อมูลตามช่วงวันที่จาก slider
-    if date_indices:
-        start_idx, end_idx = date_indices
-        filtered_exchange_data = exchange_data.iloc[start_idx:end_idx+1]
+    start_idx, end_idx = date_window
+    return snapshot.frame.iloc[start_idx:end_idx+1]
+
+
+def _series_data(snapshot, date_window, names):
+    # ข้อมูลช่วงวันที่ พร้อมคอลัมน์ของคู่ cross rate ใน names (ชื่อคอลัมน์คือชื่อคู่ เช่น 'EUR/JPY')
+    filtered_exchange_data = _filtered_exchange_data(snapshot, date_window)
+    cross_rates = snapshot.cross_rates
+    pairs = {name: cross_rates.series(name, *date_window) for name in names if cross_rates.parse(name)}
+    return filtered_exchange_data.assign(**pairs) if pairs else filtered_exchange_data
+
+
+def _window_only_change():
+    # True เมื่อ callback ถูกเรียกเพราะเลื่อน slider อย่างเดียว -> ส่งเฉพาะข้อมูลที่เปลี่ยนด้วย Patch
+    return set(ctx.triggered_prop_ids) == {'date-range-slider.value'}
+
+
+def _trace_class(high_cardinality):
+    # WebGL วาดเส้น/จุดจำนวนมากได้เร็วกว่า SVG มาก
+    return go.Scattergl if high_cardinality else go.Scatter
+
+
+def _point_budget(viewport_width, fraction=1.0):
+    # 1 จุดต่อ pixel ของกราฟ (min + max ทุก 2 pixel); ปัดเป็นช่วง 200px เพื่อให้ cache ใช้ร่วมกันได้
+    width = (viewport_width or default_viewport_width) * fraction
+    return max(200, int(round(width / 200.0)) * 200)
+
+
+def _trace_dates(frame):
+    # ข้อมูลเป็นรายวัน ส่งวันที่แบบ YYYY-MM-DD แทน timestamp ระดับ nanosecond
+    return frame['Date'].to_numpy().astype('datetime64[D]')
+
+
+def _uirevision(date_window):
+    # เปลี่ยน uirevision เมื่อช่วง slider เปลี่ยน เพื่อยกเลิกการ zoom เดิมของผู้ใช้
+    return f"{date_window[0]}-{date_window[1]}"
+
+
+def _zoom_window(snapshot, relayout_data, date_window):
+    # แปลงช่วงที่ผู้ใช้ zoom (relayoutData) เป็นช่วง index ภายในช่วงของ slider
+    if not relayout_data:
+        return None
+    if relayout_data.get('xaxis.autorange'):
+        return date_window
+    if 'xaxis.range[0]' in relayout_data:
+        x_range = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        x_range = relayout_data['xaxis.range']
     else:
-        filtered_exchange_data = exchange_data
-        
-    
-    # 1. กราฟเส้น - แสดงแนวโน้มตามเวลา (รองรับทุกจำนวนสกุลเงิน)
+        return None
+    # เก็บจุดนอกขอบไว้ข้างละจุด เพื่อให้เส้นลากต่อถึงขอบกราฟ
+    start = np.searchsorted(snapshot.dates, pd.Timestamp(x_range[0]).to_datetime64(), 'left') - 1
+    end = np.searchsorted(snapshot.dates, pd.Timestamp(x_range[1]).to_datetime64(), 'right')
+    start, end = max(start, date_window[0]), min(end, date_window[1])
+    return (start, end) if start < end else None
+
+
+def _zoom_only_change(graph_id):
+    return set(ctx.triggered_prop_ids) == {f'{graph_id}.relayoutData'}
+
+
+def _patch_traces(traces):
+    # ข้อมูลตัวเลขส่งเป็น typed array แบบเดียวกับกราฟเต็ม (encode_figure)
+    traces, _ = encode_traces(traces)
+    patch = Patch()
+
+    def assign(target, props):
+        for prop, value in props.items():
+            # dict ย่อย เช่น marker.color - แก้เฉพาะค่าย่อย ไม่ทับ style เดิม (ยกเว้น typed array ที่ต้องแทนทั้งก้อน)
+            if isinstance(value, dict) and not {'bdata', 'same_as'} & value.keys():
+                assign(target[prop], value)
+            else:
+                target[prop] = value
+
+    for i, trace in enumerate(traces):
+        assign(patch['data'][i], trace)
+    return patch
+
+
+# 1. กราฟเส้น - แสดงแนวโน้มตามเวลา (รองรับทุกจำนวนสกุลเงิน)
+def _line_traces(filtered_exchange_data, currencies, max_points):
+    # ลดจำนวนจุดของแต่ละเส้นให้พอดีกับความกว้างกราฟ โดยยังเก็บจุดสูงสุด/ต่ำสุดไว้
+    dates = _trace_dates(filtered_exchange_data)
+    traces = []
+    for currency in currencies:
+        values = filtered_exchange_data[currency].to_numpy()
+        keep = downsample_indices(values, max_points)
+        traces.append(dict(x=dates[keep], y=values[keep]))
+    return traces
+
+
+def _line_trace(i, currency, trace, high_cardinality):
+    return _trace_class(high_cardinality)(
+        **trace,
+        mode='lines', 
+        name=currency,
+        line=dict(
+            color=enhanced_palette[i % len(enhanced_palette)],
+            width=2
+        )
+    )
+
+
+def _line_stream(selected_currencies, data_window, max_points, high_cardinality):
+    # เส้นหลัง max_currencies_to_show เส้นแรกทยอยส่งผ่าน line-stream-* (None ถ้าไม่มีเส้นเหลือ)
+    if not high_cardinality or len(selected_currencies) <= max_currencies_to_show:
+        return None
+    return {'currencies': list(selected_currencies), 'window': list(data_window), 'max_points': max_points}
+
+
+# ชั้น marker ของ jump/การเปลี่ยนความผันผวน ต่อท้ายเส้นของสกุลเงิน (ไม่แสดงในโหมดหลายสกุลเงิน)
+anomaly_markers = {
+    'jump': ("Jumps", dict(symbol='x', size=9, color='#333333')),
+    'vol-up': ("Volatility up", dict(symbol='triangle-up', size=11, color=enhanced_palette[3])),
+    'vol-down': ("Volatility down", dict(symbol='triangle-down', size=11, color=enhanced_palette[2])),
+}
+
+
+def _anomaly_traces(snapshot, currencies, date_window):
+    # หนึ่ง trace ต่อชนิด (ลำดับตาม anomaly_markers) จุดอยู่บนเส้นของสกุลเงิน ณ วันที่ตรวจพบ
+    columns = [currency for currency in currencies if currency in snapshot.anomaly_detector.columns]
+    found = {kind: ([], [], []) for kind in anomaly_markers}
+    for row, column, kind, score, start in snapshot.anomaly_detector.events(*date_window, columns):
+        x, y, text = found[kind]
+        x.append(snapshot.dates[row])
+        y.append(snapshot.frame[column].iat[row])
+        name = column.split(' - ')[0]
+        text.append(f"{name}: jump (z = {score:+.1f})" if kind == 'jump' else
+                    f"{name}: volatility x{score:.1f} since {pd.Timestamp(snapshot.dates[start]):%Y-%m-%d}")
+    return [dict(x=np.array(x, dtype='datetime64[D]'), y=np.array(y, dtype=np.float64), hovertext=text)
+            for x, y, text in found.values()]
+
+
+def _anomaly_trace(kind, trace, date_window):
+    name, marker = anomaly_markers[kind]
+    return go.Scatter(**trace, mode='markers', name=name, marker=marker, hoverinfo='text',
+                      meta=_server_window(date_window))
+
+
+def _server_window(date_window):
+    # meta บอก client_windowing.js ว่า trace ที่คำนวณบน server เป็นของช่วงไหน (ซ่อนเมื่อเลื่อน slider ใน browser)
+    return {'server_window': _uirevision(date_window)}
+
+
+# ชั้น overlay ต่อท้าย marker ของ anomaly - ค่าของทั้งคอลัมน์จาก overlays ตัดตามช่วง (ไม่แสดงในโหมดหลายสกุลเงิน)
+overlay_dashes = {'sma': 'dash', 'ema': 'dot', 'bollinger': 'dashdot', 'volatility': 'longdash'}
+
+
+def _overlay_specs(snapshot, kinds, windows):
+    # ((ชนิด, window), ...) ตามลำดับของ overlay_labels - ข้ามข้อความที่ไม่ใช่ตัวเลข, window อยู่ในช่วง MIN_WINDOW..จำนวนแถว
+    lengths = []
+    for text in re.findall(r'\d+', windows or ''):
+        length = min(max(int(text), MIN_WINDOW), len(snapshot.frame))
+        if length not in lengths:
+            lengths.append(length)
+    lengths = sorted(lengths[:max_overlay_windows])
+    return tuple((kind, length) for kind in overlay_labels if kind in (kinds or []) for length in lengths)
+
+
+def _overlay_traces(snapshot, currencies, date_window, specs, max_points):
+    # ใช้จุดเดียวกับเส้นของสกุลเงิน (แกน x ส่งครั้งเดียว) - ลำดับ: สกุลเงิน > (ชนิด, window) > overlay_components
+    if not specs:
+        return []
+    filtered_exchange_data = _series_data(snapshot, date_window, currencies)
+    dates = _trace_dates(filtered_exchange_data)
+    traces = []
+    for currency in currencies:
+        keep = downsample_indices(filtered_exchange_data[currency].to_numpy(), max_points)
+        for kind, window in specs:
+            values = overlays.series(currency, snapshot.series(currency), kind, window, *date_window)
+            traces += [dict(x=dates[keep], y=values[component][keep]) for component in overlay_components[kind]]
+    return traces
+
+
+def _overlay_styles(currencies, specs, date_window):
+    # style ตามลำดับของ _overlay_traces - สีตามสกุลเงิน, legend หนึ่งรายการต่อ (ชนิด, window) ที่ซ่อนได้ทุกสกุลเงินพร้อมกัน
+    styles = []
+    for i, currency in enumerate(currencies):
+        color = enhanced_palette[i % len(enhanced_palette)]
+        r, g, b = tuple(int(color.lstrip('#')[j:j + 2], 16) for j in (0, 2, 4))
+        name = currency.split(' - ')[0]
+        for kind, window in specs:
+            label = f"{overlay_labels[kind]} {window}"
+            for component in overlay_components[kind]:
+                # เส้นหลัก (SMA ของ Bollinger) มี hover และ legend; ขอบของ Bollinger เป็นเส้นบางพร้อมพื้นที่ระหว่างกัน
+                main = component == overlay_components[kind][0]
+                style = dict(mode='lines', name=label, legendgroup=label, showlegend=i == 0 and main,
+                             yaxis='y2' if kind == 'volatility' else 'y', meta=_server_window(date_window),
+                             line=dict(color=color, width=1.5 if main else 0.5, dash=overlay_dashes[kind] if main else 'solid'))
+                if main:
+                    unit = "%{y:.1f}%" if kind == 'volatility' else "%{y:.4f}"
+                    style['hovertemplate'] = f"{name} {label}: {unit}<extra></extra>"
+                else:
+                    style['hoverinfo'] = 'skip'
+                if component == 'lower':
+                    style.update(fill='tonexty', fillcolor=f'rgba({r}, {g}, {b}, 0.08)')
+                styles.append(style)
+    return styles
+
+
+def _add_overlays(snapshot, figure, currencies, date_window, specs, max_points):
+    # ส่ง dict ทีเดียวทั้งชุด - plotly ตรวจค่าแต่ละ trace ครั้งเดียว (go.Scatter + add_trace ตรวจสองครั้ง)
+    figure.add_traces([dict(type='scatter', **trace, **style)
+                       for style, trace in zip(_overlay_styles(currencies, specs, date_window),
+                                               _overlay_traces(snapshot, currencies, date_window, specs, max_points))])
+    if any(kind == 'volatility' for kind, _ in specs):
+        # ความผันผวน (% ต่อปี) ใช้แกน y ด้านขวา
+        figure.update_layout(yaxis2=dict(title="Rolling volatility (% p.a.)", overlaying='y', side='right',
+                                         showgrid=False, rangemode='tozero'))
+
+
+@figure_cache.memoize('line')
+@metrics.stage('line')
+def build_line_figure(snapshot, selected_currencies, date_window, max_points, high_cardinality=False,
+                      overlay_specs=()):
+    filtered_exchange_data = _series_data(snapshot, date_window, selected_currencies)
     line_fig = go.Figure()
-    max_currencies_to_show = 10  # จำกัดจำนวนเส้นในกราฟเพื่อความชัดเจน
-    
-    for i, currency in enumerate(selected_currencies[:max_currencies_to_show]):
-        line_fig.add_trace(go.Scatter(
-            x=filtered_exchange_data['Date'], 
-            y=filtered_exchange_data[currency], 
-            mode='lines', 
-            name=currency,
-            line=dict(
-                color=enhanced_palette[i % len(enhanced_palette)],
-                width=2
-            )
-        ))
+
+    currencies = selected_currencies[:max_currencies_to_show]
+    for i, (currency, trace) in enumerate(zip(currencies, _line_traces(filtered_exchange_data, currencies, max_points))):
+        line_fig.add_trace(_line_trace(i, currency, trace, high_cardinality))
+    if not high_cardinality:
+        for kind, trace in zip(anomaly_markers, _anomaly_traces(snapshot, currencies, date_window)):
+            line_fig.add_trace(_anomaly_trace(kind, trace, date_window))
+        _add_overlays(snapshot, line_fig, currencies, date_window, overlay_specs, max_points)
     
     line_fig.update_layout(
         title=f"Exchange Rates for {len(selected_currencies)} Selected Currencies", 
@@ -275,31 +869,133 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
         hovermode="x unified",
         template="plotly_white",
         plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
+        paper_bgcolor='rgba(0,0,0,0)',
+        uirevision=_uirevision(date_window)
     )
     
-    if len(selected_currencies) > max_currencies_to_show:
+    if len(selected_currencies) > max_currencies_to_show and not high_cardinality:
         line_fig.add_annotation(
             text=f"Showing first {max_currencies_to_show} out of {len(selected_currencies)} selected currencies",
             xref="paper", yref="paper",
             x=1, y=1.1, showarrow=False,
             font=dict(size=12, color=enhanced_palette[3])  # ใช้สีแดงจากชุดสีใหม่
         )
+    return encode_figure(line_fig)
+
+
+@app.callback(
+    [Output('line-chart', 'figure'),
+     Output('line-stream-0', 'data')],
+    [Input('currency-dropdown', 'value'),
+     _window_trigger('date-range-slider', 'value'),
+     Input('viewport-width', 'data'),
+     Input('line-chart', 'relayoutData'),
+     Input('high-cardinality', 'value'),
+     Input('overlay-kinds', 'value'),
+     Input('overlay-windows', 'value')]
+)
+def update_line_chart(selected_currencies, date_indices, viewport_width, relayout_data, high_cardinality,
+                      overlay_kinds, overlay_windows):
+    snapshot = data
+    selected_currencies = _selected_series(snapshot, selected_currencies)
+    date_window = _date_window(snapshot, date_indices)
+    max_points = _point_budget(viewport_width)
+    overlay_specs = _overlay_specs(snapshot, overlay_kinds, overlay_windows)
+    first_currencies = selected_currencies[:max_currencies_to_show]
+    if _zoom_only_change('line-chart'):
+        # ผู้ใช้ zoom/pan - ดึงข้อมูลละเอียดขึ้นเฉพาะช่วงที่มองเห็น
+        zoom_window = _zoom_window(snapshot, relayout_data, date_window)
+        if zoom_window is None:
+            return no_update, no_update
+        data_window = zoom_window
+        traces = _line_traces(_series_data(snapshot, zoom_window, first_currencies), first_currencies, max_points)
+        if not high_cardinality:
+            # overlay อ้างแกน x ของเส้น (same_as) - ต้องส่งค่าของช่วงที่ zoom ไปพร้อมกัน ไม่งั้น x ใหม่คู่กับ y เดิม
+            traces += _anomaly_traces(snapshot, first_currencies, zoom_window) + \
+                _overlay_traces(snapshot, first_currencies, zoom_window, overlay_specs, max_points)
+        patch = _patch_traces(traces)
+    elif _window_only_change():
+        data_window = date_window
+        traces = _line_traces(_series_data(snapshot, date_window, first_currencies), first_currencies, max_points)
+        if not high_cardinality:
+            # marker และ overlay ของช่วงใหม่ - overlay เป็นเพียงการตัด array ที่คำนวณไว้แล้ว
+            traces += [dict(trace, meta=_server_window(date_window))
+                       for trace in _anomaly_traces(snapshot, first_currencies, date_window) +
+                       _overlay_traces(snapshot, first_currencies, date_window, overlay_specs, max_points)]
+        patch = _patch_traces(traces)
+        patch['layout']['uirevision'] = _uirevision(date_window)
+    else:
+        data_window = date_window
+        patch = build_line_figure(snapshot, selected_currencies, date_window, max_points, bool(high_cardinality),
+                                  overlay_specs)
+    # เส้นที่เหลือส่งใหม่ทั้งหมดตามช่วงข้อมูลล่าสุด
+    stream = _line_stream(selected_currencies, data_window, max_points, high_cardinality)
+    return patch, stream if stream is not None else no_update
+
+
+def _stream_line_stage(stage):
+    # รอบที่ stage ส่งเส้นช่วงที่ stage ของเส้นที่เหลือ แล้วส่ง store ต่อให้รอบถัดไป
+    def stream_line_traces(stream, selected_currencies):
+        last_stage = stage == line_stream_stages
+        snapshot = data
+        # ผู้ใช้เปลี่ยนสกุลเงินแล้ว - กราฟใหม่มี stream ชุดใหม่ของตัวเอง
+        if not stream or stream['currencies'] != list(_selected_series(snapshot, selected_currencies)):
+            return [no_update] if last_stage else [no_update, no_update]
+        remaining = len(stream['currencies']) - max_currencies_to_show
+        start = max_currencies_to_show + remaining * (stage - 1) // line_stream_stages
+        end = max_currencies_to_show + remaining * stage // line_stream_stages
+        currencies = stream['currencies'][start:end]
+        traces = _line_traces(_series_data(snapshot, stream['window'], currencies), currencies, stream['max_points'])
+        traces, _ = encode_traces([
+            _line_trace(i, currency, trace, True).to_plotly_json()
+            for i, (currency, trace) in enumerate(zip(currencies, traces), start)
+        ])
+        patch = Patch()
+        for i, trace in enumerate(traces, start):
+            patch['data'][i] = trace  # ต่อท้าย หรือแทนเส้นเดิมเมื่อช่วงวันที่เปลี่ยน
+        return [patch] if last_stage else [patch, stream]
+    return stream_line_traces
+
+
+# ต่อกันเป็นสาย (line-stream-0 -> 1 -> ...) เพราะ callback ที่ output เป็น input ของตัวเองจะไม่ถูกเรียกซ้ำ
+for stage in range(1, line_stream_stages + 1):
+    app.callback(
+        [Output('line-chart', 'figure', allow_duplicate=True)] +
+        ([Output(f'line-stream-{stage}', 'data')] if stage < line_stream_stages else []),
+        [Input(f'line-stream-{stage - 1}', 'data')],
+        [State('currency-dropdown', 'value')],
+        prevent_initial_call=True
+    )(_stream_line_stage(stage))
+
+
+# 2. Histogram - แสดงการกระจายตัวของข้อมูลสำหรับแต่ละสกุลเงิน
+def _histogram_bars(snapshot, selected_currencies, date_window, max_bins):
+    # นับจาก histogram_index แล้วส่งเป็นแท่งที่รวมค่าแล้ว (ไม่ส่งค่าดิบทุกค่าให้ browser)
+    traces = []
+    for currency in selected_currencies:
+        left_edges, widths, counts = snapshot.histogram_index.histogram(currency, *date_window, max_bins=max_bins)
+        traces.append(dict(x=left_edges + widths / 2, y=counts, width=widths))
+    return traces
+
+
+def _histogram_bar_budget(viewport_width):
+    # กราฟครึ่งความกว้างบนจอใหญ่ แท่งละประมาณ 4 pixel
+    return _point_budget(viewport_width, 0.5) // 4
 
-    # 2. Histogram - แสดงการกระจายตัวของข้อมูลสำหรับแต่ละสกุลเงิน
+
+@figure_cache.memoize('histogram')
+@metrics.stage('histogram')
+def build_histogram_figure(snapshot, selected_currencies, date_window, max_bins):
     histogram_fig = go.Figure()
 
     # ใช้สีจากชุดสีใหม่เพื่อให้มองเห็นได้ชัดเจนขึ้น
-    for i, currency in enumerate(selected_currencies):
-        histogram_fig.add_trace(go.Histogram(
-            x=filtered_exchange_data[currency],
+    bars = _histogram_bars(snapshot, selected_currencies, date_window, max_bins)
+    for i, (currency, trace) in enumerate(zip(selected_currencies, bars)):
+        histogram_fig.add_trace(go.Bar(
+            **trace,
             name=currency,
             opacity=0.7,
-            marker_color=enhanced_palette[i % len(enhanced_palette)],
-            xbins=dict(
-                size=0.02  # ให้ bin size เล็กลงเพื่อให้ได้รายละเอียดมากขึ้น
-            ),
-            autobinx=False  # ปิดการกำหนด bin อัตโนมัติ
+            marker_color=enhanced_palette[i % len(enhanced_palette)]
         ))
 
     histogram_fig.update_layout(
@@ -308,33 +1004,63 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
         yaxis_title="Frequency",
         template="plotly_white",
         barmode='overlay',  # ใช้ overlay เสมอเพื่อให้เห็นการซ้อนทับ
-        bargap=0.05,  # ลดช่องว่างระหว่างแท่ง
         plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        # เพิ่มขอบเขตของแกน x เพื่อให้มีความกว้างเหมือนในรูป
-        xaxis=dict(range=[0.5, 2.1])
+        paper_bgcolor='rgba(0,0,0,0)'
     )
+    return encode_figure(histogram_fig)
+
+
+@app.callback(
+    Output('histogram-chart', 'figure'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('viewport-width', 'data')]
+)
+def update_histogram(selected_currencies, date_indices, viewport_width):
+    snapshot = data
+    selected_currencies = _selected_currencies(selected_currencies)
+    date_window = _date_window(snapshot, date_indices)
+    max_bins = _histogram_bar_budget(viewport_width)
+    if _window_only_change():
+        return _patch_traces(_histogram_bars(snapshot, selected_currencies, date_window, max_bins))
+    return build_histogram_figure(snapshot, selected_currencies, date_window, max_bins)
 
-    # 3. Bubble Chart - แสดงความสัมพันธ์ระหว่างสกุลเงิน
+
+# 3. Bubble Chart - แสดงความสัมพันธ์ระหว่างสกุลเงิน
+def _bubble_traces(snapshot, filtered_exchange_data, selected_currencies, date_window):
+    # เลือกเฉพาะสองสกุลเงินแรกที่ถูกเลือก
+    curr1 = selected_currencies[0]
+    curr2 = selected_currencies[1]
+    
+    # คำนวณค่า correlation ระหว่างสองสกุลเงิน
+    corr_value = snapshot.window_stats.corr(*date_window, [curr1, curr2])[0, 1]
+    return [dict(
+        x=filtered_exchange_data[curr1],
+        y=filtered_exchange_data[curr2],
+        name=f"{curr1} vs {curr2} (corr: {corr_value:.2f})",
+        marker=dict(color=filtered_exchange_data[curr1])
+    )]
+
+
+@figure_cache.memoize('bubble')
+@metrics.stage('bubble')
+def build_bubble_figure(snapshot, selected_currencies, date_window, high_cardinality=False):
+    filtered_exchange_data = _filtered_exchange_data(snapshot, date_window)
     bubble_fig = go.Figure()
     if len(selected_currencies) >= 2:
-        # เลือกเฉพาะสองสกุลเงินแรกที่ถูกเลือก
-        curr1 = selected_currencies[0]
-        curr2 = selected_currencies[1]
-        
-        # คำนวณค่า correlation ระหว่างสองสกุลเงิน
-        corr_value = filtered_exchange_data[[curr1, curr2]].corr().iloc[0, 1]
+        curr1, curr2 = selected_currencies[:2]
+        trace = _bubble_traces(snapshot, filtered_exchange_data, selected_currencies, date_window)[0]
         
         # สร้าง scatter plot แสดงความสัมพันธ์ - ใช้ Viridis colorscale ที่มองเห็นได้ง่าย
-        bubble_fig.add_trace(go.Scatter(
-            x=filtered_exchange_data[curr1],
-            y=filtered_exchange_data[curr2],
+        bubble_fig.add_trace(_trace_class(high_cardinality)(
+            x=trace['x'],
+            y=trace['y'],
             mode='markers',
-            name=f"{curr1} vs {curr2} (corr: {corr_value:.2f})",
+            name=trace['name'],
             marker=dict(
                 size=8,
                 opacity=0.7,
-                color=filtered_exchange_data[curr1],
+                color=trace['marker']['color'],
                 colorscale='Plasma',  # เปลี่ยนเป็น Plasma ที่มีความคมชัดมากขึ้น
                 colorbar=dict(title="Value"),
                 showscale=True
@@ -356,79 +1082,223 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
             x=0.5, y=0.5, showarrow=False,
             font=dict(size=16, color=enhanced_palette[3])  # ใช้สีแดงจากชุดสีใหม่
         )
-    
-    # 4. Box Plot - แสดงการกระจายตัวของข้อมูล (รองรับทุกจำนวนสกุลเงิน)
+    return encode_figure(bubble_fig)
+
+
+@app.callback(
+    Output('bubble-chart', 'figure'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('high-cardinality', 'value')]
+)
+def update_bubble_chart(selected_currencies, date_indices, high_cardinality):
+    snapshot = data
+    selected_currencies = _selected_currencies(selected_currencies)
+    date_window = _date_window(snapshot, date_indices)
+    if _window_only_change():
+        if len(selected_currencies) < 2:
+            return no_update
+        return _patch_traces(_bubble_traces(snapshot, _filtered_exchange_data(snapshot, date_window),
+                                            selected_currencies, date_window))
+    return build_bubble_figure(snapshot, selected_currencies, date_window, bool(high_cardinality))
+
+
+# 4. Box Plot - แสดงการกระจายตัวของข้อมูล (รองรับทุกจำนวนสกุลเงิน)
+max_currencies_ungrouped = 20  # ถ้ามีมากกว่านี้ จัดกลุ่มตามค่าเฉลี่ย (หรือรวมเป็น trace เดียวในโหมดหลายสกุลเงิน)
+max_box_outliers = 200  # จุดค่าผิดปกติสูงสุดต่อกล่อง
+
+
+def _sampled_outliers(outliers):
+    outliers = np.sort(outliers)
+    if len(outliers) > max_box_outliers:
+        # ค่าผิดปกติจำนวนมาก (กลุ่มรวมหลายสกุล) - ส่งเฉพาะลำดับที่ห่างเท่า ๆ กัน โดยคงค่าต่ำสุด/สูงสุดไว้
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_box_outliers).round().astype(np.intp)]
+    return outliers
+
+
+def _box_traces(snapshot, names, groups, date_window):
+    # สถิติของกล่องคำนวณที่ server (ส่งเฉพาะ quartile/whisker ไม่ส่งค่าดิบ) - กล่องละสอง trace: กล่อง และค่าผิดปกติ
+    traces = []
+    for name, currencies in zip(names, groups):
+        stats = snapshot.quantile_index.box_stats(currencies, *date_window, pooled=len(currencies) > 1)
+        traces.append(dict(
+            x=[name],
+            q1=stats['q1'][:1], median=stats['median'][:1], q3=stats['q3'][:1],
+            lowerfence=stats['lowerfence'][:1], upperfence=stats['upperfence'][:1],
+        ))
+        traces.append(dict(y=_sampled_outliers(stats['outliers'][0])))
+    return traces
+
+
+def _box_combined_traces(snapshot, currencies, date_window):
+    # โหมดหลายสกุลเงิน: ทุกกล่องอยู่ใน Box trace เดียว และค่าผิดปกติทั้งหมดใน trace เดียว
+    # แกน x เป็นลำดับของสกุลเงิน (ชื่อแสดงผ่าน tickvals/ticktext) จึงส่งเป็น typed array ได้
+    stats = snapshot.quantile_index.box_stats(currencies, *date_window)
+    outliers = [_sampled_outliers(values) for values in stats['outliers']]
+    return [
+        dict(x=np.arange(len(currencies)), q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+             lowerfence=stats['lowerfence'], upperfence=stats['upperfence']),
+        dict(x=np.repeat(np.arange(len(currencies)), [len(values) for values in outliers]),
+             y=np.concatenate(outliers)),
+    ]
+
+
+def _box_grouped(selected_currencies, high_cardinality):
+    return len(selected_currencies) > max_currencies_ungrouped and not high_cardinality
+
+
+def _box_groups(snapshot, selected_currencies, date_window):
+    if len(selected_currencies) <= max_currencies_ungrouped:
+        return list(selected_currencies), [[currency] for currency in selected_currencies]
+
+    # ถ้ามีมากกว่า 20 สกุล จัดกลุ่มตามค่าเฉลี่ย: 10 สกุลต่ำสุด, 10 สกุลสูงสุด และที่เหลือเป็นกลุ่มกลาง
+    by_mean = pd.Series(snapshot.window_stats.mean(*date_window, selected_currencies), index=selected_currencies).sort_values()
+    by_mean = by_mean.index.tolist()
+    return ['Low Range', 'Medium Range', 'High Range'], [by_mean[:10], by_mean[10:-10], by_mean[-10:]]
+
+
+@figure_cache.memoize('box')
+@metrics.stage('box')
+def build_box_figure(snapshot, selected_currencies, date_window, high_cardinality=False):
+    selected_currencies = list(selected_currencies)
     box_fig = go.Figure()
-    if len(selected_currencies) > 20:  # ถ้ามีมากกว่า 20 สกุล จัดกลุ่มตามค่าเฉลี่ย
-        mean_values = filtered_exchange_data[selected_currencies].mean().sort_values()
-        low_currencies = mean_values.head(10).index.tolist()
-        medium_currencies = mean_values[10:-10].index.tolist()
-        high_currencies = mean_values.tail(10).index.tolist()
-            
-        groups = [
-            ('Low Range', low_currencies),
-            ('Medium Range', []),  # ไม่แสดงสกุลกลุ่มกลางถ้ามีมากเกินไป
-            ('High Range', high_currencies)
-        ]
-            
-        for i, (group_name, currencies) in enumerate(groups):
-            if currencies:
-                box_fig.add_trace(go.Box(
-                    y=filtered_exchange_data[currencies].values.flatten(), 
-                    name=group_name,
-                    marker_color=enhanced_palette[i % len(enhanced_palette)]
-                ))
-    else:  # แสดงปกติสำหรับสกุลเงินจำนวนน้อย
-        for i, currency in enumerate(selected_currencies):
+    if high_cardinality and len(selected_currencies) > max_currencies_ungrouped:
+        box, outliers = _box_combined_traces(snapshot, selected_currencies, date_window)
+        box_fig.add_trace(go.Box(**box, name="Exchange Rate", marker_color=enhanced_palette[0]))
+        box_fig.add_trace(go.Scattergl(
+            **outliers,
+            mode='markers',
+            name="Outliers",
+            showlegend=False,
+            marker=dict(color=enhanced_palette[0], size=4)
+        ))
+        box_fig.update_xaxes(tickmode='array', tickvals=list(range(len(selected_currencies))),
+                             ticktext=selected_currencies)
+    else:
+        names, groups = _box_groups(snapshot, selected_currencies, date_window)
+        traces = _box_traces(snapshot, names, groups, date_window)
+        for i, (name, box, outliers) in enumerate(zip(names, traces[::2], traces[1::2])):
+            color = enhanced_palette[i % len(enhanced_palette)]
             box_fig.add_trace(go.Box(
-                y=filtered_exchange_data[currency], 
-                name=currency,
-                marker_color=enhanced_palette[i % len(enhanced_palette)]
+                **box,
+                name=name,
+                legendgroup=name,
+                marker_color=color
             ))
-        
+            box_fig.add_trace(go.Scatter(
+                **outliers,
+                x0=name, dx=0,  # ทุกจุดอยู่ในหมวดเดียวกับกล่อง ไม่ต้องส่งแกน x ซ้ำทุกจุด
+                mode='markers',
+                name=name,
+                legendgroup=name,
+                showlegend=False,
+                marker=dict(color=color, size=4)
+            ))
+
     box_fig.update_layout(
-        title="Exchange Rate Distribution" + (" (Grouped)" if len(selected_currencies) > 20 else ""),
+        title="Exchange Rate Distribution" + (" (Grouped)" if _box_grouped(selected_currencies, high_cardinality) else ""),
         yaxis_title="Exchange Rate Value",
         template="plotly_white",
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)'
     )
+    return encode_figure(box_fig)
+
+
+@app.callback(
+    Output('box-plot', 'figure'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('high-cardinality', 'value')]
+)
+def update_box_plot(selected_currencies, date_indices, high_cardinality):
+    snapshot = data
+    selected_currencies = _selected_currencies(selected_currencies)
+    date_window = _date_window(snapshot, date_indices)
+    # กลุ่ม Low/Medium/High ขึ้นกับค่าเฉลี่ยในช่วงวันที่ จึงต้องสร้างกราฟใหม่ทั้งหมด
+    if _window_only_change() and not _box_grouped(selected_currencies, high_cardinality):
+        if len(selected_currencies) > max_currencies_ungrouped:
+            return _patch_traces(_box_combined_traces(snapshot, selected_currencies, date_window))
+        names, groups = _box_groups(snapshot, selected_currencies, date_window)
+        return _patch_traces(_box_traces(snapshot, names, groups, date_window))
+    return build_box_figure(snapshot, selected_currencies, date_window, bool(high_cardinality))
+
+
+# 5. Area Chart - แสดงการเปลี่ยนแปลงรายคาบ (สัปดาห์/เดือน/ปี) จาก rollup (รองรับทุกจำนวนสกุลเงิน)
+def _rollup_resolution(snapshot, resolution, date_window, max_periods):
+    if resolution in RESOLUTIONS:
+        return resolution
+    return snapshot.rollups.choose(*date_window, max_periods)
 
-    # 5. Area Chart - แสดงการเปลี่ยนแปลงรายเดือน (รองรับทุกจำนวนสกุลเงิน)
-    filtered_exchange_data['Month'] = filtered_exchange_data['Date'].dt.strftime('%Y-%m')
-    monthly_pct_change = filtered_exchange_data.groupby('Month')[selected_currencies].mean().pct_change() * 100
-    monthly_pct_change = monthly_pct_change.dropna()
+
+def _area_per_currency(selected_currencies, high_cardinality):
+    # area แยกทุกสกุลเมื่อมีไม่เกิน max_currencies_area หรืออยู่ในโหมดหลายสกุลเงิน
+    return high_cardinality or len(selected_currencies) <= max_currencies_area
+
+
+def _area_traces(snapshot, selected_currencies, date_window, resolution, max_points, high_cardinality=False):
+    selected_currencies = list(selected_currencies)
+    # ค่าเฉลี่ยของแต่ละคาบจาก rollup (เฉพาะแถวในช่วงที่เลือก) แล้วคิด % การเปลี่ยนแปลงระหว่างคาบ
+    period = snapshot.rollups.window(resolution, *date_window, selected_currencies)
+    period_pct_change = pd.DataFrame(period['mean'], index=period['period'], columns=selected_currencies).pct_change() * 100
+    period_pct_change = period_pct_change.dropna()
+    periods = period_pct_change.index.to_numpy().astype('datetime64[D]')  # ส่งเป็น YYYY-MM-DD
+
+    if _area_per_currency(selected_currencies, high_cardinality):
+        return [
+            dict(zip(('x', 'y'), downsample_xy(periods, period_pct_change[currency].to_numpy(), max_points)))
+            for currency in selected_currencies
+        ]
+
+    avg_change = period_pct_change.mean(axis=1)
+    # เพิ่มช่วงความผันผวน (standard deviation) - ใช้สีที่มองเห็นได้ชัดเจนขึ้น
+    std_change = period_pct_change.std(axis=1)
+    if len(avg_change) > max_points:
+        keep = downsample_indices(avg_change.to_numpy(), max_points)
+        avg_change, std_change, periods = avg_change.iloc[keep], std_change.iloc[keep], periods[keep]
+    return [
+        dict(x=periods, y=avg_change.to_numpy()),
+        dict(
+            x=np.concatenate([periods, periods[::-1]]),
+            y=(avg_change + std_change).tolist() + (avg_change - std_change).tolist()[::-1]
+        )
+    ]
+
+
+def _area_title(selected_currencies, resolution, high_cardinality=False):
+    label = RESOLUTIONS[resolution]
+    return f"{label} Percentage Change" if _area_per_currency(selected_currencies, high_cardinality) else f"Average {label} Change"
+
+
+@figure_cache.memoize('area')
+@metrics.stage('area')
+def build_area_figure(snapshot, selected_currencies, date_window, resolution, max_points, high_cardinality=False):
+    traces = _area_traces(snapshot, selected_currencies, date_window, resolution, max_points, high_cardinality)
     
     area_fig = go.Figure()
-    if len(selected_currencies) <= 5:  # ถ้ามีไม่เกิน 5 สกุล แสดงเป็น area chart
-        for i, currency in enumerate(selected_currencies):
-            area_fig.add_trace(go.Scatter(
-                x=monthly_pct_change.index, 
-                y=monthly_pct_change[currency], 
-                fill='tozeroy', 
+    if _area_per_currency(selected_currencies, high_cardinality):  # ถ้ามีไม่เกิน 5 สกุล แสดงเป็น area chart
+        for i, (currency, trace) in enumerate(zip(selected_currencies, traces)):
+            # เกิน 5 สกุล (โหมดหลายสกุลเงิน) แสดงเป็นเส้น - พื้นที่ซ้อนกันหลายชั้นอ่านไม่ออก
+            area_fig.add_trace(_trace_class(high_cardinality)(
+                **trace,
+                fill='tozeroy' if len(selected_currencies) <= max_currencies_area else None, 
                 name=currency,
                 line=dict(color=enhanced_palette[i % len(enhanced_palette)])
             ))
     else:  # ถ้ามีมากกว่า 5 สกุล แสดงเป็นค่าเฉลี่ยการเปลี่ยนแปลง
-        avg_change = monthly_pct_change.mean(axis=1)
         area_fig.add_trace(go.Scatter(
-            x=monthly_pct_change.index, 
-            y=avg_change, 
+            **traces[0],
             fill='tozeroy', 
             name='Average Change',
             line=dict(color=enhanced_palette[0])
         ))
         
-        # เพิ่มช่วงความผันผวน (standard deviation) - ใช้สีที่มองเห็นได้ชัดเจนขึ้น
-        std_change = monthly_pct_change.std(axis=1)
-        
         # แปลงสี HEX เป็น RGB เพื่อกำหนดค่า alpha
         hex_color = enhanced_palette[1].lstrip('#')
         r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
         
         area_fig.add_trace(go.Scatter(
-            x=monthly_pct_change.index.tolist() + monthly_pct_change.index.tolist()[::-1],
-            y=(avg_change + std_change).tolist() + (avg_change - std_change).tolist()[::-1],
+            **traces[1],
             fill='toself',
             fillcolor=f'rgba({r}, {g}, {b}, 0.3)',  # เพิ่มค่า alpha เป็น 0.3 เพื่อให้มองเห็นชัดขึ้น
             line=dict(color='rgba(255, 255, 255, 0)'),
@@ -437,117 +1307,561 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
         ))
     
     area_fig.update_layout(
-        title="Monthly Percentage Change" if len(selected_currencies) <= 5 else "Average Monthly Change",
-        xaxis_title="Month",
+        title=_area_title(selected_currencies, resolution, high_cardinality),
+        xaxis_title="Period",
         yaxis_title="Change (%)",
         template="plotly_white",
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)'
     )
+    return encode_figure(area_fig)
 
-    # 6. Inflation Line Chart - ใช้ชุดสีที่มองเห็นได้ง่ายขึ้น
-    inflation_series_data = inflation_data_melted[
-        inflation_data_melted['Series_Name'] == selected_inflation_series
-    ]
-    
-    # ใช้ px.line โดยกำหนด color_discrete_sequence เป็นชุดสีใหม่
-    inflation_line_fig = px.line(
-        inflation_series_data, 
-        x='Year', 
-        y='Inflation_Rate', 
-        color='Country',
-        title=f'{selected_inflation_series} Trends',
+
+@app.callback(
+    Output('area-chart', 'figure'),
+    [Input('currency-dropdown', 'value'),
+     _window_trigger('date-range-slider', 'value'),
+     Input('rollup-resolution', 'value'),
+     Input('viewport-width', 'data'),
+     Input('high-cardinality', 'value')]
+)
+def update_area_chart(selected_currencies, date_indices, resolution, viewport_width, high_cardinality):
+    snapshot = data
+    selected_currencies = _selected_currencies(selected_currencies)
+    date_window = _date_window(snapshot, date_indices)
+    max_points = _point_budget(viewport_width, 0.5)  # กราฟครึ่งความกว้างบนจอใหญ่
+    resolution = _rollup_resolution(snapshot, resolution, date_window, max_points)
+    if _window_only_change():
+        # 'auto' อาจเปลี่ยนความละเอียดตามช่วง จึงแก้ชื่อกราฟด้วย
+        patch = _patch_traces(_area_traces(snapshot, selected_currencies, date_window, resolution, max_points,
+                                           high_cardinality))
+        patch['layout']['title']['text'] = _area_title(selected_currencies, resolution, high_cardinality)
+        return patch
+    return build_area_figure(snapshot, selected_currencies, date_window, resolution, max_points,
+                             bool(high_cardinality))
+
+
+# 5.1 OHLC Candlestick - เปิด/สูง/ต่ำ/ปิด ของแต่ละคาบจาก rollup
+def _ohlc_candle_budget(viewport_width):
+    # แท่งเทียนต้องกว้างอย่างน้อยราว 4 pixel จึงจะอ่านได้
+    return _point_budget(viewport_width) // 4
+
+
+def _ohlc_traces(snapshot, currency, date_window, resolution):
+    period = snapshot.rollups.window(resolution, *date_window, [currency])
+    return [dict(x=period['period'], **{field: period[field][:, 0] for field in ('open', 'high', 'low', 'close')})]
+
+
+@figure_cache.memoize('ohlc')
+@metrics.stage('ohlc')
+def build_ohlc_figure(snapshot, currency, date_window, resolution):
+    ohlc_fig = go.Figure(go.Candlestick(**_ohlc_traces(snapshot, currency, date_window, resolution)[0], name=currency))
+    ohlc_fig.update_layout(
+        title=f"{RESOLUTIONS[resolution]} OHLC - {currency}",
+        xaxis_title="Period",
+        yaxis_title="Exchange Rate",
+        xaxis_rangeslider_visible=False,
         template="plotly_white",
-        color_discrete_sequence=enhanced_palette  # ใช้ชุดสีที่มองเห็นได้ง่ายขึ้น
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
     )
-    
+    return encode_figure(ohlc_fig)
+
+
+@app.callback(
+    Output('ohlc-chart', 'figure'),
+    [Input('ohlc-currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('rollup-resolution', 'value'),
+     Input('viewport-width', 'data')]
+)
+def update_ohlc_chart(currency, date_indices, resolution, viewport_width):
+    snapshot = data
+    if not currency:
+        return go.Figure()
+    date_window = _date_window(snapshot, date_indices)
+    resolution = _rollup_resolution(snapshot, resolution, date_window, _ohlc_candle_budget(viewport_width))
+    if _window_only_change():
+        patch = _patch_traces(_ohlc_traces(snapshot, currency, date_window, resolution))
+        patch['layout']['title']['text'] = f"{RESOLUTIONS[resolution]} OHLC - {currency}"
+        return patch
+    return build_ohlc_figure(snapshot, currency, date_window, resolution)
+
+
+# 5.2 Rolling Correlation - correlation ของผลตอบแทนรายวันตามเวลา จากเมทริกซ์ที่คำนวณไว้ล่วงหน้า
+max_rolling_pairs = 5  # จำนวนคู่ที่แสดงในกราฟ
+max_ranked_pairs = 10  # จำนวนคู่ในตารางอันดับ
+
+
+def _pair_label(column_a, column_b):
+    # ใช้ชื่อประเทศเพื่อให้ legend สั้นลง
+    return f"{column_a.split(' - ')[0]} / {column_b.split(' - ')[0]}"
+
+
+@figure_cache.memoize('rolling-corr')
+@metrics.stage('rolling-corr')
+def build_rolling_correlation(snapshot, selected_currencies, date_window, window, max_points):
+    start, end = date_window
+    rolling_fig = go.Figure()
+
+    if len(selected_currencies) >= 2:
+        ranking = snapshot.rolling_correlations.ranking(window, end, selected_currencies, k=max_ranked_pairs)
+        dates = snapshot.dates[start:end + 1].astype('datetime64[D]')
+        for i, (column_a, column_b, _) in enumerate(ranking[:max_rolling_pairs]):
+            x, y = downsample_xy(dates, snapshot.rolling_correlations.series(window, column_a, column_b, start, end), max_points)
+            rolling_fig.add_trace(go.Scatter(
+                x=x, y=y, mode='lines', name=_pair_label(column_a, column_b),
+                line=dict(color=enhanced_palette[i % len(enhanced_palette)], width=2)
+            ))
+        rolling_fig.update_layout(yaxis=dict(range=[-1, 1]))
+        ranking_items = [
+            html.Li([html.Strong(_pair_label(column_a, column_b)), f": {corr:.2f}"])
+            for column_a, column_b, corr in ranking
+        ]
+        ranking_output = html.Div([
+            html.H6(f"Strongest {window}-day correlations on {pd.Timestamp(snapshot.dates[end]):%Y-%m-%d}",
+                    className="fw-bold"),
+            html.Ol(ranking_items) if ranking_items else html.P("Not enough data at the end of the period")
+        ])
+    else:
+        rolling_fig.add_annotation(
+            text="Please select at least 2 currencies to see rolling correlations",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5, showarrow=False,
+            font=dict(size=14, color=enhanced_palette[3])
+        )
+        ranking_output = None
+
+    rolling_fig.update_layout(
+        title=f"{window}-Day Rolling Correlation of Daily Returns",
+        xaxis_title="Date",
+        yaxis_title="Correlation",
+        template="plotly_white",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        uirevision=_uirevision(date_window)
+    )
+    return [encode_figure(rolling_fig), ranking_output]
+
+
+@app.callback(
+    [Output('rolling-corr-chart', 'figure'),
+     Output('correlation-ranking', 'children')],
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('rolling-window', 'value'),
+     Input('viewport-width', 'data')]
+)
+def update_rolling_correlation(selected_currencies, date_indices, window, viewport_width):
+    snapshot = data
+    window = window if window in snapshot.rolling_correlations.windows else default_rolling_window
+    max_points = _point_budget(viewport_width, 2 / 3)
+    # เฉพาะสกุลเงินที่มี correlation เก็บไว้
+    selected_currencies = tuple(currency for currency in _selected_currencies(selected_currencies)
+                                if currency in snapshot.rolling_correlations.columns)
+    return build_rolling_correlation(snapshot, selected_currencies, _date_window(snapshot, date_indices), window,
+                                     max_points)
+
+
+# 5.3 Cross-Rate Matrix - ทุกคู่ของสกุลเงินที่เลือก (รวม USD) จากเมทริกซ์ cross rate ของทั้งช่วง
+max_matrix_labels = 12  # ถ้ามีสกุลเงินมากกว่านี้ ไม่แสดงตัวเลขในช่อง
+
+
+def _matrix_codes(snapshot, selected_series):
+    # รหัสของสกุลที่เลือก (ทั้งสองฝั่งของคู่ cross rate) ตามลำดับของ cross_rates.currencies
+    chosen = {'USD'}
+    for name in selected_series:
+        chosen.update(snapshot.cross_rates.parse(name) or [snapshot.cross_rates.code(name)])
+    return tuple(code for code in snapshot.cross_rates.currencies if code in chosen)
+
+
+@figure_cache.memoize('cross-rates')
+@metrics.stage('cross-rates')
+def build_cross_rate_matrix(snapshot, codes, date_window):
+    codes = list(codes)
+    start_idx, end_idx = date_window
+    # อัตราของทุกคู่เฉพาะแถวแรกและแถวสุดท้ายของช่วง - ไม่สร้างตาราง (แถว, n, n) ทั้งช่วง
+    first, latest = snapshot.cross_rates.matrix(start_idx, start_idx, codes)[0], snapshot.cross_rates.matrix(end_idx, end_idx, codes)[0]
+    change = (latest / first - 1) * 100
+    # ความผันผวนรายปีของผลตอบแทนรายวัน (log) ของแต่ละคู่ จาก covariance ของแต่ละสกุลเทียบ US$
+    volatility = snapshot.cross_rates.volatility(start_idx, end_idx, codes)
+
+    matrix_fig = go.Figure(go.Heatmap(
+        z=change,
+        x=codes,
+        y=codes,
+        customdata=np.dstack([latest, volatility]),
+        text=[[f"{rate:.4g}" for rate in row] for row in latest] if len(codes) <= max_matrix_labels else None,
+        texttemplate="%{text}" if len(codes) <= max_matrix_labels else None,
+        colorscale='RdBu',
+        zmid=0,
+        colorbar=dict(title="Change (%)"),
+        hovertemplate="1 %{y} = %{customdata[0]:.4f} %{x}<br>Change: %{z:.2f}%"
+                      "<br>Volatility: %{customdata[1]:.1f}%<extra></extra>"
+    ))
+    matrix_fig.update_layout(
+        title="Cross Rates at Window End (colour: change over the window)",
+        xaxis_title="Quote currency",
+        yaxis=dict(title="Base currency", autorange='reversed'),
+        template="plotly_white",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return encode_figure(matrix_fig)
+
+
+@app.callback(
+    Output('cross-rate-matrix', 'figure'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value')]
+)
+def update_cross_rate_matrix(selected_currencies, date_indices):
+    snapshot = data
+    codes = _matrix_codes(snapshot, _selected_series(snapshot, selected_currencies))
+    return build_cross_rate_matrix(snapshot, codes, _date_window(snapshot, date_indices))
+
+
+# 6. Inflation Line Chart - ใช้ชุดสีที่มองเห็นได้ง่ายขึ้น
+@app.callback(
+    Output('inflation-line-chart', 'figure'),
+    [Input('inflation-series-dropdown', 'value'),
+     Input('viewport-width', 'data')]
+)
+def update_inflation_chart(selected_inflation_series, viewport_width):
+    return build_inflation_figure(data, selected_inflation_series, _point_budget(viewport_width))
+
+
+@figure_cache.memoize('inflation')
+@metrics.stage('inflation')
+def build_inflation_figure(snapshot, selected_inflation_series, max_points):
+    # ไม่ใช้อัตราแลกเปลี่ยน - snapshot ให้เพียง generation ของ cache (revision ของไฟล์เงินเฟ้อรวมอยู่ในนั้น)
+    # หนึ่ง series ของทุกประเทศคือ slice ของ inflation_table (ไม่ต้องกรองตารางที่ melt แล้ว)
+    inflation_line_fig = go.Figure()
+    countries, years, rates = inflation_table.series_rates(selected_inflation_series) \
+        if selected_inflation_series in inflation_table.series else ([], [], [])
+    for i, country in enumerate(countries):
+        # ใช้การลดจุดแบบเดียวกับกราฟอัตราแลกเปลี่ยน (ซีรีส์รายปีสั้นจึงมักส่งผ่านไปทั้งหมด)
+        x, y = downsample_xy(years, rates[i], max_points)
+        inflation_line_fig.add_trace(go.Scatter(
+            x=x, y=y, mode='lines', name=country,
+            line=dict(color=enhanced_palette[i % len(enhanced_palette)]),
+            hovertemplate=f"{country}<br>Year: %{{x}}<br>Inflation Rate: %{{y:.2f}}%<extra></extra>"
+        ))
+
     inflation_line_fig.update_layout(
+        title=f'{selected_inflation_series} Trends',
         xaxis_title="Year",
         yaxis_title="Inflation Rate (%)",
-        legend_title="Countries"
+        legend_title="Countries",
+        template="plotly_white"
     )
-    
+    return encode_figure(inflation_line_fig)
+
+
+# 6.1 Real Exchange Rates - อัตราแลกเปลี่ยนที่หักเงินเฟ้อของประเทศนั้นแล้ว เทียบกับอัตราปกติ (ทั้งคู่ = 100 ที่ต้นช่วง)
+def _real_rate_key(snapshot, name):
+    # คู่ cross rate ใช้ (base, quote), สกุลเงินปกติใช้ชื่อคอลัมน์
+    return snapshot.cross_rates.parse(name) or name
+
+
+def _rebased(values):
+    # ดัชนี = 100 ที่ค่าแรกที่มีข้อมูลในช่วง
+    finite = np.flatnonzero(np.isfinite(values))
+    return values / values[finite[0]] * 100 if len(finite) else values
+
+
+def _real_rate_row(snapshot, series, name, nominal, real, date_window):
+    first_year, last_year = (pd.Timestamp(snapshot.dates[i]).year for i in date_window)
+    key = _real_rate_key(snapshot, name)
+    sides = key if isinstance(key, tuple) else (key,)
+    inflation = " / ".join(
+        f"{inflation_table.average_rate(series, snapshot.real_rates.country(side), first_year, last_year):.2f}%"
+        if side != 'USD' else "n/a" for side in sides
+    )
+    finite = np.isfinite(real)
+    real_change = (real[finite][-1] / real[finite][0] - 1) * 100 if finite.any() else np.nan
+    return html.Tr([
+        html.Td(name),
+        html.Td(f"{(nominal[-1] / nominal[0] - 1) * 100:+.2f}%"),
+        html.Td(f"{real_change:+.2f}%" if np.isfinite(real_change) else "n/a"),
+        html.Td(inflation),
+    ])
+
+
+@figure_cache.memoize('real-rates')
+@metrics.stage('real-rates')
+def build_real_rate_figure(snapshot, selected_series, date_window, inflation_series, max_points):
+    start, end = date_window
+    covered, missing = [], []
+    # ถ้ายังไม่ได้เลือก series เงินเฟ้อ ไม่มีอัตรา real ของสกุลใดเลย
+    if inflation_series in inflation_table.series:
+        for name in selected_series:
+            (covered if snapshot.real_rates.covers(_real_rate_key(snapshot, name)) else missing).append(name)
+    covered = covered[:max_currencies_to_show]
+    dates = snapshot.dates[start:end + 1].astype('datetime64[D]')
+    nominal = _series_data(snapshot, date_window, covered)
+
+    real_fig = go.Figure()
+    rows = []
+    for i, name in enumerate(covered):
+        color = enhanced_palette[i % len(enhanced_palette)]
+        real = snapshot.real_rates.series(inflation_series, _real_rate_key(snapshot, name), start, end)
+        nominal_values = nominal[name].to_numpy()
+        finite = np.isfinite(real)  # หลังปีสุดท้ายของข้อมูลเงินเฟ้อไม่มีอัตรา real
+        x, y = downsample_xy(dates[finite], _rebased(real[finite]), max_points)
+        real_fig.add_trace(go.Scatter(
+            x=x, y=y, mode='lines', name=f"{name} real", legendgroup=name,
+            line=dict(color=color, width=2)
+        ))
+        x, y = downsample_xy(dates, _rebased(nominal_values), max_points)
+        real_fig.add_trace(go.Scatter(
+            x=x, y=y, mode='lines', name=f"{name} nominal", legendgroup=name,
+            line=dict(color=color, width=1, dash='dot')
+        ))
+        rows.append(_real_rate_row(snapshot, inflation_series, name, nominal_values, real, date_window))
+
+    if not covered:
+        real_fig.add_annotation(
+            text="No inflation data for the selected currencies" if inflation_series in inflation_table.series
+            else "Please select an inflation series to see real exchange rates",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5, showarrow=False,
+            font=dict(size=14, color=enhanced_palette[3])
+        )
+    real_fig.update_layout(
+        title=f"Real vs Nominal Rates ({inflation_series or 'no inflation series'}, start of period = 100)",
+        xaxis_title="Date",
+        yaxis_title="Index",
+        template="plotly_white",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        uirevision=_uirevision(date_window)
+    )
+
+    summary = [dbc.Table([
+        html.Thead(html.Tr([html.Th("Currency"), html.Th("Nominal"), html.Th("Real"), html.Th("Avg. inflation")])),
+        html.Tbody(rows)
+    ], size="sm", striped=True, className="mb-2")] if rows else []
+    if missing:
+        summary.append(html.P(f"No inflation data: {', '.join(missing)}", className="text-muted small"))
+    return [encode_figure(real_fig), summary]
+
+
+@app.callback(
+    [Output('real-rate-chart', 'figure'),
+     Output('real-rate-stats', 'children')],
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value'),
+     Input('inflation-series-dropdown', 'value'),
+     Input('viewport-width', 'data')]
+)
+def update_real_rate_chart(selected_currencies, date_indices, inflation_series, viewport_width):
+    snapshot = data
+    return build_real_rate_figure(snapshot, _selected_series(snapshot, selected_currencies),
+                                  _date_window(snapshot, date_indices), inflation_series,
+                                  _point_budget(viewport_width, 2 / 3))
+
+
+# 7. กราฟพยากรณ์
+# คำนวณใน background process (ถ้ามี manager) เพื่อไม่ให้ worker ที่ให้บริการกราฟอื่นถูกบล็อก
+def update_forecast_chart(set_progress, forecast_currency, date_indices, forecast_horizon, forecast_model,
+                          viewport_width, high_cardinality, overlay_kinds, overlay_windows):
+    snapshot = data
+    date_window = _date_window(snapshot, date_indices)
+    horizon = forecast_horizon or default_forecast_horizon
+    model = forecast_model if forecast_model in MODELS else DEFAULT_MODEL
+    max_points = _point_budget(viewport_width)
+
+    set_progress((1, f"Fitting {MODELS[model].label}"))
+    if forecast_currency:
+        try:
+            fit_forecast(snapshot, forecast_currency, date_window, horizon, model)
+        except ValueError:
+            pass  # build_forecast_figure แสดงข้อความแจ้งแทน
+    set_progress((2, "Building chart"))
+    figure = build_forecast_figure(snapshot, forecast_currency, date_window, horizon, model, max_points,
+                                   bool(high_cardinality), _overlay_specs(snapshot, overlay_kinds, overlay_windows))
+    set_progress((forecast_progress_steps, "Done"))
+    return figure
+
+
+_forecast_inputs = [
+    Input('forecast-currency-dropdown', 'value'),
+    Input('date-range-slider', 'value'),
+    Input('forecast-horizon', 'value'),
+    Input('forecast-model', 'value'),
+    Input('viewport-width', 'data'),
+    Input('high-cardinality', 'value'),
+    Input('overlay-kinds', 'value'),
+    Input('overlay-windows', 'value'),
+]
+
+if background_manager is not None:
+    app.callback(
+        Output('forecast-chart', 'figure'),
+        _forecast_inputs,
+        background=True,
+        manager=background_manager,
+        interval=250,
+        progress=[Output('forecast-progress', 'value'), Output('forecast-progress', 'label')],
+        running=[
+            (Output('forecast-progress', 'style'), {'display': 'flex'}, {'display': 'none'}),
+            (Output('forecast-horizon', 'disabled'), True, False),
+            (Output('forecast-model', 'disabled'), True, False),
+        ],
+    )(update_forecast_chart)
+else:
+    @app.callback(Output('forecast-chart', 'figure'), _forecast_inputs)
+    def update_forecast_chart_inline(*args):
+        return update_forecast_chart(lambda progress: None, *args)
+
+
+@app.callback(
+    Output('forecast-chart', 'figure', allow_duplicate=True),
+    [Input('forecast-chart', 'relayoutData')],
+    [State('forecast-currency-dropdown', 'value'),
+     State('date-range-slider', 'value'),
+     State('forecast-horizon', 'value'),
+     State('forecast-model', 'value'),
+     State('viewport-width', 'data'),
+     State('overlay-kinds', 'value'),
+     State('overlay-windows', 'value')],
+    prevent_initial_call=True
+)
+def zoom_forecast_chart(relayout_data, forecast_currency, date_indices, forecast_horizon, forecast_model,
+                        viewport_width, overlay_kinds, overlay_windows):
+    # zoom ในช่วงข้อมูลจริง - ส่งเส้นข้อมูลจริง เส้น fitted และ overlay ที่ละเอียดขึ้น (เส้นพยากรณ์ไม่เปลี่ยน)
+    snapshot = data
+    date_window = _date_window(snapshot, date_indices)
+    zoom_window = _zoom_window(snapshot, relayout_data, date_window)
+    if not forecast_currency or zoom_window is None or date_window[1] - date_window[0] + 1 <= 10:
+        return no_update
+    model = forecast_model if forecast_model in MODELS else DEFAULT_MODEL
+    try:
+        fit = fit_forecast(snapshot, forecast_currency, date_window, forecast_horizon or default_forecast_horizon,
+                           model)
+    except ValueError:
+        return no_update
+    zoomed = _series_data(snapshot, zoom_window, [forecast_currency])
+    values = zoomed[forecast_currency].to_numpy()
+    fitted = np.asarray(fit['fitted'], dtype=np.float64)[zoom_window[0] - date_window[0]:zoom_window[1] - date_window[0] + 1]
+    max_points = _point_budget(viewport_width)
+    keep = downsample_indices(values, max_points)
+    dates = _trace_dates(zoomed)[keep]
+    # trace 2-3 (พยากรณ์และช่วงพยากรณ์) ไม่เปลี่ยน; overlay ต่อจากนั้นใช้แกน x ของเส้นข้อมูลจริง (same_as)
+    overlay_specs = _overlay_specs(snapshot, overlay_kinds, overlay_windows)
+    return _patch_traces([dict(x=dates, y=values[keep]), dict(x=dates, y=fitted[keep]), {}, {}] +
+                         _overlay_traces(snapshot, [forecast_currency], zoom_window, overlay_specs, max_points))
+
+
+@figure_cache.memoize('forecast-fit')
+@metrics.stage('forecast-fit')
+def fit_forecast(snapshot, forecast_currency, date_window, horizon, model):
+    """Fit ``model`` to one currency over the window and forecast ``horizon`` business days.
+
+    Raises ``ValueError`` when the window is too short for the model.
+    """
+    currency_data = _series_data(snapshot, date_window, [forecast_currency])[['Date', forecast_currency]]
+    result = forecast(currency_data[forecast_currency].to_numpy(), horizon, model)
+
+    # ขั้นของโมเดลคือแถวข้อมูล (วันทำการ) จึงต่อวันที่ด้วยวันทำการเช่นกัน
+    last_date = currency_data['Date'].iloc[-1]
+    result['future_dates'] = pd.bdate_range(start=last_date, periods=horizon + 1)[1:].to_numpy().astype('datetime64[D]')
+    return result
+
+
+@figure_cache.memoize('forecast')
+@metrics.stage('forecast')
+def build_forecast_figure(snapshot, forecast_currency, date_window, horizon, model, max_points,
+                          high_cardinality=False, overlay_specs=()):
+    filtered_exchange_data = _series_data(snapshot, date_window, [forecast_currency] if forecast_currency else [])
+
     # ส่วนของกราฟพยากรณ์
     forecast_fig = go.Figure()
 
     # ตรวจสอบว่ามีการเลือกสกุลเงินสำหรับการพยากรณ์หรือไม่
     if forecast_currency:
-        from scipy import stats as scipy_stats
         currency = forecast_currency  # ใช้สกุลเงินที่เลือกจาก dropdown สำหรับการพยากรณ์
-        
+
         # ดึงข้อมูลเฉพาะสกุลเงินที่เลือก
-        currency_data = filtered_exchange_data[['Date', currency]].dropna()
-        
-        # เช็คว่ามีข้อมูลพอหรือไม่
-        if len(currency_data) > 10:  # ต้องมีข้อมูลอย่างน้อย 10 จุดในการสร้างการพยากรณ์
-            # สร้าง array ของ index สำหรับการคำนวณแนวโน้ม (0, 1, 2, 3, ...)
-            x_values = np.arange(len(currency_data))
-            y_values = currency_data[currency].values
-            
+        currency_data = filtered_exchange_data[['Date', currency]]
+
+        if len(currency_data) <= 10:  # ต้องมีข้อมูลอย่างน้อย 10 จุดในการสร้างการพยากรณ์
+            fit = None
+        else:
             try:
-                # คำนวณเส้นแนวโน้มแบบเชิงเส้น (linear regression)
-                slope, intercept, r_value, p_value, std_err = scipy_stats.linregress(x_values, y_values)
-                trend_line = intercept + slope * x_values
-                
-                # เพิ่มกราฟเส้นแสดงข้อมูลจริง
-                forecast_fig.add_trace(go.Scatter(
-                    x=currency_data['Date'],
-                    y=y_values,
-                    mode='lines',
-                    name=f'{currency} (Actual Data)',
-                    line=dict(color=enhanced_palette[0], width=2)
-                ))
-                
-                # เพิ่มเส้นแนวโน้ม
-                forecast_fig.add_trace(go.Scatter(
-                    x=currency_data['Date'],
-                    y=trend_line,
-                    mode='lines',
-                    name='Trend Line',
-                    line=dict(color=enhanced_palette[2], width=2, dash='dash')
-                ))
-                
-                # สร้างข้อมูลพยากรณ์ล่วงหน้า 30 วัน
-                last_date = currency_data['Date'].iloc[-1]
-                future_dates = pd.date_range(start=last_date, periods=31)[1:]  # สร้างวันที่ล่วงหน้า 30 วัน
-                future_indices = np.arange(len(x_values), len(x_values) + 30)  # สร้าง index ต่อจากข้อมูลจริง
-                future_values = intercept + slope * future_indices  # คำนวณค่าพยากรณ์จากสมการเส้นตรง
-                
-                # เพิ่มเส้นพยากรณ์
-                forecast_fig.add_trace(go.Scatter(
-                    x=future_dates,
-                    y=future_values,
-                    mode='lines',
-                    name='30-Day Forecast',
-                    line=dict(color=enhanced_palette[1], width=2)
-                ))
-                
-                # เพิ่มช่วงความเชื่อมั่น 95% (confidence interval) - ใช้สีที่มองเห็นได้ชัดเจนขึ้น
-                ci = 1.96 * std_err  # ช่วงความเชื่อมั่น 95%
-                
-                # แปลงสี HEX เป็น RGB
-                hex_color = enhanced_palette[1].lstrip('#')
-                r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-                
-                forecast_fig.add_trace(go.Scatter(
-                    x=list(future_dates) + list(future_dates)[::-1],
-                    y=list(future_values + ci) + list(future_values - ci)[::-1],
-                    fill='toself',
-                    fillcolor=f'rgba({r}, {g}, {b}, 0.3)',  # เพิ่มค่า alpha เพื่อให้มองเห็นชัดขึ้น
-                    line=dict(color='rgba(255, 255, 255, 0)'),
-                    hoverinfo='skip',
-                    showlegend=False,
-                    name='95% Confidence Interval'
-                ))
-                
-            except Exception as e:
-                # จัดการกรณีมีปัญหาในการคำนวณ
-                forecast_fig.add_annotation(
-                    text=f"Cannot calculate forecast: insufficient data or calculation error",
-                    xref="paper", yref="paper",
-                    x=0.5, y=0.5, showarrow=False,
-                    font=dict(size=14, color=enhanced_palette[3])  # ใช้สีแดงจากชุดสีใหม่
-                )
+                fit = fit_forecast(snapshot, currency, date_window, horizon, model)
+            except Exception:
+                fit = False
+
+        if fit:
+            y_values = currency_data[currency].values
+            fitted = np.asarray(fit['fitted'], dtype=np.float64)
+
+            # ส่งเฉพาะจุดที่จำเป็นต่อความกว้างกราฟ
+            keep = downsample_indices(y_values, max_points)
+            history_dates = _trace_dates(currency_data)[keep]
+
+            # เพิ่มกราฟเส้นแสดงข้อมูลจริง
+            line_class = _trace_class(high_cardinality)
+            forecast_fig.add_trace(line_class(
+                x=history_dates,
+                y=y_values[keep],
+                mode='lines',
+                name=f'{currency} (Actual Data)',
+                line=dict(color=enhanced_palette[0], width=2)
+            ))
+
+            # เพิ่มเส้นที่โมเดล fit กับข้อมูลจริง (เส้นแนวโน้มสำหรับโมเดลเชิงเส้น)
+            forecast_fig.add_trace(line_class(
+                x=history_dates,
+                y=fitted[keep],
+                mode='lines',
+                name='Trend Line' if model == 'linear' else f'{MODELS[model].label} (fitted)',
+                line=dict(color=enhanced_palette[2], width=2, dash='dash')
+            ))
+
+            future_dates = np.asarray(fit['future_dates'], dtype='datetime64[D]')
+            future_values = np.asarray(fit['forecast'], dtype=np.float64)
+
+            # เพิ่มเส้นพยากรณ์
+            forecast_fig.add_trace(line_class(
+                x=future_dates,
+                y=future_values,
+                mode='lines',
+                name=f'{horizon}-Day Forecast',
+                line=dict(color=enhanced_palette[1], width=2)
+            ))
+
+            # ช่วงพยากรณ์ 95% (prediction interval) ของโมเดล - กว้างขึ้นตามระยะพยากรณ์
+            lower = np.asarray(fit['lower'], dtype=np.float64)
+            upper = np.asarray(fit['upper'], dtype=np.float64)
+
+            # แปลงสี HEX เป็น RGB
+            hex_color = enhanced_palette[1].lstrip('#')
+            r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+            forecast_fig.add_trace(go.Scatter(
+                x=np.concatenate([future_dates, future_dates[::-1]]),
+                y=np.concatenate([upper, lower[::-1]]),
+                fill='toself',
+                fillcolor=f'rgba({r}, {g}, {b}, 0.3)',  # เพิ่มค่า alpha เพื่อให้มองเห็นชัดขึ้น
+                line=dict(color='rgba(255, 255, 255, 0)'),
+                hoverinfo='skip',
+                showlegend=False,
+                name='95% Prediction Interval'
+            ))
+
+            # overlay ของข้อมูลจริงต่อท้าย (zoom_forecast_chart แก้สอง trace แรกและ overlay ตามลำดับนี้)
+            _add_overlays(snapshot, forecast_fig, [currency], date_window, overlay_specs, max_points)
+        elif fit is False:
+            # จัดการกรณีมีปัญหาในการคำนวณ
+            forecast_fig.add_annotation(
+                text=f"Cannot calculate forecast: insufficient data or calculation error",
+                xref="paper", yref="paper",
+                x=0.5, y=0.5, showarrow=False,
+                font=dict(size=14, color=enhanced_palette[3])  # ใช้สีแดงจากชุดสีใหม่
+            )
         else:
             # กรณีข้อมูลไม่เพียงพอ
             forecast_fig.add_annotation(
@@ -567,15 +1881,44 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
 
     # กำหนดรูปแบบของกราฟ
     forecast_fig.update_layout(
-        title=f"การวิเคราะห์แนวโน้มและพยากรณ์ 30 วัน" + (f" สำหรับ {forecast_currency}" if forecast_currency else ""),
+        title=f"การวิเคราะห์แนวโน้มและพยากรณ์ {horizon} วัน" + (f" สำหรับ {forecast_currency}" if forecast_currency else "")
+              + f" ({MODELS[model].label})",
         xaxis_title="วันที่",
         yaxis_title="อัตราแลกเปลี่ยน",
         template="plotly_white",
         plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
+        paper_bgcolor='rgba(0,0,0,0)',
+        uirevision=_uirevision(date_window)
     )
-    
-    
+    return encode_figure(forecast_fig)
+
+
+# 8. สถิติอย่างง่าย
+@app.callback(
+    Output('statistics-output', 'children'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value')]
+)
+def update_statistics(selected_currencies, date_indices):
+    snapshot = data
+    return build_statistics(snapshot, _selected_series(snapshot, selected_currencies),
+                            _date_window(snapshot, date_indices))
+
+
+def _describe_series(snapshot, selected_series, date_window):
+    # สกุลเงินปกติจาก window_stats (เวลาคงที่) และคู่ cross rate จาก cross_rates - ลำดับตาม _selected_series
+    columns = [name for name in selected_series if not snapshot.cross_rates.parse(name)]
+    pairs = [name for name in selected_series if snapshot.cross_rates.parse(name)]
+    parts = ([snapshot.window_stats.describe(*date_window, columns)] if columns else []) + \
+            ([snapshot.cross_rates.describe(pairs, *date_window)] if pairs else [])
+    return {key: np.concatenate([part[key] for part in parts]) for key in ('mean', 'std', 'min', 'max', 'latest')}
+
+
+@figure_cache.memoize('statistics')
+@metrics.stage('statistics')
+def build_statistics(snapshot, selected_currencies, date_window):
+    selected_currencies = list(selected_currencies)
+    stats = _describe_series(snapshot, selected_currencies, date_window)
 
     # สร้างสถิติอย่างง่าย
     statistics_cards = []
@@ -583,17 +1926,16 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
     if len(selected_currencies) == 1:
         # สำหรับสกุลเงินเดียว แสดงข้อมูลละเอียด
         currency = selected_currencies[0]
-        stats = filtered_exchange_data[currency].describe()
         
         stats_card = dbc.Card([
             dbc.CardHeader(f"Statistics for {currency}", className="text-white", style={'background-color': enhanced_palette[0]}),
             dbc.CardBody([
                 html.Div([
-                    html.P(f"Average: {stats['mean']:.4f}"),
-                    html.P(f"Current (latest): {filtered_exchange_data[currency].iloc[-1]:.4f}"),
-                    html.P(f"Highest: {stats['max']:.4f}"),
-                    html.P(f"Lowest: {stats['min']:.4f}"),
-                    html.P(f"Standard Deviation: {stats['std']:.4f}")
+                    html.P(f"Average: {stats['mean'][0]:.4f}"),
+                    html.P(f"Current (latest): {stats['latest'][0]:.4f}"),
+                    html.P(f"Highest: {stats['max'][0]:.4f}"),
+                    html.P(f"Lowest: {stats['min'][0]:.4f}"),
+                    html.P(f"Standard Deviation: {stats['std'][0]:.4f}")
                 ])
             ])
         ], className="mb-3")
@@ -601,22 +1943,24 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
         statistics_cards.append(stats_card)
     else:
         # สำหรับหลายสกุลเงิน แสดงภาพรวม
+        highest_mean, lowest_mean = np.argmax(stats['mean']), np.argmin(stats['mean'])
+        most_volatile, most_stable = np.argmax(stats['std']), np.argmin(stats['std'])
         overall_stats = dbc.Card([
             dbc.CardHeader(f"Overview of {len(selected_currencies)} Selected Currencies", 
                          className="text-white", style={'background-color': enhanced_palette[1]}),
             dbc.CardBody([
                 html.Div([
-                    html.P(f"Highest average rate: {filtered_exchange_data[selected_currencies].mean().max():.4f} ({filtered_exchange_data[selected_currencies].mean().idxmax()})"),
-                    html.P(f"Lowest average rate: {filtered_exchange_data[selected_currencies].mean().min():.4f} ({filtered_exchange_data[selected_currencies].mean().idxmin()})"),
-                    html.P(f"Most volatile: {filtered_exchange_data[selected_currencies].std().idxmax()} (SD: {filtered_exchange_data[selected_currencies].std().max():.4f})"),
-                    html.P(f"Most stable: {filtered_exchange_data[selected_currencies].std().idxmin()} (SD: {filtered_exchange_data[selected_currencies].std().min():.4f})")
+                    html.P(f"Highest average rate: {stats['mean'][highest_mean]:.4f} ({selected_currencies[highest_mean]})"),
+                    html.P(f"Lowest average rate: {stats['mean'][lowest_mean]:.4f} ({selected_currencies[lowest_mean]})"),
+                    html.P(f"Most volatile: {selected_currencies[most_volatile]} (SD: {stats['std'][most_volatile]:.4f})"),
+                    html.P(f"Most stable: {selected_currencies[most_stable]} (SD: {stats['std'][most_stable]:.4f})")
                 ])
             ])
         ], className="mb-3")
         
         statistics_cards.append(overall_stats)
     
-    return line_fig, histogram_fig, bubble_fig, box_fig, area_fig, inflation_line_fig, forecast_fig, statistics_cards
+    return statistics_cards
 
 @app.callback(
     Output('key-insights', 'children'),
@@ -625,29 +1969,28 @@ def update_dashboard(selected_currencies, selected_inflation_series, date_indice
 )
 
 def update_insights(selected_currencies, date_indices):
+    snapshot = data
+    # insight คำนวณจาก window_stats ของคอลัมน์ จึงไม่รวมคู่ cross rate
+    selected_currencies = [currency for currency in selected_currencies or []
+                           if not snapshot.cross_rates.parse(currency)]
     if not selected_currencies:
         return html.P("Please select at least one currency to see insights.")
     
-    # กรองข้อมูลตามช่วงวันที่จาก slider
-    if date_indices:
-        start_idx, end_idx = date_indices
-        filtered_data = exchange_data.iloc[start_idx:end_idx+1]
-    else:
-        filtered_data = exchange_data
+    # สถิติของช่วงวันที่จาก slider มาจาก window_stats ในเวลาคงที่ ไม่ต้องกรองข้อมูลใหม่
+    start_idx, end_idx = _date_window(snapshot, date_indices)
+
+    # คำนวณแนวโน้มล่าสุด (30 วันล่าสุด) ความผันผวน สถิติ และ correlation ของทุกสกุลเงินพร้อมกัน
+    summary = summarize_window(snapshot.window_stats, start_idx, end_idx, selected_currencies)
+    # ช่วงสั้นกว่า 3 แถวไม่มีความผันผวน (NaN ทุกตัว) - ไม่มีค่าเฉลี่ยให้เปรียบเทียบ
+    volatilities = summary['volatility']
+    average_volatility = np.nanmean(volatilities) if np.isfinite(volatilities).any() else np.nan
     
     insights = []
     
     # วิเคราะห์แนวโน้มสำหรับสกุลเงินที่เลือก
-    for currency in selected_currencies:
-        trend_data = filtered_data[[currency]].pct_change().dropna()
-        
-        # คำนวณแนวโน้มล่าสุด (30 วันล่าสุด)
-        recent_trend = trend_data.tail(30).mean().values[0] * 100
+    for currency, recent_trend, volatility in zip(selected_currencies, summary['recent_trend'], summary['volatility']):
         trend_direction = "upward" if recent_trend > 0 else "downward"
         
-        # คำนวณความผันผวน
-        volatility = trend_data.std().values[0] * 100
-        
         # สร้าง insight card สำหรับแต่ละสกุลเงิน
         currency_card = dbc.Card([
             dbc.CardHeader(f"{currency} Analysis", 
@@ -665,9 +2008,9 @@ def update_insights(selected_currencies, date_indices):
                     html.H5("Comparative Analysis", className="card-title mt-3"),
                     html.P([
                         f"Compared to other selected currencies, {currency} "
-                        f"{'has higher volatility' if volatility > trend_data.std().mean() else 'is more stable'}."
+                        f"{'has higher volatility' if volatility > average_volatility else 'is more stable'}."
                     ])
-                ]) if len(selected_currencies) > 1 else html.Div()
+                ]) if len(selected_currencies) > 1 and np.isfinite(average_volatility) else html.Div()
             ])
         ], className="shadow-sm mb-3")
         
@@ -675,20 +2018,13 @@ def update_insights(selected_currencies, date_indices):
     
     # สร้าง Key Findings จากการวิเคราะห์ทั้งหมด
     if len(selected_currencies) > 1:
-        # คำนวณความสัมพันธ์ระหว่างสกุลเงินที่เลือก
-        correlation_matrix = filtered_data[selected_currencies].corr()
-        
-        # หาคู่สกุลเงินที่มีความสัมพันธ์มากที่สุด
-        corr_pairs = []
-        for i in range(len(selected_currencies)):
-            for j in range(i+1, len(selected_currencies)):
-                curr1 = selected_currencies[i]
-                curr2 = selected_currencies[j]
-                corr = correlation_matrix.loc[curr1, curr2]
-                corr_pairs.append((curr1, curr2, corr))
-        
-        # เรียงลำดับตามค่าสัมบูรณ์ของความสัมพันธ์
-        corr_pairs.sort(key=lambda x: abs(x[2]), reverse=True)
+        # คู่สกุลเงินที่มีความสัมพันธ์มากที่สุด (เรียงตามค่าสัมบูรณ์) คำนวณไว้แล้วใน summary
+        corr_pairs = [
+            (selected_currencies[i], selected_currencies[j], corr) for i, j, corr in summary['top_pairs']
+        ]
+
+        level_std = summary['std']
+        most_volatile, most_stable = np.argmax(level_std), np.argmin(level_std)
         
         # สร้าง overall insights
         overall_card = dbc.Card([
@@ -702,15 +2038,15 @@ def update_insights(selected_currencies, date_indices):
                             f"{pair[0]} and {pair[1]}: ",
                             html.Strong(f"{pair[2]:.2f}"),
                             f" ({('Strong positive' if pair[2] > 0.7 else 'Strong negative' if pair[2] < -0.7 else 'Moderate positive' if pair[2] > 0.3 else 'Moderate negative' if pair[2] < -0.3 else 'Weak')} correlation)"
-                        ]) for pair in corr_pairs[:3]  # แสดงเฉพาะ 3 อันดับแรก
+                        ]) for pair in corr_pairs  # แสดงเฉพาะ 3 อันดับแรก
                     ])
                 ]),
                 
                 html.H5("Volatility Comparison", className="card-title mt-3"),
                 html.P([
-                    f"Most volatile: {filtered_data[selected_currencies].std().idxmax()} (SD: {filtered_data[selected_currencies].std().max():.4f})",
+                    f"Most volatile: {selected_currencies[most_volatile]} (SD: {level_std[most_volatile]:.4f})",
                     html.Br(),
-                    f"Most stable: {filtered_data[selected_currencies].std().idxmin()} (SD: {filtered_data[selected_currencies].std().min():.4f})"
+                    f"Most stable: {selected_currencies[most_stable]} (SD: {level_std[most_stable]:.4f})"
                 ])
             ])
         ], className="shadow-sm mb-3")
@@ -719,8 +2055,105 @@ def update_insights(selected_currencies, date_indices):
     
     return insights
 
+# 9. Anomalies - jump และการเปลี่ยน regime ของความผันผวนจาก anomaly_detector (อัปเดตทีละแถวเมื่อมีข้อมูลใหม่)
+max_listed_anomalies = 5  # เหตุการณ์ล่าสุดที่แสดงต่อสกุลเงิน
+
+
+def _anomaly_item(snapshot, row, kind, score, start):
+    date = f"{pd.Timestamp(snapshot.dates[row]):%Y-%m-%d}"
+    if kind == 'jump':
+        return html.Li([html.Strong(date), f": jump of {score:+.1f} standard deviations"])
+    direction = "rose" if kind == 'vol-up' else "fell"
+    return html.Li([html.Strong(date), f": volatility {direction} to {score:.1f}x the previous regime "
+                                       f"(from {pd.Timestamp(snapshot.dates[start]):%Y-%m-%d})"])
+
+
+@figure_cache.memoize('anomalies')
+@metrics.stage('anomalies')
+def build_anomaly_insights(snapshot, selected_currencies, date_window):
+    # เฉพาะคอลัมน์ (คู่ cross rate ไม่มีสถานะใน anomaly_detector)
+    currencies = [currency for currency in selected_currencies if currency in snapshot.anomaly_detector.columns]
+    if not currencies:
+        return html.P("Please select at least one currency to see anomalies.")
+
+    state = snapshot.anomaly_detector.state(currencies)
+    events = snapshot.anomaly_detector.events(*date_window, currencies)
+    cards = []
+    for i, currency in enumerate(currencies):
+        own = [event for event in events if event[1] == currency]
+        jumps = sum(1 for event in own if event[2] == 'jump')
+        regime_start = f"{pd.Timestamp(snapshot.dates[state['regime_start'][i]]):%Y-%m-%d}"
+        cards.append(dbc.Card([
+            dbc.CardHeader(f"{currency} Anomalies", className="bg-secondary text-white"),
+            dbc.CardBody([
+                html.P([
+                    f"Latest volatility: {state['volatility'][i]:.1f}% a year (EWMA of daily returns), "
+                    f"against {state['regime_volatility'][i]:.1f}% in the regime since {regime_start}.",
+                    html.Br(),
+                    f"In the selected period: {jumps} jumps and {len(own) - jumps} volatility regime shifts."
+                ]),
+                html.Ul([_anomaly_item(snapshot, row, kind, score, start)
+                         for row, _, kind, score, start in own[::-1][:max_listed_anomalies]])
+                if own else html.P("No anomalies in the selected period.", className="text-muted")
+            ])
+        ], className="shadow-sm mb-3"))
+    return cards
+
+
+@app.callback(
+    Output('anomaly-insights', 'children'),
+    [Input('currency-dropdown', 'value'),
+     Input('date-range-slider', 'value')]
+)
+def update_anomaly_insights(selected_currencies, date_indices):
+    snapshot = data
+    return build_anomaly_insights(snapshot, _selected_series(snapshot, selected_currencies),
+                                  _date_window(snapshot, date_indices))
+
+
+@server.route('/_figure-cache')
+def figure_cache_stats():
+    # สถิติ hit/miss/eviction ของ cache สำหรับปรับขนาดให้เหมาะกับ traffic จริง
+    return figure_cache.stats()
+
+
+def _figure_cache_metrics():
+    stats = figure_cache.stats()
+    return format_counters({
+        'fx_figure_cache_hits_total': ("Figure cache hits.", stats['hits']),
+        'fx_figure_cache_misses_total': ("Figure cache misses.", stats['misses']),
+        'fx_figure_cache_evictions_total': ("Figure cache LRU evictions.", stats['evictions']),
+        'fx_figure_cache_entries': ("Entries in the figure cache.", stats['entries']),
+    })
+
+
+# API ส่งออกข้อมูลทั้งชุด (/api/v1/...) จากตารางเดียวกับที่ callback ใช้ - ETag ตาม revision ของทั้งสองไฟล์
+inflation_fingerprint = source_fingerprint(inflation_path)
+server.register_blueprint(export_blueprint(
+    snapshot=lambda: data,
+    inflation_data=lambda: inflation_data_melted,
+    version=lambda snapshot: client_dataset.version(f"{snapshot.generation}:{inflation_fingerprint}"),
+    describe=_describe_series,
+    fit_forecast=fit_forecast,
+    forecast_models=list(MODELS),
+    default_model=DEFAULT_MODEL,
+))
+
+
+instrument_dash(
+    app, metrics,
+    currency_inputs=('currency-dropdown', 'forecast-currency-dropdown', 'ohlc-currency-dropdown'),
+    window_inputs=('date-range-slider',),
+    extra_metrics=_figure_cache_metrics,
+    **profile_options
+)
+
 # รัน app
 if __name__ == '__main__':
     # ใช้พอร์ตจาก environment variable (สำคัญสำหรับ Render)
     port = int(os.environ.get('PORT', 8080))
+    # สร้างกราฟของหน้าเริ่มต้นไว้ก่อนรับ request แรก (gunicorn ทำใน gunicorn.conf.py)
+    if os.environ.get('FX_WARMUP', '1') != '0':
+        from warmup import warm_up
+        warm_up(server)
     app.run_server(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,45 @@
+"""Batched analytics for all selected currencies at once.
+
+``summarize_window`` computes, for a slider window of a ``RangeStatsIndex``,
+the recent trend (mean of the last ``tail`` daily returns), volatility,
+descriptive statistics and the strongest pairwise correlations of every
+selected currency without touching the rows of the window; no Python loop
+runs per currency or per pair.
+"""
+import numpy as np
+
+RECENT_TREND_DAYS = 30
+TOP_CORRELATIONS = 3
+
+
+def top_k_correlations(corr, k=TOP_CORRELATIONS):
+    """The ``k`` off-diagonal pairs with the largest ``|corr|``.
+
+    Returns a list of ``(i, j, corr)`` with ``i < j``, strongest first; pairs
+    whose correlation is undefined (NaN) are ignored.
+    """
+    corr = np.asarray(corr)
+    rows, cols = np.triu_indices(len(corr), k=1)
+    values = corr[rows, cols]
+    strength = np.where(np.isnan(values), -1.0, np.abs(values))
+    k = min(k, int((strength >= 0).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-strength, k - 1)[:k]
+    # stable sort ให้คู่ที่ค่าเท่ากันเรียงตามลำดับเดิมของสกุลเงิน
+    top = top[np.argsort(-strength[top], kind='stable')]
+    return [(int(rows[p]), int(cols[p]), float(values[p])) for p in top]
+
+
+def summarize_window(index, start, end, columns, tail=RECENT_TREND_DAYS, top_k=TOP_CORRELATIONS):
+    """Analytics for rows ``[start, end]`` of ``columns`` of a ``RangeStatsIndex``.
+
+    Trend and volatility are in percent, like the insight cards show them.
+    """
+    columns = list(columns)
+    result = index.describe(start, end, columns)
+    result['recent_trend'] = index.return_mean(start, end, columns, tail=tail) * 100
+    result['volatility'] = index.return_std(start, end, columns) * 100
+    result['corr'] = index.corr(start, end, columns)
+    result['top_pairs'] = top_k_correlations(result['corr'], top_k)
+    return result
@@ -0,0 +1,323 @@
+"""Streaming jump and volatility-regime detection over every rate column.
+
+``AnomalyDetector`` consumes the rate matrix one row at a time and keeps,
+per column, only running statistics of the daily log return:
+
+- Welford mean and variance of the returns since the current regime began
+- an EWMA (RiskMetrics, lambda 0.94) of squared returns as the local volatility
+- a two-sided CUSUM of ``(r - mean)^2 / variance - 1`` (each row capped at
+  ``CUSUM_CAP`` so that one jump cannot start a regime on its own)
+
+A return more than ``JUMP_Z`` EWMA volatilities from the regime mean is a
+jump. A CUSUM beyond ``CUSUM_THRESHOLD`` is a volatility regime shift
+(``'vol-up'`` or ``'vol-down'``), after which the regime's Welford
+statistics and the CUSUM restart. Every row costs ``O(columns)`` however
+long the history is; the feed passes new rows to ``append``.
+
+The history a detector starts from is scanned in bulk rather than row by
+row (``_scan``): the EWMA does not depend on the regime, and within a regime
+the Welford statistics before each row are prefix sums and the CUSUMs are
+running minima of cumulative sums, so each regime of each column is a few
+array passes. The events and state are those of the row-by-row update (up to
+rounding). ``load_detector`` still saves them per source revision, and
+``python anomaly.py`` builds that file ahead of a deploy.
+"""
+import bisect
+import copy
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+JUMP_Z = 5.0
+EWMA_LAMBDA = 0.94
+CUSUM_DRIFT = 0.5
+CUSUM_THRESHOLD = 30.0
+CUSUM_CAP = 9.0
+MIN_REGIME_ROWS = 20  # แถวขั้นต่ำของ regime ก่อนเริ่มตรวจ (สถิติจากไม่กี่แถวยังไม่น่าเชื่อถือ)
+TRADING_DAYS = 252
+
+KINDS = ('jump', 'vol-up', 'vol-down')
+
+# สถานะต่อคอลัมน์ที่บันทึกลงไฟล์
+_STATE = ('last', 'count', 'mean', 'm2', 'ewma', 'up', 'down', 'up_since', 'down_since', 'regime_start')
+
+
+def _parameters():
+    return np.array([JUMP_Z, EWMA_LAMBDA, CUSUM_DRIFT, CUSUM_THRESHOLD, CUSUM_CAP, MIN_REGIME_ROWS])
+
+
+class AnomalyDetector:
+    """Jumps and volatility regime shifts of a ``(rows, columns)`` rate matrix, updated row by row."""
+
+    def __init__(self, values, columns):
+        self.columns = list(columns)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        k = len(self.columns)
+        self.rows = 0
+        self._last = np.full(k, np.nan)
+        self._count = np.zeros(k)
+        self._mean = np.zeros(k)
+        self._m2 = np.zeros(k)
+        self._ewma = np.zeros(k)
+        self._up = np.zeros(k)
+        self._down = np.zeros(k)
+        self._up_since = np.zeros(k, dtype=np.int64)  # แถวที่ CUSUM เริ่มสะสม = ประมาณจุดเปลี่ยน
+        self._down_since = np.zeros(k, dtype=np.int64)
+        self._regime_start = np.zeros(k, dtype=np.int64)
+        # เหตุการณ์เรียงตามแถวที่ตรวจพบ: (row, column, kind, score, start)
+        self._events = []
+        self._event_rows = []
+        self._lock = threading.Lock()
+        self.append(values)
+
+    def _step(self, row, values):
+        returns = np.log(values / self._last)
+        self._last = values
+        ready = self._count >= MIN_REGIME_ROWS
+        deviation = returns - self._mean
+        squared = deviation * deviation
+
+        variance = self._m2 / (self._count - 1)
+        # regime ที่ค่าไม่เปลี่ยนเลย (อัตราตรึง): x/0 ถือว่าผิดปกติเต็มที่ (CUSUM_CAP), 0/0 ถือว่าปกติ
+        ratio = np.minimum(squared / variance, CUSUM_CAP)
+        np.copyto(ratio, 1.0, where=ratio != ratio)
+        jumps = ready & (squared > JUMP_Z ** 2 * self._ewma)
+        if jumps.any():
+            for i in np.flatnonzero(jumps):
+                self._record(row, i, 'jump', deviation[i] / np.sqrt(self._ewma[i]), row)
+
+        self._up_since[self._up <= 0] = row
+        self._down_since[self._down <= 0] = row
+        # ก่อนครบ MIN_REGIME_ROWS ratio อาจเป็น inf/NaN - CUSUM คงเป็น 0
+        self._up = np.where(ready, np.maximum(self._up + (ratio - 1 - CUSUM_DRIFT), 0.0), 0.0)
+        self._down = np.where(ready, np.maximum(self._down + (1 - CUSUM_DRIFT - ratio), 0.0), 0.0)
+
+        # Welford ของ regime ปัจจุบัน
+        self._count += 1
+        self._mean += deviation / self._count
+        self._m2 += deviation * (returns - self._mean)
+        # EWMA เริ่มจาก variance ของ MIN_REGIME_ROWS ผลตอบแทนแรก แล้วจึงอัปเดตแบบ recursive
+        if row > MIN_REGIME_ROWS:
+            self._ewma = EWMA_LAMBDA * self._ewma + (1 - EWMA_LAMBDA) * returns * returns
+        elif row == MIN_REGIME_ROWS:
+            self._ewma = self._m2 / (self._count - 1)
+
+        shifted = (self._up > CUSUM_THRESHOLD) | (self._down > CUSUM_THRESHOLD)
+        if shifted.any():
+            for i in np.flatnonzero(shifted):
+                up = self._up[i] > CUSUM_THRESHOLD
+                # score = ความผันผวนตอนนี้ / ความผันผวนของ regime เดิม
+                self._record(row, i, 'vol-up' if up else 'vol-down', np.sqrt(self._ewma[i] / variance[i]),
+                             self._up_since[i] if up else self._down_since[i])
+            self._count[shifted] = 0
+            self._mean[shifted] = 0.0
+            self._m2[shifted] = 0.0
+            self._up[shifted] = 0.0
+            self._down[shifted] = 0.0
+            self._regime_start[shifted] = row
+
+    def _record(self, row, position, kind, score, start):
+        self._events.append((row, self.columns[position], kind, float(score), int(start)))
+        self._event_rows.append(row)
+
+    def _scan(self, values):
+        # ทั้งประวัติในครั้งเดียว (detector ว่าง) - ผลเหมือน _step ทีละแถว
+        rows, k = values.shape
+        returns = np.full((rows, k), np.nan)
+        returns[1:] = np.log(values[1:] / values[:-1])
+        # EWMA หลังแถว t ไม่ขึ้นกับ regime: เริ่มที่แถว MIN_REGIME_ROWS ด้วย variance ของผลตอบแทนแรก
+        ewma = np.zeros((rows, k))
+        if rows > MIN_REGIME_ROWS:
+            seed = np.var(returns[1:MIN_REGIME_ROWS + 1], axis=0, ddof=1)
+            squares = np.vstack([seed, returns[MIN_REGIME_ROWS + 1:] ** 2])
+            ewma[MIN_REGIME_ROWS:] = pd.DataFrame(squares).ewm(alpha=1 - EWMA_LAMBDA, adjust=False).mean().to_numpy()
+
+        found = []  # (row, ลำดับในแถว: jump ก่อน regime, column, kind, score, start)
+        for i in range(k):
+            regime_start, since = 0, (0, 0)
+            while True:
+                segment = returns[regime_start + 1:, i]
+                n = len(segment)
+                if not n:
+                    break
+                # สถิติของ regime ก่อนแถว regime_start + 1 + j (j ผลตอบแทน) จาก prefix sum
+                sums = np.concatenate([[0], np.cumsum(segment, dtype=np.longdouble)[:-1]])
+                squares = np.concatenate([[0], np.cumsum(np.square(segment, dtype=np.longdouble))[:-1]])
+                count = np.arange(n)
+                mean = (sums / np.maximum(count, 1)).astype(np.float64)
+                variance = ((squares - sums * sums / np.maximum(count, 1)) / (count - 1)).astype(np.float64)
+                deviation = segment - mean
+                squared = deviation * deviation
+                ratio = np.minimum(squared / variance, CUSUM_CAP)
+                np.copyto(ratio, 1.0, where=ratio != ratio)
+
+                # CUSUM max(c + a, 0) จากแถวที่ ready = ผลรวมสะสม - ค่าต่ำสุดสะสม (ไม่ต่ำกว่า 0)
+                up, down = np.zeros(n), np.zeros(n)
+                for cusum, step in ((up, ratio[MIN_REGIME_ROWS:] - 1 - CUSUM_DRIFT),
+                                    (down, 1 - CUSUM_DRIFT - ratio[MIN_REGIME_ROWS:])):
+                    total = np.cumsum(step)
+                    cusum[MIN_REGIME_ROWS:] = total - np.minimum(np.minimum.accumulate(total), 0)
+                crossed = np.flatnonzero((up > CUSUM_THRESHOLD) | (down > CUSUM_THRESHOLD))
+                last = crossed[0] if len(crossed) else n - 1
+                rows_of = regime_start + 1 + np.arange(last + 1)
+
+                ready = slice(MIN_REGIME_ROWS, last + 1)
+                previous_ewma = ewma[rows_of[ready] - 1, i]
+                for j in np.flatnonzero(squared[ready] > JUMP_Z ** 2 * previous_ewma) + MIN_REGIME_ROWS:
+                    row = rows_of[j]
+                    found.append((row, 0, i, 'jump', deviation[j] / np.sqrt(ewma[row - 1, i]), row))
+
+                # แถวที่ CUSUM เริ่มสะสม: แถวล่าสุดที่ค่าก่อนหน้า <= 0
+                since = tuple(regime_start + 1 + np.flatnonzero(np.concatenate([[0], cusum[:last]]) <= 0)[-1]
+                              for cusum in (up, down))
+                if not len(crossed):
+                    break
+                row, shifted_up = rows_of[last], up[last] > CUSUM_THRESHOLD
+                found.append((row, 1, i, 'vol-up' if shifted_up else 'vol-down',
+                              np.sqrt(ewma[row, i] / variance[last]), since[0] if shifted_up else since[1]))
+                regime_start = row
+
+            # สถานะหลังแถวสุดท้าย (ต่อด้วย _step ทีละแถวได้)
+            segment = returns[regime_start + 1:, i]
+            self._count[i] = len(segment)
+            self._mean[i] = segment.mean() if len(segment) else 0.0
+            self._m2[i] = np.square(segment - self._mean[i]).sum()
+            self._up[i] = up[-1] if len(segment) else 0.0
+            self._down[i] = down[-1] if len(segment) else 0.0
+            self._up_since[i], self._down_since[i] = since
+            self._regime_start[i] = regime_start
+
+        for row, _, i, kind, score, start in sorted(found, key=lambda event: event[:3]):
+            self._record(int(row), i, kind, score, start)
+        self._ewma = ewma[-1].copy()
+        self._last = values[-1]
+        self.rows = rows
+
+    def copy(self):
+        """Detector to append to while this one keeps answering (``_step`` updates its state in place)."""
+        other = copy.copy(self)
+        with self._lock:
+            for name in _STATE:
+                setattr(other, '_' + name, getattr(self, '_' + name).copy())
+            other._events = list(self._events)
+            other._event_rows = list(self._event_rows)
+        other._lock = threading.Lock()
+        return other
+
+    def append(self, values):
+        """Process new rows (in column order); returns the number of events they raised."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        with self._lock, np.errstate(divide='ignore', invalid='ignore'):
+            before = len(self._events)
+            if not self.rows and len(values):
+                self._scan(values)
+                return len(self._events) - before
+            for values_row in values:
+                if self.rows:
+                    self._step(self.rows, values_row)
+                else:
+                    self._last = values_row
+                self.rows += 1
+            return len(self._events) - before
+
+    def events(self, start, end, columns=None, kinds=KINDS):
+        """``[(row, column, kind, score, start_row)]`` detected in rows ``[start, end]``.
+
+        ``score`` is the z-score of a jump, or for a regime shift the ratio of
+        the new (EWMA) volatility to the previous regime's; ``start_row`` is
+        where the shift is estimated to have begun (the row itself for jumps).
+        """
+        columns = None if columns is None else set(columns)
+        with self._lock:
+            first = bisect.bisect_left(self._event_rows, start)
+            last = bisect.bisect_right(self._event_rows, end)
+            found = self._events[first:last]
+        return [event for event in found
+                if (columns is None or event[1] in columns) and event[2] in kinds]
+
+    def state(self, columns):
+        """Current annualized EWMA and regime volatility (%), and regime start row of ``columns``."""
+        positions = [self._positions[column] for column in columns]
+        with self._lock, np.errstate(divide='ignore', invalid='ignore'):
+            count = self._count[positions]
+            return {
+                'volatility': np.sqrt(self._ewma[positions] * TRADING_DAYS) * 100,
+                'regime_volatility': np.sqrt(np.where(count > 1, self._m2[positions] / (count - 1), np.nan)
+                                             * TRADING_DAYS) * 100,
+                'regime_start': self._regime_start[positions].copy(),
+            }
+
+    def save(self, path):
+        """Write the state and events to ``path`` (``.npz``, replaced atomically)."""
+        with self._lock:
+            events = list(self._events)
+            arrays = {name: getattr(self, '_' + name) for name in _STATE}
+            rows = self.rows
+        arrays.update(
+            columns=np.array(self.columns), rows=rows, parameters=_parameters(),
+            event_rows=np.array([event[0] for event in events], dtype=np.int64),
+            event_columns=np.array([self._positions[event[1]] for event in events], dtype=np.int64),
+            event_kinds=np.array([KINDS.index(event[2]) for event in events], dtype=np.int64),
+            event_scores=np.array([event[3] for event in events]),
+            event_starts=np.array([event[4] for event in events], dtype=np.int64),
+        )
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def restore(cls, saved, columns):
+        """Detector from the arrays written by ``save`` (the result of ``np.load``)."""
+        detector = cls(np.empty((0, len(columns))), columns)
+        detector.rows = int(saved['rows'])
+        for name in _STATE:
+            setattr(detector, '_' + name, np.array(saved[name]))
+        for row, position, kind, score, start in zip(saved['event_rows'], saved['event_columns'],
+                                                     saved['event_kinds'], saved['event_scores'],
+                                                     saved['event_starts']):
+            detector._record(int(row), position, KINDS[kind], score, start)
+        return detector
+
+
+def load_detector(path, values, columns):
+    """Load the detector saved at ``path`` or scan ``values`` (and try to save the result).
+
+    A saved file is reused only when it covers the same columns, row count
+    and detection parameters; ``path=None`` scans without saving.
+    """
+    if path is None:
+        return AnomalyDetector(values, columns)
+    try:
+        with np.load(path) as saved:
+            if (list(saved['columns']) == list(columns) and int(saved['rows']) == len(values)
+                    and np.array_equal(saved['parameters'], _parameters())):
+                return AnomalyDetector.restore(saved, columns)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    detector = AnomalyDetector(values, columns)
+    try:
+        detector.save(path)
+    except OSError as e:
+        print(f"Anomaly state not saved ({e})", file=sys.stderr)
+    return detector
+
+
+if __name__ == '__main__':
+    from data_store import load_exchange_data, source_fingerprint
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, "Foreign_Exchange_Rates.csv")
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(here, "fx_cache", "anomaly")
+
+    frame = load_exchange_data(csv_path, os.environ.get('FX_STORE_DIR', os.path.join(here, "fx_store")))
+    columns = list(frame.columns[2:])
+    path = os.path.join(output_dir, f"{source_fingerprint(csv_path)}.npz")
+    detector = AnomalyDetector(frame[columns].to_numpy(), columns)
+    detector.save(path)
+    print(f"Built {path}: {len(frame)} rows, {len(columns)} currencies, {len(detector.events(0, len(frame)))} events")
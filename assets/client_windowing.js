@@ -0,0 +1,302 @@
+/*
+ * Client-side windowing (FX_CLIENT_WINDOWING=1): the rate table is loaded once
+ * from /_dataset into a dcc.Store, and moving the date slider re-slices the
+ * line and area charts and the date label here instead of on the server.
+ * The slicing mirrors the server callbacks: min/max downsampling
+ * (downsampling.minmax_indices) and period means from the window's rows
+ * (rollups.Rollups.window).
+ */
+(function () {
+    var DAY_MS = 86400000;
+    var RESOLUTIONS = {W: 'Weekly', M: 'Monthly', Y: 'Yearly'};
+    var decoded = {version: null, data: null};
+
+    function dataset(payload) {
+        // ถอดรหัสครั้งเดียวต่อ version
+        if (!payload) {
+            return null;
+        }
+        if (decoded.version !== payload.version) {
+            var decode = window.fxTypedArrays.decodeArray;
+            decoded = {
+                version: payload.version,
+                data: {
+                    columns: payload.columns,
+                    days: decode(Object.assign({}, payload.dates, {unit: null})),
+                    values: payload.values.map(decode)
+                }
+            };
+        }
+        return decoded.data;
+    }
+
+    function pointBudget(viewportWidth, fraction, source) {
+        var width = (viewportWidth || source.default_viewport_width) * fraction;
+        return Math.max(200, Math.round(width / 200) * 200);
+    }
+
+    function columnPositions(data, selected) {
+        // ลำดับตามคอลัมน์เหมือน canonical_currencies (ไม่รวมคู่ cross rate)
+        var chosen = {};
+        (selected || []).forEach(function (currency) { chosen[currency] = true; });
+        var positions = [];
+        data.columns.forEach(function (currency, i) {
+            if (chosen[currency]) {
+                positions.push(i);
+            }
+        });
+        return positions;
+    }
+
+    function selection(data, selected) {
+        // ไม่ได้เลือกเลยใช้สกุลแรก
+        var positions = columnPositions(data, selected);
+        return positions.length ? positions : [0];
+    }
+
+    function pairSides(name, source) {
+        // 'EUR/JPY' -> [ตำแหน่งคอลัมน์ของ EUR, ของ JPY] (USD เป็น -1), null ถ้าไม่ใช่คู่ cross rate
+        var codes = String(name).split('/');
+        if (codes.length !== 2 || codes[0] === codes[1]) {
+            return null;
+        }
+        var sides = codes.map(function (code) {
+            return code === 'USD' ? -1 : source.currency_codes.indexOf(code);
+        });
+        var unknown = codes.some(function (code, i) { return code !== 'USD' && sides[i] < 0; });
+        return unknown ? null : sides;
+    }
+
+    function lineSeries(data, selected, source, range) {
+        // ค่าของเส้นตามลำดับเดียวกับ _selected_series: คอลัมน์ก่อน แล้วคู่ cross rate ตามลำดับที่เลือก
+        var values = columnPositions(data, selected).map(function (position) {
+            return data.values[position].subarray(range[0], range[1] + 1);
+        });
+        var seen = {};
+        (selected || []).forEach(function (name) {
+            var sides = pairSides(name, source);
+            if (!sides || seen[name]) {
+                return;
+            }
+            seen[name] = true;
+            // cross rate = (quote ต่อ US$) / (base ต่อ US$)
+            var rates = new Float64Array(range[1] - range[0] + 1);
+            for (var i = 0; i < rates.length; i++) {
+                var base = sides[0] < 0 ? 1 : data.values[sides[0]][range[0] + i];
+                var quote = sides[1] < 0 ? 1 : data.values[sides[1]][range[0] + i];
+                rates[i] = quote / base;
+            }
+            values.push(rates);
+        });
+        return values.length ? values : [data.values[0].subarray(range[0], range[1] + 1)];
+    }
+
+    function window_(dateIndices, data) {
+        return dateIndices ? [dateIndices[0], dateIndices[1]] : [0, data.days.length - 1];
+    }
+
+    function minmaxIndices(y, nOut) {
+        var n = y.length;
+        var all = [];
+        if (n <= nOut || nOut < 4) {
+            for (var k = 0; k < n; k++) {
+                all.push(k);
+            }
+            return all;
+        }
+        var buckets = Math.floor(nOut / 2);
+        var keep = {0: true};
+        keep[n - 1] = true;
+        for (var b = 0; b < buckets; b++) {
+            var lo = Math.floor(b * n / buckets), hi = Math.floor((b + 1) * n / buckets);
+            var min = -1, max = -1;
+            for (var i = lo; i < hi; i++) {
+                if (isNaN(y[i])) {
+                    continue;
+                }
+                if (min < 0 || y[i] < y[min]) {
+                    min = i;
+                }
+                if (max < 0 || y[i] > y[max]) {
+                    max = i;
+                }
+            }
+            if (min >= 0) {
+                keep[min] = keep[max] = true;
+            }
+        }
+        return Object.keys(keep).map(Number).sort(function (a, b) { return a - b; });
+    }
+
+    function take(array, indices, Type) {
+        var out = new Type(indices.length);
+        indices.forEach(function (index, i) { out[i] = array[index]; });
+        return out;
+    }
+
+    function withTraces(figure, traces, layout) {
+        // figure ใหม่ (ไม่แก้ของเดิมใน store) - แทน x/y ของแต่ละ trace ตามลำดับ
+        var data = figure.data.map(function (trace, i) {
+            return traces[i] ? Object.assign({}, trace, traces[i]) : trace;
+        });
+        return Object.assign({}, figure, {data: data, layout: Object.assign({}, figure.layout, layout)});
+    }
+
+    function periodKey(day, resolution) {
+        if (resolution === 'W') {
+            return day - (((day + 3) % 7) + 7) % 7;  // วันจันทร์ของสัปดาห์
+        }
+        var date = new Date(day * DAY_MS);
+        var month = resolution === 'M' ? date.getUTCMonth() : 0;
+        return Date.UTC(date.getUTCFullYear(), month, 1) / DAY_MS;
+    }
+
+    function periodStarts(days, start, end, resolution) {
+        // แถวแรกของแต่ละคาบในช่วง [start, end]
+        var starts = [start], previous = periodKey(days[start], resolution);
+        for (var i = start + 1; i <= end; i++) {
+            var key = periodKey(days[i], resolution);
+            if (key !== previous) {
+                starts.push(i);
+                previous = key;
+            }
+        }
+        return starts;
+    }
+
+    function areaTitle(perCurrency, resolution) {
+        var label = RESOLUTIONS[resolution];
+        return perCurrency ? label + ' Percentage Change' : 'Average ' + label + ' Change';
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        fx: {
+            loadDataset: function (source) {
+                if (!source) {
+                    return window.dash_clientside.no_update;
+                }
+                // cache: 'no-cache' - browser ส่ง If-None-Match แล้วได้ 304 ถ้าข้อมูลยังเป็นชุดเดิม
+                return fetch(source.url, {cache: 'no-cache', credentials: 'same-origin'}).then(function (response) {
+                    return response.json();
+                });
+            },
+
+            dateDisplay: function (dateIndices, payload) {
+                var data = dataset(payload);
+                if (!data) {
+                    return window.dash_clientside.no_update;
+                }
+                if (!dateIndices) {
+                    return 'Please select a date range';
+                }
+                var format = function (index) {
+                    return new Date(data.days[index] * DAY_MS).toISOString().slice(0, 10);
+                };
+                return {
+                    namespace: 'dash_html_components', type: 'P', props: {children: [
+                        'Selected period: ',
+                        {namespace: 'dash_html_components', type: 'Strong', props: {
+                            children: format(dateIndices[0]) + ' to ' + format(dateIndices[1])
+                        }}
+                    ]}
+                };
+            },
+
+            lineWindow: function (dateIndices, figure, selected, viewportWidth, payload, source, highCardinality) {
+                var data = dataset(payload);
+                if (!data || !figure) {
+                    return window.dash_clientside.no_update;
+                }
+                var range = window_(dateIndices, data);
+                var maxPoints = pointBudget(viewportWidth, 1, source);
+                var days = data.days.subarray(range[0], range[1] + 1);
+                // โหมดหลายสกุลเงินไม่จำกัดจำนวนเส้น (เส้นที่ยังไม่มาถึงจาก line-stream-* ถูกข้ามใน withTraces)
+                var series = lineSeries(data, selected, source, range);
+                var limit = highCardinality ? series.length : source.max_currencies_to_show;
+                var traces = series.slice(0, limit).map(function (values) {
+                    var keep = minmaxIndices(values, maxPoints);
+                    var x = take(days, keep, Float64Array).map(function (day) { return day * DAY_MS; });
+                    return {x: x, y: take(values, keep, Float32Array)};
+                });
+                var windowed = withTraces(figure, traces, {uirevision: range[0] + '-' + range[1]});
+                // marker ของ anomaly และ overlay มาจาก server สำหรับช่วงที่สร้างกราฟ - ซ่อนเมื่อช่วงไม่ตรง
+                windowed.data = windowed.data.map(function (trace) {
+                    if (!trace.meta || trace.meta.server_window === undefined) {
+                        return trace;
+                    }
+                    return Object.assign({}, trace, {visible: trace.meta.server_window === range[0] + '-' + range[1]});
+                });
+                return windowed;
+            },
+
+            areaWindow: function (dateIndices, figure, selected, resolution, viewportWidth, payload, source,
+                                  highCardinality) {
+                var data = dataset(payload);
+                if (!data || !figure) {
+                    return window.dash_clientside.no_update;
+                }
+                var range = window_(dateIndices, data);
+                var maxPoints = pointBudget(viewportWidth, 0.5, source);
+                var positions = selection(data, selected);
+                if (!RESOLUTIONS[resolution]) {
+                    // 'auto': คาบที่ละเอียดที่สุดที่ไม่เกินจำนวนจุดของกราฟ
+                    resolution = ['W', 'M', 'Y'].find(function (r) {
+                        return periodStarts(data.days, range[0], range[1], r).length <= maxPoints;
+                    }) || 'Y';
+                }
+
+                // ค่าเฉลี่ยของแต่ละคาบ แล้ว % การเปลี่ยนแปลงจากคาบก่อนหน้า (คาบแรกไม่มีค่า)
+                var starts = periodStarts(data.days, range[0], range[1], resolution);
+                var ends = starts.slice(1).concat([range[1] + 1]);
+                var periods = new Float64Array(Math.max(starts.length - 1, 0));
+                for (var p = 1; p < starts.length; p++) {
+                    periods[p - 1] = periodKey(data.days[starts[p]], resolution) * DAY_MS;
+                }
+                var changes = positions.map(function (position) {
+                    var values = data.values[position];
+                    var means = starts.map(function (lo, p) {
+                        var sum = 0;
+                        for (var i = lo; i < ends[p]; i++) {
+                            sum += values[i];
+                        }
+                        return sum / (ends[p] - lo);
+                    });
+                    var change = new Float64Array(periods.length);
+                    for (var q = 1; q < means.length; q++) {
+                        change[q - 1] = (means[q] / means[q - 1] - 1) * 100;
+                    }
+                    return change;
+                });
+
+                var perCurrency = highCardinality || positions.length <= source.max_currencies_area;
+                var layout = {title: Object.assign({}, figure.layout.title, {text: areaTitle(perCurrency, resolution)})};
+                if (perCurrency) {
+                    return withTraces(figure, changes.map(function (change) {
+                        var keep = minmaxIndices(change, maxPoints);
+                        return {x: take(periods, keep, Float64Array), y: take(change, keep, Float64Array)};
+                    }), layout);
+                }
+
+                // ค่าเฉลี่ยและส่วนเบี่ยงเบนมาตรฐาน (ddof=1) ระหว่างสกุลเงิน
+                var avg = new Float64Array(periods.length), std = new Float64Array(periods.length);
+                for (var t = 0; t < periods.length; t++) {
+                    var total = 0, squares = 0;
+                    changes.forEach(function (change) { total += change[t]; });
+                    avg[t] = total / changes.length;
+                    changes.forEach(function (change) { squares += (change[t] - avg[t]) * (change[t] - avg[t]); });
+                    std[t] = Math.sqrt(squares / (changes.length - 1));
+                }
+                var keep = minmaxIndices(avg, maxPoints);
+                var x = take(periods, keep, Float64Array), mean = take(avg, keep, Float64Array), spread = take(std, keep, Float64Array);
+                var bandX = new Float64Array(2 * x.length), bandY = new Float64Array(2 * x.length);
+                for (var j = 0; j < x.length; j++) {
+                    bandX[j] = x[j];
+                    bandY[j] = mean[j] + spread[j];
+                    bandX[2 * x.length - 1 - j] = x[j];
+                    bandY[2 * x.length - 1 - j] = mean[j] - spread[j];
+                }
+                return withTraces(figure, [{x: x, y: mean}, {x: bandX, y: bandY}], layout);
+            }
+        }
+    });
+})();
@@ -0,0 +1,108 @@
+/*
+ * Decode the typed-array payloads written by typed_arrays.py before plotly.js
+ * renders them: {dtype, bdata} (URL-safe base64) becomes a typed array,
+ * {..., unit: 'day'} becomes epoch milliseconds and {same_as: i} reuses
+ * trace i's array. plotly.js < 2.28 does not read typed arrays itself.
+ * Plotly is loaded lazily by dcc.Graph, so wrap it when it is assigned.
+ */
+(function () {
+    var TYPES = {
+        f8: Float64Array, f4: Float32Array,
+        i4: Int32Array, u4: Uint32Array, i2: Int16Array, u2: Uint16Array,
+        i1: Int8Array, u1: Uint8Array
+    };
+
+    function isTyped(value) {
+        return value && typeof value === 'object' && typeof value.bdata === 'string' && TYPES[value.dtype];
+    }
+
+    function decodeArray(value) {
+        var binary = atob(value.bdata.replace(/-/g, '+').replace(/_/g, '/'));
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        var array = new TYPES[value.dtype](bytes.buffer);
+        if (value.unit === 'day') {
+            // วันที่ส่งมาเป็นจำนวนวันนับจาก 1970-01-01 - แกน date ของ plotly ใช้ millisecond
+            var ms = new Float64Array(array.length);
+            for (var j = 0; j < array.length; j++) {
+                ms[j] = array[j] * 86400000;
+            }
+            return ms;
+        }
+        return array;
+    }
+
+    function decodeProps(props) {
+        // คัดลอกเฉพาะ object ที่มี typed array อยู่ข้างใน - figure เดิมใน store ของ Dash ไม่ถูกแก้
+        var out = null;
+        for (var key in props) {
+            var value = props[key];
+            var decoded = value;
+            if (isTyped(value)) {
+                decoded = decodeArray(value);
+            } else if (value && typeof value === 'object' && !Array.isArray(value) && !ArrayBuffer.isView(value)) {
+                decoded = decodeProps(value);
+            }
+            if (decoded !== value) {
+                out = out || Object.assign({}, props);
+                out[key] = decoded;
+            }
+        }
+        return out || props;
+    }
+
+    function decodeData(data) {
+        if (!Array.isArray(data)) {
+            return data;
+        }
+        var traces = data.map(function (trace) {
+            return trace && typeof trace === 'object' ? decodeProps(trace) : trace;
+        });
+        traces.forEach(function (trace, i) {
+            ['x', 'y'].forEach(function (key) {
+                var value = trace && trace[key];
+                if (value && typeof value === 'object' && typeof value.same_as === 'number' && traces[value.same_as]) {
+                    traces[i] = Object.assign({}, traces[i]);
+                    traces[i][key] = traces[value.same_as][key];
+                }
+            });
+        });
+        return traces;
+    }
+
+    function wrap(plotly) {
+        if (!plotly || plotly.__fxTypedArrays) {
+            return plotly;
+        }
+        ['newPlot', 'react'].forEach(function (name) {
+            var original = plotly[name];
+            if (typeof original !== 'function') {
+                return;
+            }
+            plotly[name] = function (gd, data) {
+                var args = Array.prototype.slice.call(arguments);
+                if (Array.isArray(data)) {
+                    args[1] = decodeData(data);
+                } else if (data && typeof data === 'object' && Array.isArray(data.data)) {
+                    // รูปแบบ Plotly.react(gd, {data, layout, frames, config}) ที่ dcc.Graph ใช้
+                    args[1] = Object.assign({}, data, {data: decodeData(data.data)});
+                }
+                return original.apply(this, args);
+            };
+        });
+        plotly.__fxTypedArrays = true;
+        return plotly;
+    }
+
+    // ใช้ร่วมกับ client_windowing.js (ถอดรหัสชุดข้อมูลที่โหลดมาไว้ใน browser)
+    window.fxTypedArrays = {decodeArray: decodeArray, decodeData: decodeData};
+
+    var current = wrap(window.Plotly);
+    Object.defineProperty(window, 'Plotly', {
+        configurable: true,
+        get: function () { return current; },
+        set: function (value) { current = wrap(value); }
+    });
+})();
@@ -0,0 +1,89 @@
+"""Walk-forward backtests of the forecast models.
+
+``walk_forward`` refits one model at evenly spaced origins of a series and
+scores the forecast of the following ``horizon`` rows against what actually
+happened. ``backtest_all`` runs every (currency, model) pair in a process
+pool and ``summarize_results`` averages the scores per model. Run the full
+comparison with ``python benchmarks/bench_forecasting.py``.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forecasting import DEFAULT_LEVEL, MODELS, create_model
+
+SCORES = ('mase', 'mape', 'rmse', 'coverage', 'fit_ms')
+
+
+def walk_forward(y, model, horizon=30, n_origins=20, min_train=250, max_train=None, level=DEFAULT_LEVEL):
+    """Score ``model`` (a name in ``MODELS``) on ``y`` at ``n_origins`` forecast origins.
+
+    Each origin trains on the rows before it (at most ``max_train`` of them)
+    and forecasts the next ``horizon`` rows. Returns the mean over origins of
+
+    * ``mase`` - MAE divided by the in-sample MAE of the naive one-day
+      forecast, so currencies on different scales are comparable,
+    * ``mape`` - mean absolute percentage error,
+    * ``rmse``,
+    * ``coverage`` - share of actual values inside the prediction interval,
+    * ``fit_ms`` - time to fit and predict once.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    last_origin = len(y) - horizon
+    if last_origin < min_train:
+        raise ValueError(f"Series too short for min_train={min_train} and horizon={horizon}")
+    origins = np.unique(np.linspace(min_train, last_origin, n_origins).astype(np.intp))
+
+    scores = {name: [] for name in SCORES}
+    for origin in origins:
+        train = y[max(0, origin - max_train):origin] if max_train else y[:origin]
+        actual = y[origin:origin + horizon]
+
+        started = time.perf_counter()
+        mean, lower, upper = create_model(model).fit(train).predict(horizon, level)
+        scores['fit_ms'].append((time.perf_counter() - started) * 1000)
+
+        error = actual - mean
+        naive_mae = np.abs(np.diff(train)).mean()
+        scores['mase'].append(np.abs(error).mean() / naive_mae if naive_mae else np.nan)
+        scores['mape'].append(np.abs(error / actual).mean() * 100)
+        scores['rmse'].append(np.sqrt((error ** 2).mean()))
+        scores['coverage'].append(((actual >= lower) & (actual <= upper)).mean())
+    return {name: float(np.nanmean(values)) for name, values in scores.items()}
+
+
+def _run_task(task):
+    column, model, y, options = task
+    try:
+        return dict(walk_forward(y, model, **options), currency=column, model=model)
+    except ValueError:
+        return None
+
+
+def backtest_all(values, columns, models=None, workers=None, **options):
+    """Walk-forward scores of every model on every column of ``values``.
+
+    Tasks run in a ``ProcessPoolExecutor`` with ``workers`` processes (all
+    cores by default). Returns one dict per (currency, model) with the
+    scores of ``walk_forward``; series too short to test are left out.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    models = list(models or MODELS)
+    tasks = [(column, model, values[:, i], options) for i, column in enumerate(columns) for model in models]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count()))))
+        return [result for result in results if result is not None]
+
+
+def summarize_results(results):
+    """Mean score per model, best (lowest MASE) first."""
+    by_model = {}
+    for result in results:
+        by_model.setdefault(result['model'], []).append(result)
+    summary = [
+        dict({name: float(np.nanmean([r[name] for r in rows])) for name in SCORES}, model=model, currencies=len(rows))
+        for model, rows in by_model.items()
+    ]
+    return sorted(summary, key=lambda row: row['mase'])
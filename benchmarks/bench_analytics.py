@@ -0,0 +1,101 @@
+"""Per-request analytics time as the currency selection grows.
+
+Compares the per-currency pandas loop the insights callback used to run
+with ``summarize`` (one vectorized pass over the window's 2-D array) and
+``analytics.summarize_window`` (prefix-sum index, independent of window
+length), and checks that all three agree. Run from the repository root::
+
+    python benchmarks/bench_analytics.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import RECENT_TREND_DAYS, TOP_CORRELATIONS, summarize_window, top_k_correlations  # noqa: E402
+from data_store import read_exchange_csv  # noqa: E402
+from range_index import RangeStatsIndex  # noqa: E402
+
+
+def pandas_loop(filtered_data, selected_currencies):
+    # วิธีเดิม: คำนวณทีละสกุลเงิน และหาคู่ correlation ด้วย loop ซ้อน
+    for currency in selected_currencies:
+        trend_data = filtered_data[[currency]].pct_change().dropna()
+        trend_data.tail(30).mean().values[0] * 100
+        trend_data.std().values[0] * 100
+    if len(selected_currencies) > 1:
+        correlation_matrix = filtered_data[selected_currencies].corr()
+        corr_pairs = []
+        for i in range(len(selected_currencies)):
+            for j in range(i + 1, len(selected_currencies)):
+                corr_pairs.append((i, j, correlation_matrix.iloc[i, j]))
+        corr_pairs.sort(key=lambda x: abs(x[2]), reverse=True)
+    filtered_data[selected_currencies].std().idxmax()
+    filtered_data[selected_currencies].mean().max()
+
+
+def summarize(values, tail=RECENT_TREND_DAYS, top_k=TOP_CORRELATIONS):
+    """``summarize_window``'s result computed from every row of a ``(rows, currencies)`` matrix."""
+    values = np.asarray(values, dtype=np.float64)
+    # เท่ากับ DataFrame.pct_change().dropna() ของทุกคอลัมน์พร้อมกัน
+    returns = values[1:] / values[:-1] - 1
+    count = len(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = values.mean(axis=0)
+        std = values.std(axis=0, ddof=1) if count > 1 else np.full(values.shape[1], np.nan)
+        corr = np.corrcoef(values, rowvar=False) if values.shape[1] > 1 else np.ones((1, 1))
+        recent_trend = returns[-tail:].mean(axis=0) * 100
+        volatility = returns.std(axis=0, ddof=1) * 100 if len(returns) > 1 else np.full(values.shape[1], np.nan)
+    corr = np.atleast_2d(corr)
+    return {
+        'count': count,
+        'mean': mean,
+        'std': std,
+        'min': values.min(axis=0),
+        'max': values.max(axis=0),
+        'latest': values[-1],
+        'recent_trend': recent_trend,
+        'volatility': volatility,
+        'corr': corr,
+        'top_pairs': top_k_correlations(corr, top_k),
+    }
+
+
+def best_of(func, repeat=5, number=20):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:])
+    index = RangeStatsIndex(exchange_data[columns].to_numpy(), columns)
+    start, end = 0, len(exchange_data) - 1
+    window = exchange_data.iloc[start:end + 1]
+    matrix = window[columns].to_numpy()
+
+    print(f"{'currencies':>10} {'pandas loop ms':>15} {'summarize ms':>13} {'indexed ms':>11}")
+    for size in (1, 2, 5, 10, 15, len(columns)):
+        selected = columns[:size]
+        positions = [columns.index(c) for c in selected]
+        loop_ms = best_of(lambda: pandas_loop(window, selected))
+        batch_ms = best_of(lambda: summarize(matrix[:, positions]))
+        indexed_ms = best_of(lambda: summarize_window(index, start, end, selected))
+        print(f"{size:>10} {loop_ms:>15.3f} {batch_ms:>13.3f} {indexed_ms:>11.3f}")
+
+    # ตรวจว่าผลลัพธ์ตรงกันกับ pandas
+    reference = window[columns].pct_change().dropna()
+    result = summarize_window(index, start, end, columns)
+    assert np.allclose(result['volatility'], reference.std().to_numpy() * 100)
+    assert np.allclose(result['recent_trend'], reference.tail(30).mean().to_numpy() * 100)
+    batch = summarize(matrix)
+    for key in ('mean', 'std', 'min', 'max', 'latest', 'recent_trend', 'volatility', 'corr'):
+        assert np.allclose(result[key], batch[key]), key
+    assert [pair[:2] for pair in result['top_pairs']] == [pair[:2] for pair in batch['top_pairs']]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Anomaly detection over the whole history: bulk ``_scan`` vs row-by-row ``_step``.
+
+Building an ``AnomalyDetector`` from the full table scans the history in
+bulk; starting it from the first row and appending the rest runs the
+streaming update the feed uses, one row at a time. Both must end with the
+same events and the same per-column state. The last column is the cost of
+one new row. Run from the repository root::
+
+    python benchmarks/bench_anomaly.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anomaly import _STATE, AnomalyDetector  # noqa: E402
+from data_store import read_exchange_csv  # noqa: E402
+
+
+def best_of(func, repeat=3, number=1):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def stepped(values, columns):
+    detector = AnomalyDetector(values[:1], columns)
+    detector.append(values[1:])
+    return detector
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:])
+    values = exchange_data[columns].to_numpy()
+
+    print(f"{'rows':>6} {'scan ms':>9} {'step ms':>9} {'append 1 row ms':>16} {'events':>7}")
+    for rows in (1000, 2500, len(values)):
+        head = values[:rows]
+        scan_ms = best_of(lambda: AnomalyDetector(head, columns))
+        step_ms = best_of(lambda: stepped(head, columns))
+        scanned = AnomalyDetector(head[:-1], columns)
+        append_ms = best_of(lambda: scanned.copy().append(head[-1:]), repeat=5, number=20)
+        print(f"{rows:>6} {scan_ms:>9.1f} {step_ms:>9.1f} {append_ms:>16.3f} {len(scanned.events(0, rows)):>7}")
+
+        # ผลของ _scan ต้องตรงกับ _step ทีละแถว (ต่างกันได้แค่การปัดเศษ)
+        scanned, reference = AnomalyDetector(head, columns), stepped(head, columns)
+        events, expected = scanned.events(0, rows), reference.events(0, rows)
+        assert [event[:3] + event[4:] for event in events] == [event[:3] + event[4:] for event in expected]
+        assert np.allclose([event[3] for event in events], [event[3] for event in expected])
+        assert scanned.rows == reference.rows
+        for name in _STATE:
+            assert np.allclose(getattr(scanned, '_' + name), getattr(reference, '_' + name), equal_nan=True), name
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Cross rates of a slider window: a pandas loop over pairs vs ``CrossRates``.
+
+The first column divides the two ``Series`` of every ordered pair of the 22
+currencies plus USD (what a per-pair implementation would do); the second
+computes the whole ``(rows, n, n)`` matrix of the window with one broadcast
+division. The last lines compare one pair computed cold with the cached
+series. Run from the repository root::
+
+    python benchmarks/bench_cross_rates.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cross_rates import USD, CrossRates  # noqa: E402
+from data_store import read_exchange_csv  # noqa: E402
+
+
+def best_of(func, repeat=5, number=5):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:])
+    cross_rates = CrossRates(exchange_data[columns].to_numpy(), columns)
+    per_usd = exchange_data[columns].assign(**{USD: 1.0})
+    per_usd = per_usd[[USD] + columns]
+    codes = cross_rates.currencies
+
+    last = len(exchange_data) - 1
+    print(f"{len(codes)} currencies, {len(codes) * (len(codes) - 1)} pairs")
+    print(f"{'window':>7} {'pandas ms':>10} {'matrix ms':>10}")
+    for length in (250, 1000, last + 1):
+        start, end = last + 1 - length, last
+
+        def pandas_pairs():
+            window = per_usd.iloc[start:end + 1]
+            return {(a, b): window[column_b] / window[column_a]
+                    for a, column_a in zip(codes, window.columns)
+                    for b, column_b in zip(codes, window.columns) if a != b}
+
+        matrix = cross_rates.matrix(start, end)
+        expected = pandas_pairs()
+        i, j = codes.index('EUR'), codes.index('JPY')
+        assert np.allclose(matrix[:, i, j], expected['EUR', 'JPY'].to_numpy())
+        print(f"{length:>7} {best_of(pandas_pairs, repeat=3, number=1):>10.2f} "
+              f"{best_of(lambda: cross_rates.matrix(start, end)):>10.3f}")
+
+    # cache_size=0 คำนวณคู่ใหม่ทุกครั้ง
+    uncached = CrossRates(exchange_data[columns].to_numpy(), columns, cache_size=0)
+    cross_rates.series('EUR/JPY')
+    print(f"pair EUR/JPY, 250 rows: cold {best_of(lambda: uncached.series('EUR/JPY', last - 249, last)) * 1000:.1f} us, "
+          f"cached {best_of(lambda: cross_rates.series('EUR/JPY', last - 249, last)) * 1000:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Charts of a synthetic 200-currency universe: capped SVG views vs the WebGL mode.
+
+The dashboard's data, indexes and rollups are swapped for 200 random-walk
+columns over the real dates, then each chart is built (uncached) with and
+without ``high_cardinality``. For the line chart the WebGL mode's first
+figure and every ``line-stream-*`` stage are measured separately, and the
+stages are checked to deliver every selected currency exactly once.
+Browser rendering time is not measured here. Run from the repository root::
+
+    python benchmarks/bench_high_cardinality.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FX_FIGURE_CACHE_PATH', '')
+os.environ.setdefault('FX_METRICS_PATH', '')
+os.environ['FX_CLIENT_WINDOWING'] = '0'
+
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+import Exchange_rate_dash as dashboard  # noqa: E402
+from synthetic import use_synthetic  # noqa: E402
+
+CURRENCIES = 200
+
+
+def best_of(func, repeat=3, number=3):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def payload_kb(figure):
+    return len(to_json_plotly(figure, engine='orjson')) / 1000
+
+
+def main():
+    selected = tuple(use_synthetic(dashboard, CURRENCIES))
+    snapshot = dashboard.data
+    window = (0, len(snapshot.frame) - 1)
+    points = dashboard._point_budget(None)
+    builders = {
+        'line': lambda hc: dashboard.build_line_figure.uncached(snapshot, selected, window, points, hc),
+        'box': lambda hc: dashboard.build_box_figure.uncached(snapshot, selected, window, hc),
+        'area': lambda hc: dashboard.build_area_figure.uncached(snapshot, selected, window, 'M', points // 2, hc),
+        'bubble': lambda hc: dashboard.build_bubble_figure.uncached(snapshot, selected, window, hc),
+    }
+
+    print(f"{CURRENCIES} currencies x {len(snapshot.frame)} rows")
+    print(f"{'chart':>8} {'mode':>7} {'traces':>7} {'ms':>8} {'KB':>8}")
+    figures = {}
+    for name, build in builders.items():
+        for hc in (False, True):
+            figure = figures[name, hc] = build(hc)
+            print(f"{name:>8} {'webgl' if hc else 'capped':>7} {len(figure['data']):>7} "
+                  f"{best_of(lambda: build(hc)):>8.1f} {payload_kb(figure):>8.1f}")
+
+    # กราฟเส้น: ส่วนที่เหลือทยอยส่งผ่าน callback ของแต่ละรอบ
+    stream = dashboard._line_stream(selected, window, points, True)
+    delivered = [trace['name'] for trace in figures['line', True]['data']]
+    for stage in range(1, dashboard.line_stream_stages + 1):
+        stream_stage = dashboard._stream_line_stage(stage)
+        patch = stream_stage(stream, list(selected))[0]
+        operations = patch.to_plotly_json()['operations']
+        assert [op['location'][1] for op in operations] == list(range(len(delivered), len(delivered) + len(operations)))
+        delivered += [op['params']['value']['name'] for op in operations]
+        print(f"{'stage ' + str(stage):>8} {'webgl':>7} {len(operations):>7} "
+              f"{best_of(lambda: stream_stage(stream, list(selected))):>8.1f} {payload_kb(patch):>8.1f}")
+    assert delivered == list(selected)
+
+    # ไม่มีสกุลเงินหายไป: แบบจัดกลุ่มครอบคลุมทุกสกุล และโหมด WebGL แสดงแยกทุกสกุล
+    names, groups = dashboard._box_groups(snapshot, selected, window)
+    assert sorted(sum(groups, [])) == sorted(selected) and len(names) == 3
+    assert len(dashboard._box_combined_traces(snapshot, selected, window)[0]['q1']) == CURRENCIES
+    assert len(figures['area', True]['data']) == CURRENCIES
+    assert figures['bubble', True]['data'][0]['type'] == 'scattergl'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Overlays of a slider window: pandas rolling per window vs ``Overlays``.
+
+For ten currencies and every overlay kind at two window lengths, the first
+column recomputes the overlays of the slider window with pandas ``rolling``
+/ ``ewm`` (what a per-request implementation would do on every slider
+move); the second computes each overlay over the whole column in one pass
+(``overlays.compute``, a cache miss); the third slices the cached arrays of
+``Overlays``, which is what a slider move costs. Run from the repository
+root::
+
+    python benchmarks/bench_overlays.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import read_exchange_csv  # noqa: E402
+from overlays import BOLLINGER_K, KINDS, TRADING_DAYS, Overlays, compute  # noqa: E402
+
+WINDOWS = (20, 50)
+
+
+def best_of(func, repeat=5, number=3):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def pandas_overlays(frame, columns, start, end):
+    window = frame.iloc[start:end + 1]
+    result = {}
+    for column in columns:
+        values = window[column]
+        for length in WINDOWS:
+            rolling = values.rolling(length)
+            mean, std = rolling.mean(), rolling.std(ddof=0)
+            result[column, 'sma', length] = mean
+            result[column, 'ema', length] = values.ewm(span=length, adjust=False).mean()
+            result[column, 'bollinger', length] = (mean, mean + BOLLINGER_K * std, mean - BOLLINGER_K * std)
+            result[column, 'volatility', length] = \
+                np.log(values).diff().rolling(length).std() * np.sqrt(TRADING_DAYS) * 100
+    return result
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:12])
+    overlays = Overlays()
+
+    def cold():
+        return [compute(kind, exchange_data[column].to_numpy(), length)
+                for column in columns for kind in KINDS for length in WINDOWS]
+
+    last = len(exchange_data) - 1
+    print(f"{len(columns)} currencies x {len(KINDS)} kinds x {len(WINDOWS)} windows "
+          f"= {len(columns) * len(KINDS) * len(WINDOWS)} overlays")
+    print(f"one pass over all {last + 1} rows (cache miss): {best_of(cold):.1f} ms")
+    print(f"{'window':>7} {'pandas ms':>10} {'cached ms':>10}")
+    for length in (250, 1000, last + 1):
+        start, end = last + 1 - length, last
+
+        def cached():
+            return [overlays.series(column, exchange_data[column].to_numpy(), kind, window, start, end)
+                    for column in columns for kind in KINDS for window in WINDOWS]
+
+        cached()
+        # ช่วงที่ window เต็มแล้วทั้งสองแบบต้องได้ค่าเดียวกัน
+        expected = pandas_overlays(exchange_data, columns, start, end)[columns[0], 'sma', WINDOWS[0]].to_numpy()
+        sma = overlays.series(columns[0], exchange_data[columns[0]].to_numpy(), 'sma', WINDOWS[0], start, end)['mean']
+        assert np.allclose(sma[WINDOWS[0] - 1:], expected[WINDOWS[0] - 1:])
+        print(f"{length:>7} {best_of(lambda: pandas_overlays(exchange_data, columns, start, end)):>10.2f} "
+              f"{best_of(cached):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
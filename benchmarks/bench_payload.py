@@ -0,0 +1,76 @@
+"""Figure payloads of a full-history, 10-currency view: plain JSON vs typed arrays.
+
+Every chart is built once without the cache, then serialized three ways:
+plain JSON lists with the standard ``json`` engine (the old payload), the
+same with ``orjson``, and ``typed_arrays.encode_figure`` + ``orjson`` (what
+the callbacks return now). Times include the encoding step. Run from the
+repository root::
+
+    python benchmarks/bench_payload.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FX_FIGURE_CACHE_PATH', '')
+os.environ.setdefault('FX_METRICS_PATH', '')
+
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+import typed_arrays  # noqa: E402
+
+typed_arrays.ENABLED = False  # builder คืน figure แบบ JSON ปกติ แล้วค่อย encode ในการวัด
+import Exchange_rate_dash as dashboard  # noqa: E402
+
+CURRENCIES = 10
+
+
+def best_of(func, repeat=5, number=5):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    selected = tuple(dashboard.currency_columns[:CURRENCIES])
+    snapshot = dashboard.data
+    window = (0, len(snapshot.frame) - 1)
+    points = dashboard._point_budget(None)
+    figures = {
+        'line': dashboard.build_line_figure.uncached(snapshot, selected, window, points),
+        'histogram': dashboard.build_histogram_figure.uncached(snapshot, selected, window,
+                                                               dashboard._histogram_bar_budget(None)),
+        'bubble': dashboard.build_bubble_figure.uncached(snapshot, selected, window),
+        'box': dashboard.build_box_figure.uncached(snapshot, selected, window),
+        'area': dashboard.build_area_figure.uncached(snapshot, selected, window, 'M', points // 2),
+        'ohlc': dashboard.build_ohlc_figure.uncached(snapshot, selected[0], window, 'W'),
+        'rolling-corr': dashboard.build_rolling_correlation.uncached(snapshot, selected, window, 90, points)[0],
+        'forecast': dashboard.build_forecast_figure.uncached(snapshot, selected[0], window, 30, dashboard.DEFAULT_MODEL,
+                                                             points),
+    }
+
+    def encoded(figure):
+        typed_arrays.ENABLED = True
+        try:
+            return to_json_plotly(typed_arrays.encode_figure(figure), engine='orjson')
+        finally:
+            typed_arrays.ENABLED = False
+
+    print(f"{'chart':>13} {'json KB':>8} {'ms':>6} {'orjson ms':>10} {'typed KB':>9} {'ms':>6}")
+    totals = [0, 0, 0, 0, 0]
+    for name, figure in figures.items():
+        plain_bytes = len(to_json_plotly(figure, engine='json'))
+        typed_bytes = len(encoded(figure))
+        row = [
+            plain_bytes / 1000,
+            best_of(lambda: to_json_plotly(figure, engine='json')),
+            best_of(lambda: to_json_plotly(figure, engine='orjson')),
+            typed_bytes / 1000,
+            best_of(lambda: encoded(figure)),
+        ]
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{name:>13} {row[0]:>8.1f} {row[1]:>6.2f} {row[2]:>10.2f} {row[3]:>9.1f} {row[4]:>6.2f}")
+    print(f"{'total':>13} {totals[0]:>8.1f} {totals[1]:>6.2f} {totals[2]:>10.2f} {totals[3]:>9.1f} {totals[4]:>6.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Box-plot quantiles of a slider window: ``Series.quantile`` vs ``QuantileIndex``.
+
+``pandas`` slices the window and computes the quartiles (what the browser
+used to do with the raw points); ``QuantileIndex.quantile`` answers from the
+wavelet matrix and ``box_stats`` adds the Tukey whiskers and outliers.
+Run from the repository root::
+
+    python benchmarks/bench_quantiles.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import read_exchange_csv  # noqa: E402
+from quantile_index import QuantileIndex  # noqa: E402
+
+QUARTILES = [0.25, 0.5, 0.75]
+
+
+def best_of(func, repeat=5, number=20):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:])
+    build_ms = best_of(lambda: QuantileIndex(exchange_data[columns].to_numpy(), columns), repeat=3, number=1)
+    index = QuantileIndex(exchange_data[columns].to_numpy(), columns)
+    print(f"index build: {build_ms:.1f} ms, {index._ones.nbytes / 1e6:.1f} MB")
+
+    last = len(exchange_data) - 1
+    print(f"{'currencies':>10} {'window':>7} {'pandas ms':>10} {'index ms':>9} {'box_stats ms':>13}")
+    for size in (1, 5, len(columns)):
+        selected = columns[:size]
+        for length in (250, 1000, last + 1):
+            start, end = last + 1 - length, last
+            pandas_ms = best_of(lambda: exchange_data[selected].iloc[start:end + 1].quantile(QUARTILES))
+            index_ms = best_of(lambda: index.quantile(selected, start, end, QUARTILES))
+            box_ms = best_of(lambda: index.box_stats(selected, start, end))
+            print(f"{size:>10} {length:>7} {pandas_ms:>10.3f} {index_ms:>9.3f} {box_ms:>13.3f}")
+
+            # ผลลัพธ์ต้องตรงกับ pandas
+            reference = exchange_data[selected].iloc[start:end + 1].quantile(QUARTILES).to_numpy()
+            stats = index.box_stats(selected, start, end)
+            assert np.allclose([stats['q1'], stats['median'], stats['q3']], reference)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Monthly means of a slider window: ``strftime`` + ``groupby`` vs ``Rollups``.
+
+The first column is what the area chart used to do on every request (format
+each row's month as a string, group and average); the second reads the
+same means from the precomputed rollup, and the third adds the full OHLC of
+every period. Run from the repository root::
+
+    python benchmarks/bench_rollups.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import read_exchange_csv  # noqa: E402
+from rollups import RESOLUTIONS, Rollups  # noqa: E402
+
+
+def best_of(func, repeat=5, number=20):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exchange_data = read_exchange_csv(os.path.join(here, "Foreign_Exchange_Rates.csv"))
+    columns = list(exchange_data.columns[2:])
+    dates, values = exchange_data['Date'].to_numpy(), exchange_data[columns].to_numpy()
+    build_ms = best_of(lambda: Rollups(dates, values, columns), repeat=3, number=1)
+    rollups = Rollups(dates, values, columns)
+    print(f"rollup build: {build_ms:.1f} ms, periods " +
+          ", ".join(f"{label.lower()} {rollups.count(r, 0, len(values) - 1)}" for r, label in RESOLUTIONS.items()))
+
+    last = len(exchange_data) - 1
+    print(f"{'currencies':>10} {'window':>7} {'groupby ms':>11} {'rollup ms':>10}")
+    for size in (1, 5, len(columns)):
+        selected = columns[:size]
+        for length in (250, 1000, last + 1):
+            start, end = last + 1 - length, last
+
+            def groupby():
+                window = exchange_data.iloc[start:end + 1]
+                return window[selected].groupby(window['Date'].dt.strftime('%Y-%m')).mean()
+
+            groupby_ms = best_of(groupby)
+            rollup_ms = best_of(lambda: rollups.window('M', start, end, selected))
+            print(f"{size:>10} {length:>7} {groupby_ms:>11.3f} {rollup_ms:>10.3f}")
+
+            # ค่าเฉลี่ยต้องตรงกับ groupby
+            assert np.allclose(groupby().to_numpy(), rollups.window('M', start, end, selected)['mean'])
+
+
+if __name__ == '__main__':
+    main()
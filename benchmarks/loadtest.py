@@ -0,0 +1,347 @@
+"""Concurrent load test of ``/_dash-update-component`` with simulated analysts.
+
+For each worker/thread configuration (``WORKERSxTHREADS``) gunicorn is
+started on a free port with fresh caches, and ``--users`` virtual users
+replay interaction sessions for ``--duration`` seconds. A session is a page
+load followed by actions: slider drags (a new date window), currency
+multi-selects and forecast switches (model, horizon or currency). Each
+action fires the callbacks whose inputs changed and then the callbacks
+triggered by their outputs, as the Dash renderer does: callbacks of one
+round are sent in parallel over up to ``BROWSER_CONNECTIONS`` connections,
+background callbacks (the forecast) are polled until they finish, and
+``changedPropIds`` carries the changed inputs so slider-only changes take
+the patch path. Sessions are generated from ``--seed``, or replayed from a
+JSON-lines file written by ``--record``.
+
+Reports throughput and p50/p95/p99 latency per callback, then a comparison
+of the configurations. Run from the repository root::
+
+    python benchmarks/loadtest.py --users 16 --duration 30 --configs 1x1,2x1,2x4
+    python benchmarks/loadtest.py --record sessions.jsonl --sessions 100
+    python benchmarks/loadtest.py --replay sessions.jsonl --url http://127.0.0.1:8080
+"""
+import argparse
+import collections
+import http.client
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ttfb import SERVER_START_TIMEOUT, free_port, log_tail  # noqa: E402
+from warmup import UPDATE_PATH, component_props, initial_callbacks, request_body  # noqa: E402
+
+# จำนวน connection พร้อมกันต่อ host ของ browser ทั่วไป
+BROWSER_CONNECTIONS = 6
+ACTIONS = {'slider': 0.5, 'currencies': 0.3, 'forecast': 0.2}
+DEFAULT_CONFIGS = '1x1,2x1,2x4'
+# background callback ที่ยังไม่เสร็จภายในเวลานี้นับเป็น error
+BACKGROUND_TIMEOUT = 60
+# ความผิดพลาดของ connection ที่นับเป็น error ของ request แทนการหยุดผู้ใช้เสมือน
+CONNECTION_ERRORS = (OSError, http.client.HTTPException)
+
+
+def generate_session(rng, layout, actions):
+    """A page load followed by ``actions`` random interactions, as ``{'set': {prop_id: value}}`` steps."""
+    rows = layout['date-range-slider']['max'] + 1
+    currencies = [option['value'] if isinstance(option, dict) else option
+                  for option in layout['currency-dropdown']['options']]
+    models = [option['value'] for option in layout['forecast-model']['options']]
+    horizons = [option['value'] for option in layout['forecast-horizon']['options']]
+    steps = [{'action': 'load', 'set': {}}]
+    for name in rng.choices(list(ACTIONS), weights=list(ACTIONS.values()), k=actions):
+        if name == 'slider':
+            length = rng.randint(min(60, rows), rows)
+            start = rng.randint(0, rows - length)
+            update = {'date-range-slider.value': [start, start + length - 1]}
+        elif name == 'currencies':
+            update = {'currency-dropdown.value': rng.sample(currencies, rng.randint(1, min(6, len(currencies))))}
+        else:
+            update = rng.choice([{'forecast-model.value': rng.choice(models)},
+                                 {'forecast-horizon.value': rng.choice(horizons)},
+                                 {'forecast-currency-dropdown.value': None}])  # None: สกุลที่เลือกอยู่แบบสุ่ม
+        steps.append({'action': name, 'set': update})
+    return steps
+
+
+class Recorder:
+    """Latencies and errors per callback, shared by every virtual user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.actions = 0
+
+    def add(self, name, seconds, ok):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def action(self):
+        with self._lock:
+            self.actions += 1
+
+
+def request(host, port, method, path, body=None, timeout=120):
+    # gunicorn worker แบบ sync ไม่ keep-alive จึงเปิด connection ใหม่ทุก request
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={'Content-Type': 'application/json'} if body is not None else {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def _triggered(dependencies, changed):
+    return [d for d in dependencies if any(f"{item['id']}.{item['property']}" in changed for item in d['inputs'])]
+
+
+class VirtualUser:
+    """One browser tab: its own component state and up to ``BROWSER_CONNECTIONS`` requests at a time."""
+
+    def __init__(self, host, port, dependencies, recorder, rng, think):
+        self.host, self.port = host, port
+        self.dependencies = [d for d in dependencies if not d.get('clientside_function')]
+        self.recorder = recorder
+        self.rng = rng
+        self.think = think
+        self.props = {}
+        self.pool = ThreadPoolExecutor(BROWSER_CONNECTIONS)
+
+    def request(self, method, path, body=None):
+        return request(self.host, self.port, method, path, body)
+
+    def call(self, dependency, changed):
+        name = dependency['output'].strip('.').split('...')[0]
+        inputs = {f"{item['id']}.{item['property']}" for item in dependency['inputs']}
+        body = request_body(dependency, self.props)
+        body['changedPropIds'] = sorted(inputs & changed)
+        started = time.perf_counter()
+        try:
+            status, data = self.request('POST', UPDATE_PATH, body)
+            result = json.loads(data) if status == 200 else {}
+            while status == 200 and 'job' in result and 'response' not in result:
+                # background callback: ถามผลทุก interval จนเสร็จ เหมือน renderer
+                if time.perf_counter() - started > BACKGROUND_TIMEOUT:
+                    status = 504
+                    break
+                time.sleep(dependency['long'].get('interval', 1000) / 1000)
+                query = urllib.parse.urlencode({'cacheKey': result['cacheKey'], 'job': result['job']})
+                status, data = self.request('POST', f"{UPDATE_PATH}?{query}", body)
+                polled = json.loads(data) if status == 200 else {}
+                result = {**result, **polled} if 'response' not in polled else polled
+        except CONNECTION_ERRORS:
+            # connection ถูกปิดหรือหมดเวลา (เช่น worker ถูก restart) - นับเป็น error แล้วเล่นต่อ
+            status, result = None, {}
+        self.recorder.add(name, time.perf_counter() - started, status in (200, 204))
+
+        updated = set()
+        for component_id, values in result.get('response', {}).items():
+            for prop, value in values.items():
+                if isinstance(value, dict) and '__dash_patch_update' in value:
+                    continue  # Patch ของกราฟ - ไม่มี callback ใดใช้เป็น input
+                self.props.setdefault(component_id, {})[prop.split('@')[0]] = value
+                updated.add(f"{component_id}.{prop.split('@')[0]}")
+        return updated
+
+    def fire(self, first_round, changed):
+        # รอบแรกคือ callback ที่ input เปลี่ยน แล้วต่อด้วย callback ที่ output ของรอบก่อนไปกระตุ้น
+        fired = set()
+        ready = first_round
+        while ready:
+            fired.update(d['output'] for d in ready)
+            results = list(self.pool.map(lambda d: self.call(d, changed), ready))
+            changed = set().union(*results)
+            ready = [d for d in _triggered(self.dependencies, changed) if d['output'] not in fired]
+
+    def run(self, session, deadline):
+        for step in session:
+            if time.monotonic() >= deadline:
+                return False
+            if step['action'] == 'load':
+                started = time.perf_counter()
+                try:
+                    status, data = self.request('GET', '/_dash-layout')
+                except CONNECTION_ERRORS:
+                    status = None
+                self.recorder.add('_dash-layout', time.perf_counter() - started, status == 200)
+                if status != 200:
+                    # ไม่มี layout ให้เล่นต่อ - เริ่ม session ถัดไป
+                    time.sleep(self.think)
+                    return True
+                self.props = component_props(json.loads(data))
+                self.fire(initial_callbacks(self.dependencies), set())
+            else:
+                update = dict(step['set'])
+                if update.get('forecast-currency-dropdown.value', '') is None:
+                    options = self.props['forecast-currency-dropdown'].get('options') or [None]
+                    choice = self.rng.choice(options)
+                    update['forecast-currency-dropdown.value'] = choice['value'] if isinstance(choice, dict) else choice
+                for prop_id, value in update.items():
+                    component_id, prop = prop_id.split('.')
+                    self.props.setdefault(component_id, {})[prop] = value
+                changed = set(update)
+                self.fire(_triggered(self.dependencies, changed), changed)
+            self.recorder.action()
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+        return True
+
+
+def run_load(host, port, sessions, users, duration, think, seed):
+    dependencies = json.loads(request(host, port, 'GET', '/_dash-dependencies')[1])
+    recorder = Recorder()
+    source = itertools.cycle(sessions)
+    source_lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def user_loop(index):
+        user = VirtualUser(host, port, dependencies, recorder, random.Random(seed + index), think)
+        while time.monotonic() < deadline:
+            with source_lock:
+                session = next(source)
+            if not user.run(session, deadline):
+                break
+        user.pool.shutdown()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user_loop, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def start_server(workers, threads, port):
+    scratch = tempfile.mkdtemp()
+    env = dict(os.environ, FX_FIGURE_CACHE_PATH=os.path.join(scratch, 'figures.sqlite'),
+               FX_METRICS_PATH=os.path.join(scratch, 'metrics.sqlite'),
+               FX_BACKGROUND_CACHE_DIR=os.path.join(scratch, 'background'))
+    log_path = os.path.join(scratch, 'gunicorn.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+             '--bind', f'127.0.0.1:{port}', '--timeout', '120', 'Exchange_rate_dash:server'],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}:\n{log_tail(log_path)}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            process.wait()
+            raise RuntimeError(f"gunicorn did not answer within {SERVER_START_TIMEOUT} s:\n{log_tail(log_path)}")
+        try:
+            if request('127.0.0.1', port, 'GET', '/', timeout=5)[0] == 200:
+                return process
+        except CONNECTION_ERRORS:
+            pass
+        time.sleep(0.1)
+
+
+def summarize(recorder, elapsed):
+    """``{name: {count, rps, p50_ms, p95_ms, p99_ms, errors}}`` plus an ``all`` row."""
+    rows = {}
+    everything = []
+    for name, latencies in sorted(recorder.latencies.items()):
+        everything += latencies
+        rows[name] = _row(latencies, elapsed, recorder.errors[name])
+    rows['all'] = _row(everything, elapsed, sum(recorder.errors.values()))
+    rows['all']['actions_per_s'] = recorder.actions / elapsed
+    return rows
+
+
+def _row(latencies, elapsed, errors):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (np.nan,) * 3
+    return {'count': len(latencies), 'rps': len(latencies) / elapsed,
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'errors': errors}
+
+
+def print_rows(rows):
+    print(f"{'callback':<40} {'count':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, row in rows.items():
+        print(f"{name:<40} {row['count']:>7} {row['rps']:>7.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--configs', default=DEFAULT_CONFIGS, help="comma-separated WORKERSxTHREADS for gunicorn")
+    parser.add_argument('--url', help="load an already running server instead of starting gunicorn")
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help="seconds per configuration")
+    parser.add_argument('--think', type=float, default=0.5, help="mean seconds between a user's actions")
+    parser.add_argument('--sessions', type=int, default=50, help="sessions to generate")
+    parser.add_argument('--actions', type=int, default=10, help="actions per generated session")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replay', help="JSON-lines file of sessions to replay")
+    parser.add_argument('--record', help="write the generated sessions here and exit")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    targets = ([('external', None, urllib.parse.urlparse(args.url))] if args.url else
+               [(config, tuple(int(n) for n in config.split('x')), None) for config in args.configs.split(',')])
+
+    results = {}
+    sessions = None
+    if args.replay:
+        with open(args.replay) as f:
+            sessions = [json.loads(line)['steps'] for line in f if line.strip()]
+
+    for config, shape, url in targets:
+        process = None
+        if url is None:
+            host, port = '127.0.0.1', free_port()
+            process = start_server(*shape, port)
+        else:
+            host, port = url.hostname, url.port or 80
+        try:
+            if sessions is None:
+                layout = component_props(json.loads(request(host, port, 'GET', '/_dash-layout')[1]))
+                rng = random.Random(args.seed)
+                sessions = [generate_session(rng, layout, args.actions) for _ in range(args.sessions)]
+                if args.record:
+                    with open(args.record, 'w') as f:
+                        f.writelines(json.dumps({'steps': steps}) + '\n' for steps in sessions)
+                    print(f"{len(sessions)} sessions written to {args.record}")
+                    return
+            recorder, elapsed = run_load(host, port, sessions, args.users, args.duration, args.think, args.seed)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        results[config] = summarize(recorder, elapsed)
+        print(f"\n{config}: {args.users} users for {elapsed:.0f} s, "
+              f"{results[config]['all']['actions_per_s']:.2f} actions/s")
+        print_rows(results[config])
+
+    if len(results) > 1:
+        print(f"\n{'config':<10} {'req/s':>7} {'actions/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for config, rows in results.items():
+            row = rows['all']
+            print(f"{config:<10} {row['rps']:>7.1f} {row['actions_per_s']:>10.2f} {row['p50_ms']:>8.1f} "
+                  f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'users': args.users, 'duration': args.duration, 'think': args.think, 'results': results},
+                      f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
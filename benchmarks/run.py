@@ -0,0 +1,227 @@
+"""Benchmark suite: figure builders and page-load callbacks over scaled synthetic data.
+
+For each dataset size ``ROWSxCURRENCIES`` (the real table is 5015x22) the
+dashboard's tables are swapped for synthetic ones (``synthetic.py``; the
+inflation table grows with the currency count) and every item is measured
+with the figure cache disabled:
+
+- ``ms``: best of ``--repeat`` calls
+- ``peak_kb``: ``tracemalloc`` peak of one more call
+- ``payload_kb``: the serialized output (the HTTP response for callbacks)
+
+Items are ``<size>/setup`` (building the indexes for that table, i.e. what
+loading it costs), ``<size>/figure/<name>`` (the ``build_*`` functions
+called directly, as the callbacks call them), ``<size>/callback/<output>``
+(each callback of a first page load, posted through the Flask test client
+with the layout's initial values) and ``module-load`` (``import
+Exchange_rate_dash`` in a fresh interpreter; ``peak_kb`` is its max RSS).
+
+Results are written as JSON. With ``--baseline`` every item present in both
+runs is compared, and one that got slower or larger than the baseline by
+more than ``--threshold`` fails the run (exit status 1). Run from the
+repository root::
+
+    python benchmarks/run.py --output results.json --baseline benchmarks/baseline.json
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['FX_FIGURE_CACHE_PATH'] = ''
+os.environ['FX_FIGURE_CACHE_SIZE'] = '0'  # ทุกครั้งคำนวณใหม่
+os.environ['FX_METRICS_PATH'] = ''
+os.environ['FX_CLIENT_WINDOWING'] = '0'
+
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+import Exchange_rate_dash as dashboard  # noqa: E402
+from overlays import KINDS as overlay_labels  # noqa: E402
+from synthetic import INFLATION_SERIES, use_synthetic  # noqa: E402
+from warmup import UPDATE_PATH, component_props, initial_callbacks, request_body  # noqa: E402
+
+DEFAULT_SIZES = '5015x22,20000x22,100000x22,5015x100,5015x500'
+DEFAULT_THRESHOLD = 0.25
+# ต่างกันน้อยกว่านี้ถือเป็น noise ไม่ว่าจะกี่เปอร์เซ็นต์ (peak ของ tracemalloc ต่างกันได้ราวร้อย KB ระหว่าง process)
+NOISE = {'ms': 1.0, 'peak_kb': 512.0, 'payload_kb': 0.0}
+
+MODULE_LOAD = ("import resource, time; started = time.perf_counter(); import Exchange_rate_dash; "
+               "print(time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+
+
+def parse_size(text):
+    rows, currencies = text.lower().split('x')
+    return int(rows), int(currencies)
+
+
+def measure(func, repeat):
+    """``(result, {'ms', 'peak_kb'})`` of calling ``func`` (after one warm-up call)."""
+    result = func()
+    ms = min(timeit.repeat(func, repeat=repeat, number=1)) * 1000
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'ms': ms, 'peak_kb': peak / 1000}
+
+
+def module_load(repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-c', MODULE_LOAD], cwd=ROOT, env=os.environ,
+                                capture_output=True, text=True, check=True).stdout.split()
+        runs.append((float(output[0]) * 1000, float(output[1])))
+    return {'ms': min(ms for ms, _ in runs), 'peak_kb': max(rss for _, rss in runs)}
+
+
+def setup(rows, currencies, select):
+    tracemalloc.start()
+    started = time.perf_counter()
+    columns = use_synthetic(dashboard, currencies, rows=rows, countries=max(18, round(18 * currencies / 22)))
+    ms = (time.perf_counter() - started) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tuple(columns[:select]), {'ms': ms, 'peak_kb': peak / 1000}
+
+
+def figure_builders(selected, window):
+    d = dashboard
+    snapshot = d.data
+    points = d._point_budget(None)
+    area_points = d._point_budget(None, 0.5)
+    return {
+        'line': lambda: d.build_line_figure.uncached(snapshot, selected, window, points),
+        'line-overlays': lambda: d.build_line_figure.uncached(
+            snapshot, selected, window, points, False,
+            d._overlay_specs(snapshot, list(overlay_labels), d.default_overlay_windows)),
+        'histogram': lambda: d.build_histogram_figure.uncached(snapshot, selected, window, d._histogram_bar_budget(None)),
+        'bubble': lambda: d.build_bubble_figure.uncached(snapshot, selected, window),
+        'box': lambda: d.build_box_figure.uncached(snapshot, selected, window),
+        'area': lambda: d.build_area_figure.uncached(
+            snapshot, selected, window, d._rollup_resolution(snapshot, 'auto', window, area_points), area_points),
+        'ohlc': lambda: d.build_ohlc_figure.uncached(
+            snapshot, selected[0], window,
+            d._rollup_resolution(snapshot, 'auto', window, d._ohlc_candle_budget(None))),
+        'rolling-corr': lambda: d.build_rolling_correlation.uncached(
+            snapshot, selected, window, d.default_rolling_window, d._point_budget(None, 2 / 3)),
+        'cross-rates': lambda: d.build_cross_rate_matrix.uncached(snapshot, d._matrix_codes(snapshot, selected), window),
+        'inflation': lambda: d.build_inflation_figure.uncached(snapshot, INFLATION_SERIES[0], points),
+        'real-rates': lambda: d.build_real_rate_figure.uncached(
+            snapshot, selected, window, INFLATION_SERIES[0], d._point_budget(None, 2 / 3)),
+        'forecast': lambda: d.build_forecast_figure.uncached(
+            snapshot, selected[0], window, d.default_forecast_horizon, d.DEFAULT_MODEL, points),
+        'statistics': lambda: d.build_statistics.uncached(snapshot, selected, window),
+        'insights': lambda: d.update_insights(list(selected), list(window)),
+        'anomalies': lambda: d.build_anomaly_insights.uncached(snapshot, selected, window),
+    }
+
+
+def page_callbacks(selected):
+    # คำขอของการโหลดหน้าแรก โดยเลือกสกุลเงินของชุดทดสอบแทนค่าเริ่มต้น
+    client = dashboard.server.test_client()
+    props = component_props(client.get('/_dash-layout').get_json())
+    props['currency-dropdown']['value'] = list(selected)
+    props['ohlc-currency-dropdown']['value'] = selected[0]
+    callbacks = {}
+    for dependency in initial_callbacks(client.get('/_dash-dependencies').get_json()):
+        body = request_body(dependency, props)
+        name = dependency['output'].strip('.').split('...')[0]
+        callbacks[name] = lambda body=body: client.post(UPDATE_PATH, json=body)
+    return callbacks
+
+
+def run(sizes, select, repeat):
+    results = {'module-load': module_load(repeat)}
+    print(f"{'item':<52} {'ms':>9} {'peak KB':>10} {'payload KB':>11}")
+    print(f"{'module-load':<52} {results['module-load']['ms']:>9.1f} {results['module-load']['peak_kb']:>10.0f}")
+    for rows, currencies in sizes:
+        size = f"{rows}x{currencies}"
+        selected, results[f"{size}/setup"] = setup(rows, currencies, select)
+        window = (0, rows - 1)
+        items = {f"figure/{name}": build for name, build in figure_builders(selected, window).items()}
+        items.update({f"callback/{name}": post for name, post in page_callbacks(selected).items()})
+        print(f"{size + '/setup':<52} {results[size + '/setup']['ms']:>9.1f} {results[size + '/setup']['peak_kb']:>10.0f}")
+        for name, func in items.items():
+            output, result = measure(func, repeat)
+            if name.startswith('callback/'):
+                assert output.status_code == 200, f"{size}/{name}: HTTP {output.status_code}"
+                result['payload_kb'] = len(output.data) / 1000
+            else:
+                result['payload_kb'] = len(to_json_plotly(output)) / 1000
+            results[f"{size}/{name}"] = result
+            print(f"{size + '/' + name:<52} {result['ms']:>9.1f} {result['peak_kb']:>10.0f} {result['payload_kb']:>11.1f}")
+    return results
+
+
+def regressions(results, baseline, threshold):
+    """``[(item, metric, baseline, current)]`` of every value that grew beyond ``threshold``."""
+    found = []
+    for item, base in baseline.items():
+        for metric, noise in NOISE.items():
+            if item not in results or metric not in results[item] or metric not in base:
+                continue
+            old, new = base[metric], results[item][metric]
+            if new > old * (1 + threshold) and new - old > noise:
+                found.append((item, metric, old, new))
+    return found
+
+
+def meta(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'sizes': args.sizes,
+        'select': args.select,
+        'repeat': args.repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma-separated ROWSxCURRENCIES")
+    parser.add_argument('--select', type=int, default=10, help="currencies selected in the charts")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare with the results in this JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative growth over the baseline (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', help="write the results as the new baseline file")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    report = {'meta': meta(args), 'results': run(sizes, args.select, args.repeat)}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        found = regressions(report['results'], baseline, args.threshold)
+        for item, metric, old, new in found:
+            print(f"REGRESSION {item} {metric}: {old:.1f} -> {new:.1f} (+{new / old - 1:.0%})")
+        compared = len(set(baseline) & set(report['results']))
+        print(f"{compared} items compared with {args.baseline}: {len(found)} regression(s) over {args.threshold:.0%}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Where a worker's startup time goes: imports by package, then the app's own setup.
+
+Runs ``python -X importtime -c "import Exchange_rate_dash"`` in a fresh
+interpreter and sums each module's self time by top-level package (so
+``pandas`` includes every ``pandas.*`` submodule), then profiles the import
+once more with ``cProfile`` and lists the repository functions with the
+largest cumulative time (data loading, index builds, layout). Run from the
+repository root::
+
+    python benchmarks/startup_profile.py [top]
+"""
+import collections
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE = """
+import cProfile, pstats, sys
+profiler = cProfile.Profile()
+profiler.runcall(__import__, 'Exchange_rate_dash')
+pstats.Stats(profiler).sort_stats('cumulative').print_stats(sys.argv[1], int(sys.argv[2]))
+"""
+
+
+def run(args):
+    env = dict(os.environ, FX_FIGURE_CACHE_PATH='', FX_METRICS_PATH='')
+    return subprocess.run([sys.executable, '-W', 'ignore'] + args, cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_times():
+    # บรรทัดของ -X importtime: "import time: self [us] | cumulative | imported package"
+    packages = collections.Counter()
+    total = 0
+    for line in run(['-X', 'importtime', '-c', 'import Exchange_rate_dash']).stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us)
+        if not name.startswith('  '):
+            total += int(cumulative_us)
+    return total, packages
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    total, packages = import_times()
+    print(f"import Exchange_rate_dash: {total / 1e6:.2f} s (self time by top-level package)")
+    for name, us in packages.most_common(top):
+        print(f"  {name:<32} {us / 1000:>8.1f} ms {us / total:>6.1%}")
+
+    print("\nrepository functions during import (cumulative):")
+    pattern = f"{os.path.basename(ROOT)}/[a-zA-Z_]+\\.py"
+    stats = run(['-c', PROFILE, pattern, str(top)]).stdout
+    print(stats[stats.index('   ncalls'):])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Synthetic tables shaped like the repository's CSVs, swapped into the dashboard.
+
+``exchange_table`` generates random-walk rates (per US$, spread over five
+orders of magnitude like the real columns) on consecutive calendar days
+ending 2019-12-31 (business days would not fit 100k rows in pandas' date
+range); ``inflation_table`` generates the wide layout of
+``Filtered_Inflation_Data.csv`` for any number of countries.
+``use_synthetic`` replaces the dashboard's tables and every index built
+from them, the way a restart on that data would.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inflation import InflationTable  # noqa: E402
+from overlays import Overlays  # noqa: E402
+from snapshot import DataSnapshot  # noqa: E402
+
+INFLATION_SERIES = [
+    'Headline Consumer Price Inflation',
+    'Energy Consumer Price Inflation',
+    'Food Consumer Price Inflation',
+    'Official Core Consumer Price Inflation',
+    'Producer Price Inflation',
+]
+INFLATION_YEARS = [str(year) for year in range(2000, 2020)]
+
+
+def exchange_table(rows, currencies, seed=0, dates=None):
+    """Rate table with the layout of ``Foreign_Exchange_Rates.csv`` after cleaning."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end='2019-12-31', periods=rows).to_numpy() if dates is None else dates
+    levels = 10 ** rng.uniform(-1, 4, currencies)
+    values = levels * np.exp(np.cumsum(rng.normal(0, 0.005, (len(dates), currencies)), axis=0))
+    columns = [f"SYNTHETIC {i:03d} - CURRENCY/US$" for i in range(currencies)]
+    frame = pd.DataFrame(values, columns=columns)
+    frame.insert(0, 'Date', dates)
+    frame.insert(0, 'Unnamed: 0', np.arange(len(dates)))
+    return frame
+
+
+def inflation_table(countries, seed=0):
+    """Inflation table with the layout of ``Filtered_Inflation_Data.csv``."""
+    rng = np.random.default_rng(seed)
+    index = pd.MultiIndex.from_product([[f"Country {i:03d}" for i in range(countries)], INFLATION_SERIES],
+                                       names=['Country', 'Series_Name'])
+    values = np.round(rng.normal(3, 2, (len(index), len(INFLATION_YEARS))), 2)
+    return pd.DataFrame(values, index=index, columns=INFLATION_YEARS).reset_index()
+
+
+def use_synthetic(dashboard, currencies, rows=None, countries=None, seed=0):
+    """Replace the dashboard's data (and everything built from it) with synthetic tables.
+
+    ``rows=None`` keeps the real dates; ``countries=None`` keeps the real
+    inflation table. The indexes are built by ``DataSnapshot.build`` like
+    the dashboard's own, without saving rolling correlations or anomaly
+    state, so rolling correlations cover the first ``MAX_COLUMNS`` columns.
+    Returns the new currency columns.
+    """
+    frame = exchange_table(rows, currencies, seed,
+                           dates=dashboard.data.dates if rows is None else None)
+    columns = list(frame.columns[2:])
+
+    if countries is not None:
+        dashboard.inflation_data = inflation_table(countries, seed)
+        dashboard.inflation_data_melted = pd.melt(
+            dashboard.inflation_data, id_vars=['Country', 'Series_Name'], var_name='Year', value_name='Inflation_Rate')
+        dashboard.inflation_table = InflationTable(dashboard.inflation_data)
+
+    dashboard.currency_columns = columns
+    # revision ของชุดสังเคราะห์ - ชื่อคอลัมน์ของทุกขนาดเหมือนกัน จึงต้องไม่ใช้ cache ของชุดอื่น
+    dashboard.data = DataSnapshot.build(frame, columns, f"synthetic:{currencies}x{countries}:{seed}",
+                                        dashboard.inflation_table)
+    dashboard.overlays = Overlays()
+    return columns
@@ -0,0 +1,104 @@
+"""Time to first byte of a fresh gunicorn worker, with and without warm-up.
+
+Starts ``gunicorn Exchange_rate_dash:server`` (one worker, the repository's
+``gunicorn.conf.py``) with ``FX_WARMUP=0`` and ``1`` and measures, from the
+moment the process is spawned, the first byte of ``GET /``; then the time
+for the page's initial callbacks, posted one after another as a browser on
+first load would. Each run uses a fresh in-process figure cache. Run from
+the repository root::
+
+    python benchmarks/ttfb.py [runs]
+"""
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from warmup import UPDATE_PATH, component_props, initial_callbacks, request_body  # noqa: E402
+
+# gunicorn ที่ยังไม่ตอบภายในเวลานี้ (วินาที) ถือว่าเริ่มไม่สำเร็จ
+SERVER_START_TIMEOUT = 120
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, method, path, body=None, timeout=60):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()  # สถานะและ header มาถึงแล้ว = byte แรก
+    first_byte = time.perf_counter()
+    data = response.read()
+    connection.close()
+    return response.status, data, first_byte
+
+
+def log_tail(path, size=4000):
+    with open(path, 'rb') as f:
+        f.seek(max(os.path.getsize(path) - size, 0))
+        return f.read().decode(errors='replace')
+
+
+def measure(warmup):
+    port = free_port()
+    scratch = tempfile.mkdtemp()
+    env = dict(os.environ, FX_WARMUP='1' if warmup else '0', FX_FIGURE_CACHE_PATH='', FX_METRICS_PATH='',
+               FX_BACKGROUND_CACHE_DIR=os.path.join(scratch, 'background'))
+    log_path = os.path.join(scratch, 'gunicorn.log')
+    with open(log_path, 'wb') as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', '1', '--bind', f'127.0.0.1:{port}',
+             'Exchange_rate_dash:server'],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = started + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {process.returncode}:\n{log_tail(log_path)}")
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"gunicorn did not answer within {SERVER_START_TIMEOUT} s:\n{log_tail(log_path)}")
+            try:
+                status, _, first_byte = request(port, 'GET', '/', timeout=SERVER_START_TIMEOUT)
+                break
+            except (ConnectionError, http.client.HTTPException):  # worker ยังไม่พร้อมหรือบูตไม่สำเร็จ
+                time.sleep(0.01)
+        assert status == 200
+        ttfb = first_byte - started
+
+        props = component_props(json.loads(request(port, 'GET', '/_dash-layout')[1]))
+        dependencies = json.loads(request(port, 'GET', '/_dash-dependencies')[1])
+        page_started = time.perf_counter()
+        for dependency in initial_callbacks(dependencies):
+            status, _, _ = request(port, 'POST', UPDATE_PATH, request_body(dependency, props))
+            assert status == 200, dependency['output']
+        return ttfb, time.perf_counter() - page_started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"median of {runs} fresh workers")
+    print(f"{'warm-up':>8} {'TTFB s':>8} {'first page callbacks ms':>24}")
+    for warmup in (False, True):
+        results = [measure(warmup) for _ in range(runs)]
+        print(f"{'on' if warmup else 'off':>8} {statistics.median(r[0] for r in results):>8.2f} "
+              f"{statistics.median(r[1] for r in results) * 1000:>24.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Compact copy of the rate table for client-side windowing.
+
+``ClientDataset`` serializes the dates (int32 day numbers) and every rate
+column (float32) as typed arrays, the same encoding as the figures, and
+serves the JSON with an ETag derived from the source revision and the data
+generation. The browser loads it once per page into a ``dcc.Store`` and
+revalidates with ``If-None-Match``, so a reload of unchanged data is a 304.
+``assets/client_windowing.js`` slices it when the date slider moves.
+"""
+import hashlib
+import json
+import threading
+
+from flask import Response
+
+from typed_arrays import encode_array
+
+
+class ClientDataset:
+    """Cached JSON payload of ``(dates, values, columns)`` for one data generation."""
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._cached = (None, None)  # (version, bytes)
+
+    def version(self, generation):
+        """Short hash identifying the dataset a page should load."""
+        return hashlib.sha1(f"{self.fingerprint}:{generation}".encode()).hexdigest()[:16]
+
+    def payload(self, generation, load):
+        """UTF-8 JSON of the dataset, built once per generation.
+
+        ``load()`` returns ``(dates, values, columns)`` and is only called
+        when the generation changed.
+        """
+        version = self.version(generation)
+        with self._lock:
+            if self._cached[0] == version:
+                return version, self._cached[1]
+            dates, values, columns = load()
+            body = json.dumps({
+                'version': version,
+                'columns': list(columns),
+                'dates': encode_array(dates),
+                'values': [encode_array(values[:, i]) for i in range(len(columns))],
+            }, separators=(',', ':')).encode()
+            self._cached = (version, body)
+            return version, body
+
+    def response(self, request, generation, load):
+        """Flask response for ``request``: the payload, or 304 when the ETag matches."""
+        version, body = self.payload(generation, load)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(version)
+        # เก็บไว้ใน cache ของ browser ได้ แต่ต้องตรวจ ETag ทุกครั้ง (ข้อมูลอาจมีแถวใหม่)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
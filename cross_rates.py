@@ -0,0 +1,172 @@
+"""Cross rates between any two currencies of the US$-quoted rate table.
+
+Every column of ``Foreign_Exchange_Rates.csv`` is units of a currency per
+US dollar, so one unit of ``base`` costs ``quote_per_usd / base_per_usd``
+units of ``quote`` (``USD`` itself is a column of ones). ``CrossRates``
+names currencies by ISO code (``CURRENCY_CODES``) and pairs as
+``'EUR/JPY'``. A pair's full-history series is one vectorized division,
+kept in a small LRU cache of recently requested pairs and extended in place
+when rows are appended; ``matrix`` returns every pair of a window at once
+as a ``(rows, n, n)`` array, and ``volatility`` the volatility of every pair
+from one ``(n, n)`` covariance of the per-US$ log returns.
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+USD = 'USD'
+
+CURRENCY_CODES = {
+    'AUSTRALIA - AUSTRALIAN DOLLAR/US$': 'AUD',
+    'EURO AREA - EURO/US$': 'EUR',
+    'NEW ZEALAND - NEW ZELAND DOLLAR/US$': 'NZD',
+    'UNITED KINGDOM - UNITED KINGDOM POUND/US$': 'GBP',
+    'BRAZIL - REAL/US$': 'BRL',
+    'CANADA - CANADIAN DOLLAR/US$': 'CAD',
+    'CHINA - YUAN/US$': 'CNY',
+    'HONG KONG - HONG KONG DOLLAR/US$': 'HKD',
+    'INDIA - INDIAN RUPEE/US$': 'INR',
+    'KOREA - WON/US$': 'KRW',
+    'MEXICO - MEXICAN PESO/US$': 'MXN',
+    'SOUTH AFRICA - RAND/US$': 'ZAR',
+    'SINGAPORE - SINGAPORE DOLLAR/US$': 'SGD',
+    'DENMARK - DANISH KRONE/US$': 'DKK',
+    'JAPAN - YEN/US$': 'JPY',
+    'MALAYSIA - RINGGIT/US$': 'MYR',
+    'NORWAY - NORWEGIAN KRONE/US$': 'NOK',
+    'SWEDEN - KRONA/US$': 'SEK',
+    'SRI LANKA - SRI LANKAN RUPEE/US$': 'LKR',
+    'SWITZERLAND - FRANC/US$': 'CHF',
+    'TAIWAN - NEW TAIWAN DOLLAR/US$': 'TWD',
+    'THAILAND - BAHT/US$': 'THB',
+}
+
+DEFAULT_CACHE_SIZE = 64
+TRADING_DAYS = 252
+
+
+def pair_name(base, quote):
+    return f"{base}/{quote}"
+
+
+class CrossRates:
+    """Cross rates of every currency pair derived from per-US$ columns."""
+
+    def __init__(self, values, columns, cache_size=DEFAULT_CACHE_SIZE):
+        self.columns = list(columns)
+        # คอลัมน์ที่ไม่มีรหัส ISO ใช้ชื่อคอลัมน์แทน
+        self.codes = [CURRENCY_CODES.get(column, column) for column in self.columns]
+        self._positions = {code: i for i, code in enumerate(self.codes)}
+        self._values = np.array(values, dtype=np.float64)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (base, quote) -> อัตราของทุกแถว
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def currencies(self):
+        """Every currency code that can be a side of a pair, ``USD`` first."""
+        return [USD] + self.codes
+
+    def code(self, column):
+        return self.codes[self.columns.index(column)]
+
+    def parse(self, name):
+        """``(base, quote)`` of a pair name such as ``'EUR/JPY'``, or ``None``."""
+        base, separator, quote = str(name).partition('/')
+        if not separator or base == quote:
+            return None
+        if all(code == USD or code in self._positions for code in (base, quote)):
+            return base, quote
+        return None
+
+    def _per_usd(self, code, rows):
+        if code == USD:
+            return np.ones(len(range(*rows.indices(len(self)))))
+        return self._values[rows, self._positions[code]]
+
+    def _ratio(self, base, quote, rows):
+        return self._per_usd(quote, rows) / self._per_usd(base, rows)
+
+    def series(self, pair, start=0, end=None):
+        """Rates of ``pair`` (a name or ``(base, quote)``) for rows ``[start, end]``."""
+        key = self.parse(pair) if isinstance(pair, str) else tuple(pair)
+        if key is None:
+            raise KeyError(pair)
+        end = len(self) - 1 if end is None else end
+        with self._lock:
+            rates = self._cache.get(key)
+            if rates is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if rates is None:
+            rates = self._ratio(*key, slice(0, len(self)))
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = rates
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return rates[start:end + 1]
+
+    def matrix(self, start, end, codes=None):
+        """Every cross rate of ``codes`` for rows ``[start, end]``.
+
+        ``out[t, i, j]`` is the price of one ``codes[i]`` in ``codes[j]`` on
+        row ``start + t`` (ones on the diagonal).
+        """
+        codes = self.currencies if codes is None else list(codes)
+        rows = slice(start, end + 1)
+        per_usd = np.column_stack([self._per_usd(code, rows) for code in codes])
+        return per_usd[:, None, :] / per_usd[:, :, None]
+
+    def volatility(self, start, end, codes=None):
+        """``(n, n)`` annualized volatility (%) of the daily log returns of every pair of ``codes``.
+
+        A pair's log return is the difference of the per-US$ log returns of
+        its two sides, so its variance is ``var_i + var_j - 2 cov_ij`` of those.
+        """
+        codes = self.currencies if codes is None else list(codes)
+        if end - start < 2:
+            return np.full((len(codes), len(codes)), np.nan)
+        rows = slice(start, end + 1)
+        log_returns = np.diff(np.log(np.column_stack([self._per_usd(code, rows) for code in codes])), axis=0)
+        cov = np.atleast_2d(np.cov(log_returns, rowvar=False))
+        variance = np.diag(cov)[:, None] + np.diag(cov)[None, :] - 2 * cov
+        return np.sqrt(np.maximum(variance, 0) * TRADING_DAYS) * 100
+
+    def describe(self, pairs, start, end):
+        """Mean, std, min, max and latest rate of each pair as a dict of arrays."""
+        rates = np.column_stack([self.series(pair, start, end) for pair in pairs])
+        return {
+            'count': end - start + 1,
+            'mean': rates.mean(axis=0),
+            'std': rates.std(axis=0, ddof=1) if len(rates) > 1 else np.full(len(pairs), np.nan),
+            'min': rates.min(axis=0),
+            'max': rates.max(axis=0),
+            'latest': rates[-1],
+        }
+
+    def copy(self):
+        """Cross rates to append to while these keep answering; the cached pairs are shared until extended."""
+        other = copy.copy(self)
+        with self._lock:
+            other._cache = OrderedDict(self._cache)
+        other._lock = threading.Lock()
+        return other
+
+    def append(self, values):
+        """Add rows (in column order) and extend the cached pairs with them."""
+        rows = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(rows):
+            return
+        old_size = len(self)
+        self._values = np.concatenate([self._values, rows])
+        new_rows = slice(old_size, len(self))
+        with self._lock:
+            for key, rates in self._cache.items():
+                self._cache[key] = np.concatenate([rates, self._ratio(*key, new_rows)])
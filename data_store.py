@@ -0,0 +1,205 @@
+"""Columnar binary store for Foreign_Exchange_Rates.csv.
+
+The CSV is parsed once by ``build_store`` into typed ``.npy`` files
+(datetime64 dates, float64 rate columns, a validity mask for ``ND`` cells)
+that every worker can memory-map instead of re-parsing the text file.
+``load_exchange_data`` returns the same cleaned DataFrame the dashboard has
+always used and falls back to the CSV path when no usable store exists.
+
+Build the store ahead of a deploy with::
+
+    python data_store.py [Foreign_Exchange_Rates.csv] [store_dir]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 2
+DATE_COLUMN = 'Date'
+ROW_ID_COLUMN = 'Unnamed: 0'
+MISSING_MARKER = 'ND'
+
+_META_FILE = 'meta.json'
+_ARRAY_FILES = ('row_ids', 'dates', 'values', 'valid', 'complete_rows', 'clean_values')
+
+
+def read_exchange_csv(csv_path):
+    """Parse the CSV the original way: drop rows with ``ND`` and coerce to float."""
+    exchange_data = pd.read_csv(csv_path)
+
+    # ทำความสะอาดข้อมูล Exchange Rates
+    exchange_data.rename(columns={'Time Serie': DATE_COLUMN}, inplace=True)
+    exchange_data[DATE_COLUMN] = pd.to_datetime(exchange_data[DATE_COLUMN])
+    exchange_data = exchange_data.replace(MISSING_MARKER, None).dropna()
+
+    # แปลงคอลัมน์เป็นตัวเลข
+    for column in exchange_data.columns[2:]:
+        exchange_data[column] = pd.to_numeric(exchange_data[column], errors='coerce')
+
+    return exchange_data
+
+
+def source_fingerprint(csv_path, stat=None):
+    """Identify a CSV revision by size and modification time."""
+    stat = stat or os.stat(csv_path)
+    return f"v{STORE_VERSION}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def parse_raw_columns(raw):
+    """Split a raw (string-typed) frame into typed arrays.
+
+    Returns ``(row_ids, dates, values, valid, complete)`` where ``values`` holds
+    NaN for every ``ND``/unparseable cell, ``valid`` marks parsed cells and
+    ``complete`` marks rows the dashboard keeps (no ``ND`` and no blanks).
+    """
+    rate_columns = list(raw.columns[2:])
+    row_ids = pd.to_numeric(raw.iloc[:, 0], errors='coerce').fillna(-1).to_numpy(np.int64)
+    dates = pd.to_datetime(raw.iloc[:, 1]).to_numpy('datetime64[ns]')
+
+    text = raw[rate_columns]
+    complete = (text.notna() & (text != MISSING_MARKER)).all(axis=1).to_numpy()
+
+    # เก็บเป็น column-major เพื่อให้แต่ละสกุลเงินอยู่ติดกันในหน่วยความจำ
+    values = np.empty((len(raw), len(rate_columns)), dtype=np.float64, order='F')
+    for i, column in enumerate(rate_columns):
+        values[:, i] = pd.to_numeric(text[column], errors='coerce').to_numpy(np.float64)
+    valid = ~np.isnan(values)
+    return row_ids, dates, values, valid, complete
+
+
+def build_store(csv_path, store_dir):
+    """Parse ``csv_path`` into a new store revision under ``store_dir``.
+
+    Each revision lives in its own sub-directory named after the source
+    fingerprint and is published with an atomic rename, so concurrent workers
+    never observe a half-written store. Returns the revision directory.
+    """
+    stat = os.stat(csv_path)
+    fingerprint = source_fingerprint(csv_path, stat)
+    target = os.path.join(store_dir, fingerprint)
+    if os.path.exists(os.path.join(target, _META_FILE)):
+        return target
+
+    os.makedirs(store_dir, exist_ok=True)
+    raw = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[''])
+    row_ids, dates, values, valid, complete = parse_raw_columns(raw)
+    complete_rows = np.flatnonzero(complete).astype(np.int64)
+
+    arrays = {
+        'row_ids': row_ids,
+        'dates': dates.view(np.int64),
+        'values': values,
+        'valid': valid,
+        'complete_rows': complete_rows,
+        'clean_values': np.asfortranarray(values[complete_rows]),
+    }
+    meta = {
+        'version': STORE_VERSION,
+        'fingerprint': fingerprint,
+        'source': os.path.abspath(csv_path),
+        'columns': [ROW_ID_COLUMN, DATE_COLUMN] + list(raw.columns[2:]),
+        'rows': int(len(raw)),
+        'complete_rows': int(len(complete_rows)),
+        'source_bytes': stat.st_size,
+    }
+
+    tmp_dir = tempfile.mkdtemp(prefix='.build-', dir=store_dir)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, _META_FILE), 'w') as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            # worker อื่นสร้าง revision เดียวกันเสร็จก่อนแล้ว
+            if not os.path.exists(os.path.join(target, _META_FILE)):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    _prune_revisions(store_dir, keep=fingerprint)
+    return target
+
+
+def _prune_revisions(store_dir, keep):
+    for name in os.listdir(store_dir):
+        if name != keep and not name.startswith('.'):
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+
+class ColumnarStore:
+    """Memory-mapped arrays of one store revision.
+
+    ``values``/``valid`` cover every CSV row, ``clean_values`` only the rows
+    without ``ND`` (``complete_rows`` gives their positions in the CSV).
+    """
+
+    def __init__(self, path, mmap_mode='c'):
+        with open(os.path.join(path, _META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported store version in {path}")
+        self.path = path
+        self.columns = self.meta['columns']
+        self.rate_columns = self.columns[2:]
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in _ARRAY_FILES
+        }
+        self.row_ids = arrays['row_ids']
+        self.dates = arrays['dates'].view('datetime64[ns]')
+        self.values = arrays['values']
+        self.valid = arrays['valid']
+        self.complete_rows = arrays['complete_rows']
+        self.clean_values = arrays['clean_values']
+
+    def to_frame(self):
+        """Build the cleaned exchange-rate frame on top of the mapped arrays."""
+        # clean_values เป็น F-order จึงสร้าง DataFrame ได้โดยไม่ต้องคัดลอกข้อมูล
+        frame = pd.DataFrame(self.clean_values, columns=self.rate_columns, copy=False)
+        frame.insert(0, DATE_COLUMN, self.dates[self.complete_rows])
+        frame.insert(0, ROW_ID_COLUMN, np.asarray(self.row_ids[self.complete_rows]))
+        frame.index = pd.Index(np.asarray(self.complete_rows))
+        return frame
+
+
+def open_store(csv_path, store_dir, build=True):
+    """Return the store matching the current CSV, building it if allowed."""
+    path = os.path.join(store_dir, source_fingerprint(csv_path))
+    if not os.path.exists(os.path.join(path, _META_FILE)):
+        if not build:
+            return None
+        path = build_store(csv_path, store_dir)
+    return ColumnarStore(path)
+
+
+def load_exchange_data(csv_path, store_dir=None, build=True):
+    """Load the cleaned exchange-rate frame, preferring the binary store.
+
+    Any problem with the store (read-only directory, corrupt files, version
+    mismatch) falls back to parsing the CSV directly.
+    """
+    if store_dir and os.environ.get('FX_DISABLE_STORE') != '1':
+        try:
+            store = open_store(csv_path, store_dir, build=build)
+            if store is not None:
+                return store.to_frame()
+        except (OSError, ValueError) as e:
+            print(f"Columnar store unavailable ({e}); parsing {csv_path}", file=sys.stderr)
+    return read_exchange_csv(csv_path)
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, "Foreign_Exchange_Rates.csv")
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(here, "fx_store")
+    revision = build_store(csv_path, store_dir)
+    store = ColumnarStore(revision)
+    print(f"Built {revision}: {store.meta['rows']} rows, "
+          f"{store.meta['complete_rows']} complete, {len(store.rate_columns)} currencies")
@@ -0,0 +1,78 @@
+"""Point reduction for dense time-series traces.
+
+Both methods return the *indices* of the points to keep, so one selection can
+be applied to the dates and the values of a trace (and to other arrays that
+share its rows). The first and last points are always kept.
+
+* ``minmax_indices`` keeps the minimum and maximum of equal-width buckets;
+  fully vectorized and guarantees every spike survives.
+* ``lttb_indices`` is Largest-Triangle-Three-Buckets, which keeps the point
+  forming the largest triangle with its neighbours in each bucket.
+"""
+import numpy as np
+
+DEFAULT_METHOD = 'minmax'
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of ``n_out // 2`` buckets over ``y``."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+
+    n_buckets = n_out // 2
+    starts = np.linspace(0, n, n_buckets + 1).astype(np.intp)[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n)))
+
+    selected = [np.array([0, n - 1])]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(y, starts)
+        # ตำแหน่งแรกในแต่ละ bucket ที่มีค่าเท่ากับค่าสุดขั้วของ bucket นั้น
+        hits = np.flatnonzero(y == extreme[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        selected.append(hits[first])
+    return np.unique(np.concatenate(selected))
+
+
+def lttb_indices(y, n_out, x=None):
+    """Largest-Triangle-Three-Buckets selection of ``n_out`` points."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # จุดแรกและจุดสุดท้ายอยู่นอก bucket; ที่เหลือแบ่งเป็น n_out - 2 bucket
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_indices(y, n_out, method=DEFAULT_METHOD, x=None):
+    """Indices to keep so a trace has at most about ``n_out`` points."""
+    if method == 'lttb':
+        return lttb_indices(y, n_out, x)
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def downsample_xy(x, y, n_out, method=DEFAULT_METHOD):
+    """Return ``(x, y)`` reduced to about ``n_out`` points; short traces pass through."""
+    if len(y) <= n_out:
+        return x, y
+    idx = downsample_indices(y, n_out, method)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -0,0 +1,331 @@
+"""Bulk export of rates, statistics and forecasts under ``/api/v1``.
+
+``export_blueprint`` builds a Flask blueprint over the dashboard's own
+tables (the cleaned rate table, cross rates, rollups, window statistics,
+the forecast fit and the inflation table), read through callables so rows
+appended by the feed are served without re-registering. A request reads
+the dashboard's data snapshot once, so every table it sends covers the
+same rows. Tables are sent as
+CSV, Parquet or an Arrow IPC stream, chosen by the ``Accept`` header or
+``?format=``, and encoded ``CHUNK_ROWS`` rows at a time from slices of the
+column arrays, so the response body is never built whole. Each response
+carries an ETag of the data version and the normalized query; a matching
+``If-None-Match`` is answered with 304 before anything is computed.
+Parquet and Arrow need ``pyarrow``; without it only CSV is offered.
+"""
+import hashlib
+import io
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+
+from cross_rates import USD
+from rollups import RESOLUTIONS, period_keys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ไม่มี pyarrow - ส่งได้เฉพาะ CSV
+    pa = pq = None
+
+CSV = 'text/csv'
+PARQUET = 'application/vnd.apache.parquet'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+FORMATS = {'csv': CSV, 'parquet': PARQUET, 'arrow': ARROW}
+EXTENSIONS = {CSV: 'csv', PARQUET: 'parquet', ARROW: 'arrows'}
+# ชื่อ MIME อื่นของ Parquet ที่ client ยังใช้กันอยู่
+_ALIASES = {'application/x-parquet': PARQUET}
+
+# จำนวนแถวต่อ chunk ของ response (CSV ต่อครั้ง, record batch ของ Arrow, row group ของ Parquet)
+CHUNK_ROWS = 1000
+
+# ค่าของคาบในรายสัปดาห์/เดือน/ปี และฟังก์ชันของ pandas ที่ให้ผลเดียวกันสำหรับคู่ cross rate
+FIELDS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'mean': 'mean'}
+DEFAULT_FIELD = 'close'
+
+MAX_HORIZON = 365
+
+
+class ExportError(ValueError):
+    """A request the API cannot answer; ``status`` is the HTTP status to send."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def available_formats():
+    return [CSV] + ([PARQUET, ARROW] if pa is not None else [])
+
+
+def negotiate(args, accept):
+    """MIME type for ``?format=`` or else the best match of the ``Accept`` header."""
+    name = args.get('format')
+    if name:
+        if name not in FORMATS:
+            raise ExportError(f"Unknown format {name!r}; use one of {', '.join(FORMATS)}")
+        mimetype = FORMATS[name]
+        if mimetype not in available_formats():
+            raise ExportError(f"Format {name!r} needs pyarrow, which is not installed", 406)
+        return mimetype
+    offered = available_formats() + [alias for alias, target in _ALIASES.items() if target in available_formats()]
+    match = accept.best_match(offered) if accept else CSV
+    if match is None:
+        raise ExportError(f"None of the requested types can be produced; available: {', '.join(available_formats())}", 406)
+    return _ALIASES.get(match, match)
+
+
+def _chunks(table, rows):
+    # อย่างน้อยหนึ่ง chunk เพื่อให้ตารางว่างยังมี header/schema
+    for start in range(0, max(rows, 1), CHUNK_ROWS):
+        yield {name: values[start:start + CHUNK_ROWS] for name, values in table.items()}
+
+
+def _csv_chunks(table, rows):
+    for i, chunk in enumerate(_chunks(table, rows)):
+        yield pd.DataFrame(chunk).to_csv(index=False, header=i == 0, date_format='%Y-%m-%d').encode()
+
+
+class _Sink(io.RawIOBase):
+    # ไฟล์ปลายทางของ writer ของ pyarrow - เก็บ bytes ที่เขียนไว้จนกว่าจะส่งออกไป
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def drain(self):
+        body = b''.join(self._parts)
+        self._parts.clear()
+        return body
+
+
+def _arrow_chunks(table, rows, parquet=False):
+    sink = _Sink()
+    writer = None
+    for chunk in _chunks(table, rows):
+        batch = pa.RecordBatch.from_pydict({name: pa.array(values) for name, values in chunk.items()})
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema) if parquet else pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {
+    CSV: _csv_chunks,
+    ARROW: _arrow_chunks,
+    PARQUET: lambda table, rows: _arrow_chunks(table, rows, parquet=True),
+}
+
+
+def _split(args, name):
+    return [item.strip() for item in args.get(name, '').split(',') if item.strip()]
+
+
+def _parse_date(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        raise ExportError(f"{name} must be a date (YYYY-MM-DD), got {value!r}") from None
+
+
+def export_blueprint(snapshot, inflation_data, version, describe, fit_forecast, forecast_models, default_model):
+    """Blueprint of the export endpoints.
+
+    ``snapshot()`` returns the current ``DataSnapshot`` (rate table, cross
+    rates and rollups) and ``inflation_data()`` the melted inflation table;
+    ``version(snapshot)`` is a string identifying the data of a snapshot.
+    ``describe(snapshot, series, window)`` and ``fit_forecast(snapshot,
+    column, window, horizon, model)`` are the dashboard's statistics and
+    forecast functions.
+    """
+    api = Blueprint('export_api', __name__, url_prefix='/api/v1')
+
+    def resolve(current, names):
+        # รหัส ISO, ชื่อคอลัมน์ หรือคู่ cross rate -> (หัวคอลัมน์ที่ส่งออก, ชื่อที่ dashboard ใช้)
+        pairs = current.cross_rates
+        series = []
+        for name in names:
+            if name in pairs.columns:
+                series.append((pairs.code(name), name))
+            elif name in pairs.codes:
+                series.append((name, pairs.columns[pairs.codes.index(name)]))
+            elif pairs.parse(name):
+                series.append((name, name))
+            else:
+                raise ExportError(f"Unknown currency or pair {name!r}")
+        return series
+
+    def requested_series(current, args):
+        names = _split(args, 'currencies')
+        return resolve(current, names) if names else list(zip(current.cross_rates.codes, current.cross_rates.columns))
+
+    def row_window(current, args):
+        # ช่วงวันที่ -> แถว [start, end] ของตาราง (end < start คือไม่มีแถว)
+        dates = current.dates.astype('datetime64[D]')
+        start, end = _parse_date(args, 'start'), _parse_date(args, 'end')
+        first = 0 if start is None else int(np.searchsorted(dates, start, 'left'))
+        last = len(dates) - 1 if end is None else int(np.searchsorted(dates, end, 'right')) - 1
+        return dates, (first, last)
+
+    def respond(current, name, key, build):
+        mimetype = negotiate(request.args, request.accept_mimetypes if 'Accept' in request.headers else None)
+        etag = hashlib.sha1(f"{version(current)}:{name}:{key!r}:{mimetype}".encode()).hexdigest()[:16]
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            table = build()
+            rows = len(next(iter(table.values())))
+            response = Response(_ENCODERS[mimetype](table, rows), mimetype=mimetype)
+            response.headers['Content-Disposition'] = f'attachment; filename="{name}.{EXTENSIONS[mimetype]}"'
+        response.set_etag(etag)
+        # client เก็บไว้ได้ แต่ต้องตรวจ ETag ทุกครั้ง (ข้อมูลอาจมีแถวใหม่)
+        response.cache_control.no_cache = True
+        return response
+
+    @api.errorhandler(ExportError)
+    def export_error(error):
+        return jsonify(error=str(error)), error.status
+
+    @api.route('/currencies')
+    def currencies():
+        current = snapshot()
+        dates, pairs = current.frame['Date'], current.cross_rates
+        response = jsonify(
+            currencies=[{'code': code, 'column': column} for code, column in zip(pairs.codes, pairs.columns)],
+            usd=USD,
+            first_date=str(dates.iloc[0].date()),
+            last_date=str(dates.iloc[-1].date()),
+            resolutions=['D'] + list(RESOLUTIONS),
+            formats=available_formats(),
+        )
+        response.set_etag(hashlib.sha1(f"{version(current)}:currencies".encode()).hexdigest()[:16])
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    @api.route('/rates')
+    def rates():
+        args = request.args
+        current = snapshot()
+        series = requested_series(current, args)
+        resolution = args.get('resolution', 'D')
+        if resolution != 'D' and resolution not in RESOLUTIONS:
+            raise ExportError(f"resolution must be one of D, {', '.join(RESOLUTIONS)}")
+        field = args.get('field', DEFAULT_FIELD)
+        if field not in FIELDS:
+            raise ExportError(f"field must be one of {', '.join(FIELDS)}")
+        dates, (start, end) = row_window(current, args)
+        key = (tuple(name for _, name in series), start, end, resolution, field if resolution != 'D' else None)
+
+        def build():
+            data, pairs = current.frame, current.cross_rates
+            if resolution == 'D':
+                table = {'Date': dates[start:end + 1]}
+                for header, name in series:
+                    table[header] = (pairs.series(name, start, end) if pairs.parse(name)
+                                     else data[name].to_numpy()[start:end + 1])
+                return table
+            if end < start:
+                return {'Period': dates[:0], **{header: np.empty(0) for header, _ in series}}
+            # คอลัมน์ปกติจาก rollups ที่คำนวณไว้แล้ว, คู่ cross rate จัดกลุ่มตามคาบจากอัตรารายวัน
+            columns = [name for _, name in series if not pairs.parse(name)]
+            window = current.rollups.window(resolution, start, end, columns) if columns else None
+            keys = period_keys(dates[start:end + 1], resolution)
+            table = {'Period': window['period'] if window else np.unique(keys)}
+            for header, name in series:
+                if pairs.parse(name):
+                    pair = pd.Series(pairs.series(name, start, end))
+                    table[header] = pair.groupby(keys).agg(FIELDS[field]).to_numpy()
+                else:
+                    table[header] = window[field][:, columns.index(name)]
+            return table
+
+        return respond(current, 'rates', key, build)
+
+    @api.route('/statistics')
+    def statistics():
+        args = request.args
+        current = snapshot()
+        series = requested_series(current, args)
+        _, (start, end) = row_window(current, args)
+        if end < start:
+            raise ExportError("No rates between start and end")
+        names = [name for _, name in series]
+
+        def build():
+            stats = describe(current, names, (start, end))
+            return {
+                'currency': np.array([header for header, _ in series], dtype=object),
+                'count': np.full(len(series), end - start + 1),
+                **{stat: np.asarray(stats[stat], dtype=np.float64) for stat in ('mean', 'std', 'min', 'max', 'latest')},
+            }
+
+        return respond(current, 'statistics', (tuple(names), start, end), build)
+
+    @api.route('/forecast')
+    def forecast():
+        args = request.args
+        currency = args.get('currency')
+        if not currency:
+            raise ExportError("currency is required")
+        current = snapshot()
+        (_, column), = resolve(current, [currency])
+        if current.cross_rates.parse(column):
+            raise ExportError("Forecasts are available for US$ rates only, not cross pairs")
+        model = args.get('model', default_model)
+        if model not in forecast_models:
+            raise ExportError(f"model must be one of {', '.join(forecast_models)}")
+        try:
+            horizon = int(args.get('horizon', 30))
+        except ValueError:
+            raise ExportError("horizon must be an integer") from None
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ExportError(f"horizon must be between 1 and {MAX_HORIZON}")
+        _, (start, end) = row_window(current, args)
+
+        def build():
+            try:
+                fit = fit_forecast(current, column, (start, end), horizon, model)
+            except (ValueError, IndexError) as e:
+                raise ExportError(f"Cannot fit {model} to this range: {e}") from None
+            return {
+                'Date': np.asarray(fit['future_dates'], dtype='datetime64[D]'),
+                **{name: np.asarray(fit[name], dtype=np.float64) for name in ('forecast', 'lower', 'upper')},
+            }
+
+        return respond(current, 'forecast', (column, start, end, horizon, model), build)
+
+    @api.route('/inflation')
+    def inflation():
+        args = request.args
+        countries, names = _split(args, 'countries'), _split(args, 'series')
+
+        def build():
+            data = inflation_data()
+            keep = np.ones(len(data), dtype=bool)
+            if countries:
+                keep &= data['Country'].isin(countries).to_numpy()
+            if names:
+                keep &= data['Series_Name'].isin(names).to_numpy()
+            return {column: data[column].to_numpy()[keep] for column in data.columns}
+
+        return respond(snapshot(), 'inflation', (tuple(countries), tuple(names)), build)
+
+    return api
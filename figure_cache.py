@@ -0,0 +1,270 @@
+"""Bounded LRU/TTL cache for serialized callback outputs.
+
+Entries are stored as Plotly JSON in a SQLite file so every gunicorn worker on
+the host shares them; without a path the cache lives in process memory.
+Hit/miss/eviction counters are kept next to the entries so they describe the
+traffic of all workers together.
+
+A lookup in the SQLite cache only reads: counters and LRU access times are
+collected in process memory and written in one transaction with the next
+``set`` (or at most ``FLUSH_SECONDS`` later, or by ``stats``), and expired
+entries are deleted by ``set``. A SQLite error (e.g. "database is locked")
+makes a lookup a miss and a store a no-op instead of failing the request.
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+_COUNTERS = ('hits', 'misses', 'evictions', 'expirations')
+FLUSH_SECONDS = 5.0
+
+
+def canonical_currencies(selected_currencies, column_order):
+    """Order a currency selection by dataset column order, dropping duplicates."""
+    selected = set(selected_currencies or [])
+    return tuple(column for column in column_order if column in selected)
+
+
+def make_key(namespace, *parts):
+    """Build a stable cache key from JSON-serializable parts."""
+    return namespace + ':' + json.dumps(parts, separators=(',', ':'), default=str)
+
+
+class FigureCache:
+    """LRU cache with a TTL, keyed by strings and holding JSON text.
+
+    ``path=None`` keeps entries in an in-process ``OrderedDict``; otherwise
+    they go to a SQLite database shared by every process that opens it.
+    """
+
+    def __init__(self, path=None, max_entries=256, ttl=600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._counters = dict.fromkeys(_COUNTERS, 0)
+        # SQLite: ตัวนับและเวลาเข้าถึงที่ยังไม่ได้เขียนลงไฟล์ (เขียนรวมครั้งเดียว)
+        self._accessed = {}
+        self._flushed = time.time()
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                    " created REAL NOT NULL, accessed REAL NOT NULL);"
+                    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);"
+                    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO counters VALUES (?, 0)", [(name,) for name in _COUNTERS]
+                )
+
+    def _connect(self):
+        # sqlite connection ใช้ข้าม process (fork) หรือ thread ไม่ได้ จึงเปิดใหม่ต่อ pid/thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _flush(self, conn, counted):
+        # เขียนตัวนับและเวลาเข้าถึงที่ค้างไว้ (รวม counted ของ transaction นี้) - ล้างค่าค้างหลัง COMMIT เท่านั้น
+        with self._lock:
+            counters = dict(self._counters)
+            accessed = dict(self._accessed)
+        conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?",
+                         [(when, key) for key, when in accessed.items()])
+        conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                         [(amount + counted.get(name, 0), name) for name, amount in counters.items()
+                          if amount + counted.get(name, 0)])
+        return counters, accessed
+
+    def _flushed_ok(self, counters, accessed):
+        with self._lock:
+            for name, amount in counters.items():
+                self._counters[name] -= amount
+            for key, when in accessed.items():
+                if self._accessed.get(key) == when:
+                    del self._accessed[key]
+
+    def _write(self, statements):
+        """Run ``statements(conn)`` and the pending counters in one transaction; ``False`` on a SQLite error.
+
+        ``statements`` may return counter increments of its own.
+        """
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = self._flush(conn, statements(conn) or {})
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            return False
+        self._flushed_ok(*pending)
+        return True
+
+    def get(self, key):
+        """Return the decoded value for ``key`` or ``None`` on a miss."""
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                entry = self._memory.get(key)
+                if entry is not None and now - entry[1] > self.ttl:
+                    del self._memory[key]
+                    self._counters['expirations'] += 1
+                    entry = None
+                if entry is None:
+                    self._counters['misses'] += 1
+                    return None
+                self._memory.move_to_end(key)
+                self._counters['hits'] += 1
+                text = entry[0]
+            return json.loads(text)
+
+        try:
+            row = self._connect().execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        # หมดอายุ = miss (set ลบทิ้งภายหลัง)
+        if row is None or now - row[1] > self.ttl:
+            self._count('misses')
+            return None
+        with self._lock:
+            self._counters['hits'] += 1
+            self._accessed[key] = now
+            due = now - self._flushed > FLUSH_SECONDS
+            if due:
+                self._flushed = now  # ลองครั้งถัดไปหลัง FLUSH_SECONDS แม้ครั้งนี้จะล้มเหลว
+        if due:
+            self._write(lambda conn: None)
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Serialize ``value`` with the Plotly JSON encoder and store it."""
+        text = to_json_plotly(value)
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                self._memory[key] = (text, now)
+                self._memory.move_to_end(key)
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+                    self._counters['evictions'] += 1
+            return
+
+        def store(conn):
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, text, now, now))
+            expired = conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,)).rowcount
+            excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed LIMIT ?)", (excess,)
+                )
+            return {'expirations': expired, 'evictions': max(excess, 0)}
+
+        self._write(store)
+
+    def stats(self):
+        """Counters plus the current entry count and configured limits."""
+        if not self.path:
+            with self._lock:
+                result = dict(self._counters, entries=len(self._memory))
+        else:
+            self._write(lambda conn: None)
+            try:
+                conn = self._connect()
+                stored = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+                entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            except sqlite3.Error:
+                stored, entries = {}, 0
+            # รวมตัวนับของ process นี้ที่ยังเขียนไม่สำเร็จ
+            with self._lock:
+                result = {name: stored.get(name, 0) + self._counters[name] for name in _COUNTERS}
+            result['entries'] = entries
+        lookups = result['hits'] + result['misses']
+        result['hit_ratio'] = result['hits'] / lookups if lookups else 0.0
+        result['max_entries'] = self.max_entries
+        result['ttl'] = self.ttl
+        return result
+
+    def clear(self):
+        if not self.path:
+            with self._lock:
+                self._memory.clear()
+            return
+        self._connect().execute("DELETE FROM entries")
+
+    def memoize(self, namespace):
+        """Cache a function's result under ``namespace`` plus its positional args.
+
+        The first argument is the data the result is built from; it enters
+        the key as its ``generation``, so results built from other data are
+        never hit. The other arguments must already be normalized (tuples,
+        strings, numbers); a hit returns the decoded JSON form of the
+        original result, which Dash accepts for figures and components alike.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(data, *args):
+                key = make_key(namespace, data.generation, *args)
+                cached = self.get(key)
+                if cached is not None:
+                    return cached
+                result = func(data, *args)
+                self.set(key, result)
+                return result
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+
+def code_version(directory):
+    """Short hash of the ``.py`` files in ``directory``, or ``FX_CODE_VERSION`` when set.
+
+    Part of the cache generation, so a deploy of new code does not serve
+    figures built by the old one.
+    """
+    version = os.environ.get('FX_CODE_VERSION')
+    if version:
+        return version
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def cache_from_env(default_path):
+    """Create the dashboard cache from ``FX_FIGURE_CACHE_*`` environment variables.
+
+    ``FX_FIGURE_CACHE_PATH`` set to an empty string selects the in-process cache.
+    """
+    path = os.environ.get('FX_FIGURE_CACHE_PATH', default_path)
+    return FigureCache(
+        path=path or None,
+        max_entries=int(os.environ.get('FX_FIGURE_CACHE_SIZE', 256)),
+        ttl=float(os.environ.get('FX_FIGURE_CACHE_TTL', 600)),
+    )
@@ -0,0 +1,250 @@
+"""Forecast models for the dashboard's forecast chart.
+
+Every model has the same small interface: ``fit(y)`` on a 1-D series
+returns the model, ``fitted`` then holds the in-sample one-step-ahead
+predictions (NaN where the model has no prediction) and
+``predict(horizon, level)`` returns ``(mean, lower, upper)`` arrays with a
+prediction interval for each future step. Steps are rows of the series,
+i.e. business days for the exchange-rate data.
+
+Models are looked up by name in ``MODELS``; ``forecast`` fits and predicts
+in one call and returns a plain dict that the figure cache can store.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_MODEL = 'linear'
+DEFAULT_LEVEL = 0.95
+
+
+def _stats():
+    # import scipy.stats ใช้เวลาราวครึ่งวินาที - โหลดตอนพยากรณ์ครั้งแรกแทนตอนเริ่ม worker
+    from scipy import stats
+    return stats
+
+
+class ForecastModel:
+    """Base class; subclasses set ``name``/``label`` and implement ``fit``/``predict``."""
+
+    name = None
+    label = None
+    min_points = 10
+
+    def fit(self, y):
+        raise NotImplementedError
+
+    def predict(self, horizon, level=DEFAULT_LEVEL):
+        raise NotImplementedError
+
+    @staticmethod
+    def _check(y, min_points):
+        y = np.asarray(y, dtype=np.float64)
+        if y.ndim != 1 or len(y) < min_points:
+            raise ValueError(f"Need a 1-D series of at least {min_points} points")
+        if not np.isfinite(y).all():
+            raise ValueError("Series must be finite")
+        return y
+
+
+class LinearTrend(ForecastModel):
+    """Least-squares line on the row index with a proper prediction interval.
+
+    The interval includes the noise around the line, not only the standard
+    error of the slope.
+    """
+
+    name = 'linear'
+    label = 'Linear trend'
+
+    def fit(self, y):
+        y = self._check(y, self.min_points)
+        n = len(y)
+        t = np.arange(n, dtype=np.float64)
+        self._n = n
+        self._t_mean = t.mean()
+        self._sxx = ((t - self._t_mean) ** 2).sum()
+        self.slope = ((t - self._t_mean) * (y - y.mean())).sum() / self._sxx
+        self.intercept = y.mean() - self.slope * self._t_mean
+        self.fitted = self.intercept + self.slope * t
+        self.residual_std = np.sqrt(((y - self.fitted) ** 2).sum() / (n - 2))
+        return self
+
+    def predict(self, horizon, level=DEFAULT_LEVEL):
+        t = np.arange(self._n, self._n + horizon, dtype=np.float64)
+        mean = self.intercept + self.slope * t
+        se = self.residual_std * np.sqrt(1 + 1 / self._n + (t - self._t_mean) ** 2 / self._sxx)
+        q = _stats().t.ppf(0.5 + level / 2, self._n - 2)
+        return mean, mean - q * se, mean + q * se
+
+
+class HoltWinters(ForecastModel):
+    """Additive Holt-Winters (level, trend and optional season) exponential smoothing.
+
+    The smoothing parameters are chosen by one-step squared error over a
+    grid; every grid candidate is filtered in the same pass over the series
+    (the recursion runs once per row on arrays holding all candidates).
+    Only the last ``max_history`` rows are used, older rows have no weight
+    left after smoothing anyway.
+    """
+
+    name = 'holt_winters'
+    label = 'Holt-Winters (weekly season)'
+    alphas = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9, 1.0])
+    betas = np.array([0.0, 0.01, 0.05, 0.1, 0.2])
+    gammas = np.array([0.01, 0.05, 0.1, 0.3])
+
+    def __init__(self, season_length=5, max_history=1000):
+        self.season_length = season_length
+        self.max_history = max_history
+
+    def fit(self, y):
+        m = self.season_length
+        y = self._check(y, max(self.min_points, 2 * m + 2))
+        history = y[-self.max_history:]
+        n = len(history)
+
+        gammas = self.gammas if m else np.zeros(1)
+        alpha, beta, gamma = (g.ravel() for g in np.meshgrid(self.alphas, self.betas, gammas, indexing='ij'))
+        # error-correction form: beta ในที่นี้คือ alpha * beta* ของสูตร Holt ดั้งเดิม
+        beta = alpha * beta
+
+        if m:
+            # ค่าเริ่มต้นจากสองรอบฤดูกาลแรก: ค่าเฉลี่ยรอบแรกคือระดับที่กึ่งกลางรอบ
+            start = m
+            first = history[:m].mean()
+            slope = (history[m:2 * m].mean() - first) / m
+            offsets = np.arange(m) - (m - 1) / 2
+            level = np.full(len(alpha), first + slope * (m - 1) / 2)
+            trend = np.full(len(alpha), slope)
+            season = np.tile(history[:m] - (first + slope * offsets), (len(alpha), 1))
+        else:
+            start = 2
+            level = np.full(len(alpha), history[1])
+            trend = np.full(len(alpha), history[1] - history[0])
+            season = np.zeros((len(alpha), 1))
+
+        predictions = np.full((n, len(alpha)), np.nan)
+        rows = np.arange(len(alpha))
+        for t in range(start, n):
+            slot = t % m if m else 0
+            prediction = level + trend + season[rows, slot]
+            error = history[t] - prediction
+            predictions[t] = prediction
+            level = level + trend + alpha * error
+            trend = trend + beta * error
+            season[rows, slot] += gamma * error
+
+        errors = history[start:, None] - predictions[start:]
+        best = int(np.argmin((errors ** 2).sum(axis=0)))
+        self.alpha, self.beta, self.gamma = float(alpha[best]), float(beta[best]), float(gamma[best])
+        self._level, self._trend, self._season = level[best], trend[best], season[best]
+        self._n = n
+        self.residual_std = float(np.sqrt((errors[:, best] ** 2).mean()))
+
+        self.fitted = np.full(len(y), np.nan)
+        self.fitted[len(y) - n:] = predictions[:, best]
+        return self
+
+    def predict(self, horizon, level=DEFAULT_LEVEL):
+        m = self.season_length
+        h = np.arange(1, horizon + 1)
+        seasonal = self._season[(self._n + h - 1) % m] if m else 0.0
+        mean = self._level + h * self._trend + seasonal
+
+        # ความแปรปรวนของ ETS(A,A,A): sigma^2 * (1 + sum_{j<h} c_j^2), c_j = alpha + beta*j + gamma*[j % m == 0]
+        j = np.arange(1, horizon)
+        c = self.alpha + self.beta * j + (self.gamma * (j % m == 0) if m else 0.0)
+        variance = 1 + np.concatenate([[0.0], np.cumsum(c ** 2)])
+        se = self.residual_std * np.sqrt(variance)
+        z = _stats().norm.ppf(0.5 + level / 2)
+        return mean, mean - z * se, mean + z * se
+
+
+class Holt(HoltWinters):
+    """Holt's linear trend smoothing (Holt-Winters without the seasonal term)."""
+
+    name = 'holt'
+    label = 'Holt linear smoothing'
+
+    def __init__(self, max_history=1000):
+        super().__init__(season_length=0, max_history=max_history)
+
+
+class AutoRegressive(ForecastModel):
+    """AR(p) on daily changes (ARIMA(p,1,0)) fitted with NumPy least squares."""
+
+    name = 'ar'
+    label = 'AR(5) on daily changes'
+
+    def __init__(self, order=5):
+        self.order = order
+
+    def fit(self, y):
+        p = self.order
+        y = self._check(y, max(self.min_points, 3 * p + 2))
+        changes = np.diff(y)
+
+        # แต่ละแถวของ lags คือ [d_{t-1}, ..., d_{t-p}]
+        lags = sliding_window_view(changes, p)[:-1, ::-1]
+        design = np.column_stack([np.ones(len(lags)), lags])
+        target = changes[p:]
+        coef, *_ = np.linalg.lstsq(design, target, rcond=None)
+        self.intercept, self.coef = coef[0], coef[1:]
+
+        predicted_changes = design @ coef
+        self.residual_std = float(np.sqrt(((target - predicted_changes) ** 2).sum() / max(len(target) - p - 1, 1)))
+        self.fitted = np.full(len(y), np.nan)
+        self.fitted[p + 1:] = y[p:-1] + predicted_changes
+        self._last_value = y[-1]
+        self._recent_changes = changes[-p:][::-1].copy()
+        return self
+
+    def predict(self, horizon, level=DEFAULT_LEVEL):
+        p = self.order
+        recent = self._recent_changes.copy()
+        changes = np.empty(horizon)
+        for h in range(horizon):
+            changes[h] = self.intercept + self.coef @ recent
+            recent = np.roll(recent, 1)
+            recent[0] = changes[h]
+        mean = self._last_value + np.cumsum(changes)
+
+        # psi weights ของกระบวนการ AR บนส่วนต่าง แล้วสะสมเป็นระดับราคา
+        psi = np.zeros(horizon)
+        psi[0] = 1.0
+        for j in range(1, horizon):
+            k = min(j, p)
+            psi[j] = self.coef[:k] @ psi[j - k:j][::-1]
+        cumulative = np.cumsum(psi)
+        se = self.residual_std * np.sqrt(np.cumsum(cumulative ** 2))
+        z = _stats().norm.ppf(0.5 + level / 2)
+        return mean, mean - z * se, mean + z * se
+
+
+MODELS = {model.name: model for model in (LinearTrend, Holt, HoltWinters, AutoRegressive)}
+
+
+def create_model(name=DEFAULT_MODEL, **params):
+    """Instantiate the model registered under ``name``."""
+    try:
+        return MODELS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown forecast model: {name}") from None
+
+
+def forecast(y, horizon, model=DEFAULT_MODEL, level=DEFAULT_LEVEL, **params):
+    """Fit ``model`` on ``y`` and forecast ``horizon`` steps.
+
+    Returns a dict with ``fitted`` (same length as ``y``), ``forecast``,
+    ``lower``/``upper`` interval bounds and ``residual_std``.
+    """
+    fitted_model = create_model(model, **params).fit(y)
+    mean, lower, upper = fitted_model.predict(horizon, level)
+    return {
+        'model': model,
+        'fitted': fitted_model.fitted,
+        'forecast': mean,
+        'lower': lower,
+        'upper': upper,
+        'residual_std': float(fitted_model.residual_std),
+    }
@@ -0,0 +1,21 @@
+"""Gunicorn settings, read from the working directory by ``gunicorn Exchange_rate_dash:server``.
+
+Each worker replays the default page load in-process (``warmup.warm_up``)
+after importing the app and before it accepts connections, so the first
+visitor gets cached figures. Set ``FX_WARMUP=0`` to skip it. Bind address
+(``PORT``) and worker count (``WEB_CONCURRENCY``) keep gunicorn's defaults.
+"""
+import os
+import time
+
+
+def post_worker_init(worker):
+    if os.environ.get('FX_WARMUP', '1') == '0':
+        return
+    from warmup import warm_up
+
+    started = time.perf_counter()
+    results = warm_up(worker.wsgi)
+    failed = [output for output, status, _ in results if status != 200]
+    worker.log.info("Warm-up: %d callbacks in %.2fs%s", len(results), time.perf_counter() - started,
+                    f" ({len(failed)} failed: {', '.join(failed)})" if failed else "")
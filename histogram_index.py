@@ -0,0 +1,152 @@
+"""Window histograms from checkpointed cumulative bin counts.
+
+``HistogramIndex`` assigns every value of each currency to one of
+``FINE_BINS`` equal-width bins spanning that currency's full range and
+stores the cumulative counts every ``CHECKPOINT_ROWS`` rows. The fine
+counts of any window ``[start, end]`` are then one subtraction of two
+checkpoints plus a ``bincount`` of at most ``2 * CHECKPOINT_ROWS`` rows at the
+edges. ``histogram`` merges adjacent fine bins into the Freedman-Diaconis
+bin width of the window (estimated from the fine counts), capped at a bar
+budget, so the browser receives a few hundred pre-aggregated bars instead
+of every raw value. When appended rows fall outside a column's range, its
+grid doubles its bin width (merging neighbouring bins, so every count stays
+exact) until it covers them.
+"""
+import copy
+
+import numpy as np
+
+FINE_BINS = 1024
+CHECKPOINT_ROWS = 64
+
+
+class HistogramIndex:
+    """Fine-bin cumulative counts of a ``(rows, columns)`` matrix, one bin grid per column."""
+
+    def __init__(self, values, columns, fine_bins=FINE_BINS, checkpoint_rows=CHECKPOINT_ROWS):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(columns):
+            raise ValueError("values must be a (rows, columns) matrix matching columns")
+        self.columns = list(columns)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        self.fine_bins = fine_bins
+        self.checkpoint_rows = checkpoint_rows
+
+        # ช่วงของแต่ละสกุลเงิน; คอลัมน์ที่ค่าคงที่ใช้ความกว้าง 1 เพื่อไม่ให้หารด้วยศูนย์
+        self.lower = values.min(axis=0) if len(values) else np.zeros(values.shape[1])
+        upper = values.max(axis=0) if len(values) else np.ones(values.shape[1])
+        span = upper - self.lower
+        self.bin_width = np.where(span > 0, span, 1.0) / fine_bins
+
+        self._bins = self._bin_ids(values)
+        self._checkpoints = np.zeros((1, len(self.columns), fine_bins), dtype=np.int32)
+        self._extend_checkpoints()
+
+    def __len__(self):
+        return len(self._bins)
+
+    def _bin_ids(self, values):
+        # ค่าสูงสุดของช่วงพอดี (และเศษจากการปัดเศษ) อยู่ใน bin ริมสุด
+        ids = np.floor((values - self.lower) / self.bin_width)
+        return np.clip(ids, 0, self.fine_bins - 1).astype(np.uint16)
+
+    def _widen(self, values):
+        # ขยาย grid ของคอลัมน์ที่ค่าใหม่อยู่นอกช่วง: bin กว้างขึ้นเท่าตัว (รวม bin ติดกันทีละคู่ จำนวนนับยังถูกต้อง)
+        # ขยายขึ้นโดยคง lower เดิม หรือขยายลงโดยเลื่อน lower ลงหนึ่งช่วงเดิม - ทำซ้ำจนครอบคลุมค่าใหม่
+        # สร้าง array ใหม่ทั้งหมด ไม่แก้ array เดิม (สำเนาจาก copy() ใช้ร่วมกันอยู่)
+        lower, bin_width = self.lower.copy(), self.bin_width.copy()
+        shifts = []
+        for column in range(len(self.columns)):
+            low, high = values[:, column].min(), values[:, column].max()
+            while True:
+                if low < lower[column]:
+                    shift = self.fine_bins
+                elif high > lower[column] + self.fine_bins * bin_width[column]:
+                    shift = 0
+                else:
+                    break
+                lower[column] -= shift * bin_width[column]
+                bin_width[column] *= 2
+                shifts.append((column, shift))
+        if not shifts:
+            return
+        bins = self._bins.astype(np.int64)
+        for column, shift in shifts:
+            bins[:, column] = (bins[:, column] + shift) // 2
+        self.lower, self.bin_width = lower, bin_width
+        self._bins = bins.astype(np.uint16)
+        self._checkpoints = np.zeros((1, len(self.columns), self.fine_bins), dtype=np.int32)
+        self._extend_checkpoints()
+
+    def _block_counts(self, bins):
+        # นับทุกคอลัมน์พร้อมกัน: เลื่อน bin id ของคอลัมน์ c ไป c * fine_bins แล้ว bincount ครั้งเดียว
+        offsets = np.arange(len(self.columns)) * self.fine_bins
+        counts = np.bincount((bins + offsets).ravel(), minlength=len(self.columns) * self.fine_bins)
+        return counts.reshape(len(self.columns), self.fine_bins).astype(np.int32)
+
+    def _extend_checkpoints(self):
+        complete = len(self._bins) // self.checkpoint_rows
+        new = []
+        running = self._checkpoints[-1]
+        for k in range(len(self._checkpoints) - 1, complete):
+            block = self._bins[k * self.checkpoint_rows:(k + 1) * self.checkpoint_rows]
+            running = running + self._block_counts(block)
+            new.append(running)
+        if new:
+            self._checkpoints = np.concatenate([self._checkpoints, np.stack(new)])
+
+    def copy(self):
+        """Index to append to while this one keeps answering (``append`` replaces arrays, never writes them)."""
+        return copy.copy(self)
+
+    def append(self, values):
+        """Count new rows, widening the grid of any column they fall outside of."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(values):
+            return
+        self._widen(values)
+        self._bins = np.concatenate([self._bins, self._bin_ids(values)])
+        self._extend_checkpoints()
+
+    def _prefix_counts(self, position, row):
+        # จำนวนของแต่ละ fine bin ในแถว [0, row)
+        k = row // self.checkpoint_rows
+        counts = self._checkpoints[k, position].astype(np.int64)
+        rest = self._bins[k * self.checkpoint_rows:row, position]
+        if len(rest):
+            counts += np.bincount(rest, minlength=self.fine_bins)
+        return counts
+
+    def fine_counts(self, column, start, end):
+        """Counts of every fine bin for rows ``[start, end]`` (inclusive)."""
+        position = self._positions[column]
+        return self._prefix_counts(position, end + 1) - self._prefix_counts(position, start)
+
+    def histogram(self, column, start, end, max_bins=100):
+        """``(left_edges, widths, counts)`` of the window's histogram.
+
+        The bin width follows the Freedman-Diaconis rule for the window's
+        values, rounded to a whole number of fine bins, and is widened when
+        needed so at most ``max_bins`` bars cover the occupied range.
+        """
+        position = self._positions[column]
+        counts = self.fine_counts(column, start, end)
+        occupied = np.flatnonzero(counts)
+        if not len(occupied):
+            return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+        lo, hi = occupied[0], occupied[-1] + 1
+        fine_width = self.bin_width[position]
+
+        # IQR จาก cumulative counts ของ fine bin (ความละเอียดหนึ่ง fine bin)
+        total = counts.sum()
+        cumulative = np.cumsum(counts)
+        q1, q3 = np.searchsorted(cumulative, [0.25 * total, 0.75 * total])
+        iqr_bins = max(q3 - q1, 1)
+        group = max(1, int(round(2 * iqr_bins * total ** (-1 / 3))))
+        group = max(group, -(-(hi - lo) // max(max_bins, 1)))
+
+        starts = np.arange(lo, hi, group)
+        merged = np.add.reduceat(counts[lo:hi], starts - lo)
+        widths = np.minimum(group, hi - starts) * fine_width
+        left_edges = self.lower[position] + starts * fine_width
+        return left_edges, widths, merged
@@ -0,0 +1,186 @@
+"""Inflation rates as indexed arrays, and exchange rates deflated by them.
+
+``InflationTable`` holds ``Filtered_Inflation_Data.csv`` as a ``(series,
+countries, years)`` array of annual rates, so one series for every country
+is a slice instead of a scan of the melted table. ``price_levels`` turns a
+series into a price index per country (100 at the start of its first
+reported year) interpolated geometrically to any dates.
+
+``RealRates`` deflates each per-US$ column by the price level of its
+country (``COUNTRY_CURRENCIES``): ``rate / level * 100`` is the price of one
+US dollar in local currency of the base year. The dataset has no US
+inflation, so the US side is not deflated; for a pair of two currencies with
+inflation data the US term cancels and ``real(quote) / real(base)`` is the
+real cross rate. The deflated matrix of a series is computed once (all rows,
+all mapped columns) and extended when rows are appended.
+"""
+import copy
+import threading
+
+import numpy as np
+
+from cross_rates import USD
+
+# ประเทศในตารางเงินเฟ้อ -> รหัสสกุลเงิน (cross_rates.CURRENCY_CODES)
+COUNTRY_CURRENCIES = {
+    'Australia': 'AUD',
+    'Brazil': 'BRL',
+    'Canada': 'CAD',
+    'China': 'CNY',
+    'Denmark': 'DKK',
+    'India': 'INR',
+    'Japan': 'JPY',
+    'Malaysia': 'MYR',
+    'Mexico': 'MXN',
+    'New Zealand': 'NZD',
+    'Norway': 'NOK',
+    'Singapore': 'SGD',
+    'South Africa': 'ZAR',
+    'Sri Lanka': 'LKR',
+    'Sweden': 'SEK',
+    'Switzerland': 'CHF',
+    'Thailand': 'THB',
+    'United Kingdom': 'GBP',
+}
+
+
+class InflationTable:
+    """Annual inflation rates (%) of a wide ``Country, Series_Name, <year>...`` frame."""
+
+    def __init__(self, frame):
+        year_columns = [column for column in frame.columns if column not in ('Country', 'Series_Name')]
+        self.years = np.array([int(year) for year in year_columns])
+        self.series = list(dict.fromkeys(frame['Series_Name']))
+        self.countries = list(dict.fromkeys(frame['Country']))
+        self._series_positions = {name: i for i, name in enumerate(self.series)}
+        self._country_positions = {name: i for i, name in enumerate(self.countries)}
+
+        self.rates = np.full((len(self.series), len(self.countries), len(self.years)), np.nan)
+        s = frame['Series_Name'].map(self._series_positions).to_numpy()
+        c = frame['Country'].map(self._country_positions).to_numpy()
+        self.rates[s, c] = frame[year_columns].to_numpy(dtype=np.float64)
+        self._levels = {}  # series -> ระดับราคา ณ ต้นปีแต่ละปีและสิ้นปีสุดท้าย
+        self._lock = threading.Lock()
+
+    def country_position(self, country):
+        return self._country_positions[country]
+
+    def series_rates(self, series):
+        """``(countries, years, rates)`` of one series; ``rates`` is ``(countries, years)``."""
+        return self.countries, self.years, self.rates[self._series_positions[series]]
+
+    def _year_levels(self, series):
+        # level[:, y] = ดัชนีราคา ณ ต้นปี y (100 ที่ต้นปีแรกที่มีข้อมูล), level[:, -1] = สิ้นปีสุดท้าย
+        with self._lock:
+            levels = self._levels.get(series)
+        if levels is None:
+            growth = 1 + self.rates[self._series_positions[series]] / 100
+            started = np.logical_or.accumulate(~np.isnan(growth), axis=1)
+            # ปีที่ขาดหลังเริ่มมีข้อมูลทำให้ดัชนีหลังจากนั้นเป็น NaN
+            cumulative = 100 * np.cumprod(np.where(started, growth, 1.0), axis=1)
+            levels = np.concatenate([np.full((len(self.countries), 1), 100.0), cumulative], axis=1)
+            levels[:, :-1][~started] = np.nan
+            with self._lock:
+                self._levels[series] = levels
+        return levels
+
+    def price_levels(self, series, dates, countries=None):
+        """Price index of ``countries`` on ``dates`` as a ``(countries, dates)`` array.
+
+        Levels are interpolated geometrically within each year; dates outside
+        the reported years are NaN.
+        """
+        levels = self._year_levels(series)
+        if countries is not None:
+            levels = levels[[self._country_positions[country] for country in countries]]
+        days = np.asarray(dates).astype('datetime64[D]')
+        year_starts = days.astype('datetime64[Y]')
+        position = year_starts.astype(np.int64) + 1970 - self.years[0]
+        fraction = (days - year_starts.astype('datetime64[D]')).astype(np.float64) / \
+            ((year_starts + 1).astype('datetime64[D]') - year_starts.astype('datetime64[D]')).astype(np.float64)
+        inside = (position >= 0) & (position < len(self.years))
+        clipped = np.clip(position, 0, len(self.years) - 1)
+        start, end = levels[:, clipped], levels[:, clipped + 1]
+        return np.where(inside, start * (end / start) ** fraction, np.nan)
+
+    def average_rate(self, series, country, first_year, last_year):
+        """Mean annual inflation (%) of ``country`` over reported years in ``[first_year, last_year]``."""
+        keep = (self.years >= first_year) & (self.years <= last_year)
+        rates = self.rates[self._series_positions[series], self._country_positions[country], keep]
+        return float(np.nanmean(rates)) if np.isfinite(rates).any() else np.nan
+
+
+class RealRates:
+    """Per-US$ columns deflated by the price level of their country, one cached matrix per series."""
+
+    def __init__(self, inflation, dates, values, columns, codes):
+        self.inflation = inflation
+        country_of = {code: country for country, code in COUNTRY_CURRENCIES.items() if country in inflation.countries}
+        # เฉพาะคอลัมน์ที่มีข้อมูลเงินเฟ้อของประเทศนั้น
+        mapped = [(column, code) for column, code in zip(columns, codes) if code in country_of]
+        self.columns = [column for column, _ in mapped]
+        self.countries = [country_of[code] for _, code in mapped]
+        self._positions = {column: i for i, (column, _) in enumerate(mapped)}
+        self._positions.update({code: i for i, (_, code) in enumerate(mapped)})
+        self._dates = np.asarray(dates).astype('datetime64[D]')
+        self._values = np.asarray(values, dtype=np.float64)[:, [list(columns).index(c) for c in self.columns]]
+        self._cache = {}  # series -> (rows, columns)
+        self._lock = threading.Lock()
+
+    def covers(self, name):
+        """Whether ``name`` (a column, or a ``(base, quote)`` pair of codes) has a real rate."""
+        if isinstance(name, tuple):
+            return all(code == USD or code in self._positions for code in name)
+        return name in self._positions
+
+    def country(self, name):
+        """Country whose prices deflate a column or currency code (``None`` for USD)."""
+        return self.countries[self._positions[name]] if name != USD else None
+
+    def _deflate(self, series, dates, values):
+        levels = self.inflation.price_levels(series, dates, self.countries)
+        return values / levels.T * 100
+
+    def matrix(self, series):
+        """``(rows, columns)`` real rates of every mapped column under ``series``."""
+        with self._lock:
+            real = self._cache.get(series)
+        if real is None:
+            real = self._deflate(series, self._dates, self._values)
+            with self._lock:
+                self._cache[series] = real
+        return real
+
+    def _per_usd(self, series, name, rows):
+        if name == USD:
+            return np.ones(len(range(*rows.indices(len(self._dates)))))
+        return self.matrix(series)[rows, self._positions[name]]
+
+    def series(self, series, name, start, end):
+        """Real rates of a column, or of a ``(base, quote)`` pair, for rows ``[start, end]``."""
+        rows = slice(start, end + 1)
+        if isinstance(name, tuple):
+            base, quote = name
+            return self._per_usd(series, quote, rows) / self._per_usd(series, base, rows)
+        return self._per_usd(series, name, rows)
+
+    def copy(self):
+        """Real rates to append to while these keep answering."""
+        other = copy.copy(self)
+        with self._lock:
+            other._cache = dict(self._cache)
+        other._lock = threading.Lock()
+        return other
+
+    def append(self, dates, values, columns):
+        """Add rows (``values`` in the order of ``columns``) and extend the cached series."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(columns))
+        if not len(values):
+            return
+        dates = np.asarray(dates).astype('datetime64[D]')
+        new_values = values[:, [list(columns).index(c) for c in self.columns]]
+        with self._lock:
+            self._dates = np.concatenate([self._dates, dates])
+            self._values = np.concatenate([self._values, new_values])
+            for series, real in self._cache.items():
+                self._cache[series] = np.concatenate([real, self._deflate(series, dates, new_values)])
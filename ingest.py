@@ -0,0 +1,229 @@
+"""Incremental ingestion of new exchange-rate rows without reloading the data.
+
+``CsvTail`` remembers how far into a CSV it has read and parses only the
+complete lines appended since then; ``DropDirectory`` does the same for every
+``*.csv`` file placed in a directory. ``ExchangeRateFeed`` owns the in-memory
+exchange-rate frame, appends the new rows to growable column buffers and
+notifies listeners (indexes, caches) with just the new rows.
+"""
+import glob
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATE_COLUMN, ROW_ID_COLUMN, parse_raw_columns
+
+
+def parse_rows(header, text):
+    """Parse CSV lines (without header) into ``(row_ids, dates, values)`` of complete rows."""
+    raw = pd.read_csv(io.StringIO(header + text), dtype=str, keep_default_na=False, na_values=[''])
+    row_ids, dates, values, _, complete = parse_raw_columns(raw)
+    # ดัชนีสถิติต้องการค่าที่เป็นตัวเลขครบทุกช่อง
+    complete &= np.isfinite(values).all(axis=1)
+    return list(raw.columns), row_ids[complete], dates[complete], values[complete]
+
+
+class CsvTail:
+    """Follows a CSV file and returns the complete lines appended since the last read.
+
+    ``offset`` is the byte position already consumed; by default reading
+    starts at the current end of the file.
+    """
+
+    def __init__(self, path, offset=None):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.header = f.readline().decode()
+        self._header_bytes = len(self.header.encode())
+        self.offset = os.path.getsize(path) if offset is None else max(offset, self._header_bytes)
+        self._align()
+
+    def _align(self):
+        # ถ้า offset อยู่กลางบรรทัด (ไฟล์กำลังถูกเขียน) ให้ข้ามไปบรรทัดถัดไป
+        if self.offset <= 0:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset - 1)
+            if f.read(1) != b'\n':
+                f.readline()
+                self.offset = f.tell()
+
+    def read_new(self):
+        """Text of the new complete lines, or ``''`` when nothing was appended."""
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # ไฟล์ถูกแทนที่/ตัดให้สั้นลง - อ่านใหม่ตั้งแต่หลัง header (แถวซ้ำจะถูกกรองด้วยวันที่)
+            self.offset = self._header_bytes
+        if size == self.offset:
+            return ''
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return ''  # มีแค่บรรทัดที่ยังเขียนไม่เสร็จ
+        self.offset += end + 1
+        return chunk[:end + 1].decode()
+
+    def poll(self):
+        """Parsed new rows as ``(columns, row_ids, dates, values)`` or ``None``."""
+        text = self.read_new()
+        return parse_rows(self.header, text) if text.strip() else None
+
+
+class DropDirectory:
+    """Ingests ``*.csv`` files dropped into ``path`` (same header as the main CSV).
+
+    Every file is followed like ``CsvTail`` so files that are still being
+    written are picked up as their lines complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tails = {}
+
+    def poll(self):
+        batches = []
+        for file_path in sorted(glob.glob(os.path.join(self.path, '*.csv'))):
+            tail = self._tails.get(file_path)
+            if tail is None:
+                tail = self._tails[file_path] = CsvTail(file_path, offset=0)
+            batch = tail.poll()
+            if batch is not None:
+                batches.append(batch)
+        return batches
+
+
+class _GrowableColumn:
+    def __init__(self, initial):
+        self._buffer = np.array(initial, order='F')
+        self.size = len(initial)
+
+    def append(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self._buffer):
+            grown = np.empty((max(needed, 2 * len(self._buffer)),) + self._buffer.shape[1:],
+                             dtype=self._buffer.dtype, order='F')
+            grown[:self.size] = self._buffer[:self.size]
+            self._buffer = grown
+        self._buffer[self.size:needed] = rows
+        self.size = needed
+
+    @property
+    def array(self):
+        return self._buffer[:self.size]
+
+
+class ExchangeRateFeed:
+    """The live exchange-rate frame plus the sources that extend it.
+
+    ``frame`` starts as the frame loaded at startup (memory-mapped when it
+    came from the columnar store) and is only copied into growable buffers
+    when the first new row arrives. Rows dated on or before the latest
+    known date are ignored, so overlapping sources are harmless.
+    """
+
+    def __init__(self, frame, sources=(), interval=60.0):
+        self.frame = frame
+        self.rate_columns = list(frame.columns[2:])
+        self.sources = list(sources)
+        self.interval = interval
+        self._listeners = []
+        self._buffers = None
+        self._lock = threading.Lock()
+        self._last_poll = time.monotonic()
+
+    def add_listener(self, listener):
+        """Call ``listener(frame, values)`` with the new rows' rate matrix after each append."""
+        self._listeners.append(listener)
+
+    def maybe_poll(self):
+        """Poll if ``interval`` seconds have passed; never blocks on a concurrent poll."""
+        if not self.interval or time.monotonic() - self._last_poll < self.interval:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_poll = time.monotonic()
+            return self._poll()
+        finally:
+            self._lock.release()
+
+    def poll(self):
+        """Read every source now and append whatever is new. Returns the row count added."""
+        with self._lock:
+            return self._poll()
+
+    def _poll(self):
+        batches = []
+        for source in self.sources:
+            result = source.poll()
+            if result is None:
+                continue
+            batches.extend(result if isinstance(result, list) else [result])
+
+        batches = [batch for batch in batches if len(batch[1])]
+        for columns, _, _, _ in batches:
+            if columns[2:] != self.rate_columns:
+                raise ValueError(f"Ingested rows have different currency columns: {columns[2:]}")
+        if not batches:
+            return 0
+
+        row_ids = np.concatenate([batch[1] for batch in batches])
+        dates = np.concatenate([batch[2] for batch in batches])
+        values = np.concatenate([batch[3] for batch in batches])
+
+        # เรียงตามวันที่ และรับเฉพาะวันที่ใหม่กว่าข้อมูลล่าสุด (ตัดแถวซ้ำ)
+        order = np.argsort(dates, kind='stable')
+        dates, row_ids, values = dates[order], row_ids[order], values[order]
+        _, first = np.unique(dates, return_index=True)
+        latest = self.frame[DATE_COLUMN].iloc[-1].to_datetime64() if len(self.frame) else None
+        keep = first if latest is None else first[dates[first] > latest]
+        if not len(keep):
+            return 0
+        self._append(row_ids[keep], dates[keep], values[keep])
+
+        for listener in self._listeners:
+            listener(self.frame, values[keep])
+        return len(keep)
+
+    def _append(self, row_ids, dates, values):
+        if self._buffers is None:
+            self._buffers = {
+                'row_ids': _GrowableColumn(self.frame[ROW_ID_COLUMN].to_numpy()),
+                'dates': _GrowableColumn(self.frame[DATE_COLUMN].to_numpy('datetime64[ns]')),
+                'values': _GrowableColumn(self.frame[self.rate_columns].to_numpy(np.float64)),
+                'index': _GrowableColumn(self.frame.index.to_numpy()),
+            }
+        next_index = self._buffers['index'].array[-1] + 1 if self._buffers['index'].size else 0
+        self._buffers['row_ids'].append(row_ids)
+        self._buffers['dates'].append(dates)
+        self._buffers['values'].append(values)
+        self._buffers['index'].append(np.arange(next_index, next_index + len(row_ids)))
+
+        # สร้าง DataFrame ใหม่บน buffer เดิม (ไม่คัดลอกข้อมูลอัตราแลกเปลี่ยน)
+        frame = pd.DataFrame(self._buffers['values'].array, columns=self.rate_columns, copy=False)
+        frame.insert(0, DATE_COLUMN, self._buffers['dates'].array)
+        frame.insert(0, ROW_ID_COLUMN, self._buffers['row_ids'].array)
+        frame.index = pd.Index(self._buffers['index'].array)
+        self.frame = frame
+
+
+def feed_from_env(frame, csv_path, source_offset):
+    """Build the dashboard's feed from ``FX_INGEST_*`` environment variables.
+
+    ``FX_INGEST_INTERVAL`` (seconds, default 60, ``0`` disables) sets how often
+    requests may trigger a poll; ``FX_INGEST_DIR`` adds a drop directory.
+    """
+    interval = float(os.environ.get('FX_INGEST_INTERVAL', 60))
+    sources = []
+    if interval:
+        sources.append(CsvTail(csv_path, offset=source_offset))
+        drop_dir = os.environ.get('FX_INGEST_DIR')
+        if drop_dir and os.path.isdir(drop_dir):
+            sources.append(DropDirectory(drop_dir))
+    return ExchangeRateFeed(frame, sources, interval)
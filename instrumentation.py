@@ -0,0 +1,260 @@
+"""Latency, payload and input-size histograms in the Prometheus text format.
+
+``Metrics`` keeps fixed-bucket histograms keyed by a metric name and one
+label value. Like ``FigureCache`` it stores them in a SQLite file when given
+a path, so every gunicorn worker adds to the same numbers and any worker can
+answer a scrape; without a path they live in process memory.
+
+``instrument_dash`` hooks the Flask server of a Dash app: every
+``/_dash-update-component`` request records wall time, CPU time, response
+size and the size of its inputs under the callback's function name, and
+``stage`` times any function (the dashboard wraps each figure builder).
+Setting a profile threshold also runs each callback under ``cProfile`` and
+dumps the stats of requests slower than the threshold.
+"""
+import cProfile
+import functools
+import os
+import sqlite3
+import threading
+import time
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 3e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000, 2500, 5000, 10000)
+
+# ชื่อ metric -> (คำอธิบาย, ขอบของ bucket, ชื่อ label)
+HISTOGRAMS = {
+    'fx_callback_seconds': ("Wall time of a Dash callback request.", LATENCY_BUCKETS, 'callback'),
+    'fx_callback_cpu_seconds': ("CPU time of the thread serving a Dash callback request.", LATENCY_BUCKETS, 'callback'),
+    'fx_callback_response_bytes': ("Serialized size of a Dash callback response.", BYTES_BUCKETS, 'callback'),
+    'fx_callback_currencies': ("Currencies selected in a Dash callback's inputs.", COUNT_BUCKETS, 'callback'),
+    'fx_callback_window_rows': ("Rows in the date window of a Dash callback's inputs.", COUNT_BUCKETS, 'callback'),
+    'fx_stage_seconds': ("Wall time of a figure-construction stage.", LATENCY_BUCKETS, 'stage'),
+}
+
+_UPDATE_PATH = '/_dash-update-component'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Metrics:
+    """Histograms of ``HISTOGRAMS``, in memory or in a shared SQLite file."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory = {}  # (name, label) -> [bucket counts..., +Inf count, sum]
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS samples ("
+                    " name TEXT NOT NULL, label TEXT NOT NULL, bucket INTEGER NOT NULL,"
+                    " count INTEGER NOT NULL, total REAL NOT NULL,"
+                    " PRIMARY KEY (name, label, bucket))"
+                )
+
+    def _connect(self):
+        # เปิด connection ใหม่ต่อ pid/thread เหมือน FigureCache
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def observe_many(self, observations):
+        """Record ``(name, label, value)`` triples in one write."""
+        rows = []
+        for name, label, value in observations:
+            buckets = HISTOGRAMS[name][1]
+            # bucket แรกที่ค่าไม่เกินขอบ (len(buckets) คือ +Inf); bucket -1 เก็บผลรวม
+            bucket = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            rows.append((name, str(label), bucket, 0.0))
+            rows.append((name, str(label), -1, float(value)))
+        if not rows:
+            return
+        if not self.path:
+            with self._lock:
+                for name, label, bucket, value in rows:
+                    counts = self._memory.setdefault((name, label), [0] * (len(HISTOGRAMS[name][1]) + 2) + [0.0])
+                    if bucket >= 0:
+                        counts[bucket] += 1
+                    else:
+                        counts[-2] += 1
+                        counts[-1] += value
+            return
+        self._connect().executemany(
+            "INSERT INTO samples VALUES (?, ?, ?, 1, ?) ON CONFLICT (name, label, bucket)"
+            " DO UPDATE SET count = count + 1, total = total + excluded.total", rows
+        )
+
+    def observe(self, name, label, value):
+        self.observe_many([(name, label, value)])
+
+    def _snapshot(self):
+        # (name, label) -> (จำนวนต่อ bucket รวม +Inf, จำนวนทั้งหมด, ผลรวม)
+        if not self.path:
+            with self._lock:
+                return {key: (counts[:-2], counts[-2], counts[-1]) for key, counts in self._memory.items()}
+        snapshot = {}
+        for name, label, bucket, count, total in self._connect().execute("SELECT * FROM samples"):
+            if name not in HISTOGRAMS:
+                continue
+            counts, n, s = snapshot.get((name, label), ([0] * (len(HISTOGRAMS[name][1]) + 1), 0, 0.0))
+            if bucket >= 0:
+                counts[bucket] = count
+            else:
+                n, s = count, total
+            snapshot[(name, label)] = (counts, n, s)
+        return snapshot
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format."""
+        snapshot = self._snapshot()
+        lines = []
+        for name, (help_text, buckets, label_name) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, label), (counts, n, total) in sorted(snapshot.items()):
+                if metric != name:
+                    continue
+                selector = f'{label_name}="{_escape(label)}"'
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{selector},le="{_format_bound(bound)}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{selector}}} {total!r}")
+                lines.append(f"{name}_count{{{selector}}} {n}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        if not self.path:
+            with self._lock:
+                self._memory.clear()
+            return
+        self._connect().execute("DELETE FROM samples")
+
+    def stage(self, name):
+        """Decorator recording each call's wall time as ``fx_stage_seconds{stage=name}``."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe('fx_stage_seconds', name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+
+def format_counters(counters):
+    """``{name: (help, value)}`` as Prometheus counters/gauges (``_total`` names are counters)."""
+    lines = []
+    for name, (help_text, value) in counters.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+        lines.append(f"{name} {value!r}")
+    return "\n".join(lines) + "\n"
+
+
+def _callback_name(app, output):
+    callback = app.callback_map.get(output, {}).get('callback')
+    return getattr(callback, '__name__', output)
+
+
+def instrument_dash(app, metrics, currency_inputs=(), window_inputs=(), profile_ms=None, profile_dir=None,
+                    extra_metrics=None):
+    """Record every callback request of ``app`` in ``metrics`` and serve ``/metrics``.
+
+    ``currency_inputs`` are component ids whose value is a list of selected
+    currencies and ``window_inputs`` ids whose value is an ``[start, end]``
+    row range; their sizes are recorded per callback. With ``profile_ms``
+    each callback runs under ``cProfile`` and requests slower than that are
+    dumped to ``profile_dir`` as ``<callback>-<epoch ms>.prof``.
+    ``extra_metrics`` returns more lines (e.g. ``format_counters``) for the
+    scrape.
+    """
+    server = app.server
+    currency_inputs, window_inputs = set(currency_inputs), set(window_inputs)
+    if profile_ms is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    @server.before_request
+    def _start_callback_timer():
+        if request.path != _UPDATE_PATH:
+            return
+        g.fx_callback_started = (time.perf_counter(), time.thread_time())
+        if profile_ms is not None:
+            g.fx_callback_profile = cProfile.Profile()
+            g.fx_callback_profile.enable()
+
+    @server.after_request
+    def _record_callback(response):
+        started = g.pop('fx_callback_started', None)
+        if started is None:
+            return response
+        wall = time.perf_counter() - started[0]
+        cpu = time.thread_time() - started[1]
+        profile = g.pop('fx_callback_profile', None)
+        if profile is not None:
+            profile.disable()
+
+        body = request.get_json(silent=True) or {}
+        name = _callback_name(app, body.get('output', ''))
+        observations = [
+            ('fx_callback_seconds', name, wall),
+            ('fx_callback_cpu_seconds', name, cpu),
+            ('fx_callback_response_bytes', name, response.calculate_content_length() or 0),
+        ]
+        for item in body.get('inputs', []) + body.get('state', []):
+            if not isinstance(item, dict):  # input แบบ pattern-matching เป็น list ของ dict
+                continue
+            value = item.get('value')
+            if item.get('id') in currency_inputs:
+                # dropdown แบบเลือกได้หลายค่าเป็น list, แบบค่าเดียวเป็น string
+                observations.append(('fx_callback_currencies', name, len(value) if isinstance(value, list) else int(bool(value))))
+            elif item.get('id') in window_inputs and isinstance(value, list) and len(value) == 2:
+                observations.append(('fx_callback_window_rows', name, value[1] - value[0] + 1))
+        try:
+            metrics.observe_many(observations)
+        except sqlite3.Error as e:
+            # metrics ต้องไม่ทำให้ request ล้มเหลว
+            server.logger.warning("Callback metrics not recorded: %s", e)
+
+        if profile is not None and wall * 1000 >= profile_ms:
+            profile.dump_stats(os.path.join(profile_dir, f"{name}-{int(time.time() * 1000)}.prof"))
+        return response
+
+    @server.route('/metrics')
+    def prometheus_metrics():
+        text = metrics.render() + (extra_metrics() if extra_metrics else '')
+        return Response(text, mimetype='text/plain; version=0.0.4')
+
+
+def metrics_from_env(default_path, default_profile_dir):
+    """``Metrics`` plus profiling options from ``FX_METRICS_PATH`` and ``FX_PROFILE_*``.
+
+    ``FX_METRICS_PATH`` set to an empty string keeps the histograms in
+    process memory; ``FX_PROFILE_SLOW_MS`` turns on cProfile dumps (to
+    ``FX_PROFILE_DIR``) for callbacks slower than that many milliseconds.
+    """
+    path = os.environ.get('FX_METRICS_PATH', default_path)
+    slow_ms = os.environ.get('FX_PROFILE_SLOW_MS')
+    return Metrics(path or None), {
+        'profile_ms': float(slow_ms) if slow_ms else None,
+        'profile_dir': os.environ.get('FX_PROFILE_DIR', default_profile_dir),
+    }
@@ -0,0 +1,134 @@
+"""Moving averages, Bollinger bands and rolling volatility of whole rate series.
+
+``Overlays`` computes an overlay for every row of a series in one pass and
+keeps recently used ``(series, kind, window)`` results in an LRU cache:
+
+- ``'sma'``: simple moving average, from a prefix sum
+- ``'ema'``: exponential moving average (span = window), the recurrence
+  ``ewm(adjust=False)`` of pandas seeded with the first rate
+- ``'bollinger'``: the SMA and ``BOLLINGER_K`` population standard
+  deviations either side of it, from prefix sums of the rates and their squares
+- ``'volatility'``: sample standard deviation of the daily log returns of
+  the window, annualized (% a year), from the same prefix sums of the returns
+
+Every window length costs ``O(rows)`` however long it is, and a value on a
+given date does not depend on the slider: a slider window is a slice of the
+cached arrays. Rows before a window is full are NaN (every row has an EMA).
+When the series has grown since an overlay was cached, only the new rows
+are computed, from the tail of the series (or the last EMA).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+KINDS = {
+    'sma': "SMA",
+    'ema': "EMA",
+    'bollinger': "Bollinger",
+    'volatility': "Rolling volatility",
+}
+# คอลัมน์ของผลลัพธ์แต่ละชนิด
+COMPONENTS = {
+    'sma': ('mean',),
+    'ema': ('mean',),
+    'bollinger': ('mean', 'upper', 'lower'),
+    'volatility': ('volatility',),
+}
+BOLLINGER_K = 2.0
+TRADING_DAYS = 252
+MIN_WINDOW = 2
+DEFAULT_CACHE_SIZE = 256
+
+
+def _window_moments(values, window, ddof):
+    """Mean and variance of every ``window`` consecutive values (``len(values) - window + 1`` of each)."""
+    # prefix sum แบบ longdouble ของค่าที่ลบค่าแรกออก - ลดการหักล้างของ Σx² - (Σx)²/n
+    origin = values[0]
+    shifted = np.asarray(values, dtype=np.longdouble) - origin
+    sums = np.concatenate([[0], np.cumsum(shifted)])
+    squares = np.concatenate([[0], np.cumsum(shifted * shifted)])
+    total = sums[window:] - sums[:-window]
+    total_squares = squares[window:] - squares[:-window]
+    variance = np.maximum((total_squares - total * total / window) / (window - ddof), 0)
+    return (total / window + origin).astype(np.float64), variance.astype(np.float64)
+
+
+def _padded(rows, values):
+    # แถวก่อน window เต็มเป็น NaN
+    padded = np.full(rows, np.nan)
+    if len(values):
+        padded[rows - len(values):] = values
+    return padded
+
+
+def compute(kind, values, window, previous=None):
+    """``(rows, components)`` overlay of ``values``; ``previous`` continues an EMA from its last value."""
+    values = np.asarray(values, dtype=np.float64)
+    rows = len(values)
+    if kind == 'ema':
+        if previous is None:
+            return pd.Series(values).ewm(span=window, adjust=False).mean().to_numpy()[:, None]
+        # เริ่ม recurrence จาก EMA ของแถวก่อนหน้า
+        seeded = np.concatenate([[previous], values])
+        return pd.Series(seeded).ewm(span=window, adjust=False).mean().to_numpy()[1:, None]
+    if kind == 'volatility':
+        if rows <= window:
+            return np.full((rows, 1), np.nan)
+        _, variance = _window_moments(np.diff(np.log(values)), window, ddof=1)
+        return _padded(rows, np.sqrt(variance * TRADING_DAYS) * 100)[:, None]
+    if kind not in ('sma', 'bollinger'):
+        raise KeyError(kind)
+    if rows < window:
+        return np.full((rows, len(COMPONENTS[kind])), np.nan)
+    mean, variance = _window_moments(values, window, ddof=0)
+    if kind == 'sma':
+        return _padded(rows, mean)[:, None]
+    band = BOLLINGER_K * np.sqrt(variance)
+    return np.column_stack([_padded(rows, mean), _padded(rows, mean + band), _padded(rows, mean - band)])
+
+
+class Overlays:
+    """Overlays of named series, cached per ``(name, kind, window)``."""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (name, kind, window) -> (rows, components)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _extend(self, kind, values, window, cached):
+        # เฉพาะแถวใหม่: window ที่จบในแถวใหม่ต้องใช้ window (+1 ของผลตอบแทน) แถวก่อนหน้าด้วย
+        new_rows = len(values) - len(cached)
+        if kind == 'ema':
+            extra = compute(kind, values[len(cached):], window, previous=cached[-1, 0])
+        else:
+            extra = compute(kind, values[-(new_rows + window + 1):], window)[-new_rows:]
+        return np.concatenate([cached, extra])
+
+    def series(self, name, values, kind, window, start=0, end=None):
+        """``{component: values}`` of one overlay of ``values`` (every row of ``name``) for rows ``[start, end]``.
+
+        Components are listed in ``COMPONENTS``.
+        """
+        key = (name, kind, int(window))
+        with self._lock:
+            overlay = self._cache.get(key)
+            current = overlay is not None and len(overlay) == len(values)
+            if current:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if not current:
+            # series ยาวขึ้นจากแถวที่รับเข้ามา - คำนวณต่อเฉพาะแถวใหม่
+            if overlay is not None and len(overlay) < len(values):
+                overlay = self._extend(kind, values, key[2], overlay)
+            else:
+                overlay = compute(kind, values, key[2])
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = overlay
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        end = len(values) - 1 if end is None else end
+        return {component: overlay[start:end + 1, i] for i, component in enumerate(COMPONENTS[kind])}
@@ -0,0 +1,295 @@
+"""Constant-time statistics over arbitrary row windows of the rate columns.
+
+``RangeStatsIndex`` is built once from the cleaned rate matrix. It keeps
+prefix sums of values and squared values (plus the same for daily returns)
+and a sparse table for min/max, so the mean, SD, min, max and correlation of
+any slider window ``[start, end]`` (inclusive, like ``iloc[start:end+1]``)
+come back without touching the rows in between. The cross-product prefix
+sums that correlations need are built per column pair on first use and kept
+for the ``PAIR_CACHE_SIZE`` most recently used pairs, rather than for every
+pair of every row.
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# จำนวนคู่คอลัมน์ที่เก็บ prefix ของ cross-product ไว้ (LRU) - หน่วยความจำ O(rows) ต่อคู่
+PAIR_CACHE_SIZE = 256
+
+
+def _prefix(array, start=None):
+    # สะสมด้วย longdouble แล้วค่อยปัดเป็น float64 - ความคลาดเคลื่อนไม่โตตามจำนวนแถว
+    # start คือแถวสุดท้ายของ prefix เดิม (ใช้ตอนต่อข้อมูลใหม่ โดยไม่ต้องมีแถวศูนย์นำหน้า)
+    if start is None:
+        out = np.zeros((len(array) + 1,) + array.shape[1:], dtype=np.float64)
+        out[1:] = np.cumsum(array, axis=0, dtype=np.longdouble)
+        return out
+    return start + np.cumsum(array, axis=0, dtype=np.longdouble)
+
+
+class _GrowableRows:
+    """Row buffer with amortized O(1) appends (capacity doubles when full)."""
+
+    def __init__(self, initial):
+        self._buffer = np.array(initial, dtype=np.float64)
+        self.size = len(initial)
+
+    def append(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self._buffer):
+            grown = np.empty((max(needed, 2 * len(self._buffer)),) + self._buffer.shape[1:])
+            grown[:self.size] = self._buffer[:self.size]
+            self._buffer = grown
+        self._buffer[self.size:needed] = rows
+        self.size = needed
+
+    @property
+    def array(self):
+        return self._buffer[:self.size]
+
+
+class RangeStatsIndex:
+    """Prefix-sum and sparse-table index over a ``(rows, columns)`` matrix.
+
+    Values must be finite; the dashboard builds it from ``exchange_data``
+    after rows with ``ND`` have been dropped.
+    """
+
+    def __init__(self, values, columns):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(columns):
+            raise ValueError("values must be a (rows, columns) matrix matching columns")
+        if not np.isfinite(values).all():
+            raise ValueError("RangeStatsIndex requires finite values")
+
+        self.columns = list(columns)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+
+        # เลื่อนค่าด้วยค่าเฉลี่ยของแต่ละคอลัมน์ ลดปัญหา cancellation ในสูตร E[x²] - E[x]²
+        self._offset = values.mean(axis=0) if len(values) else np.zeros(values.shape[1])
+        centered = values - self._offset
+
+        # ผลตอบแทนรายวันแบบเดียวกับ pct_change() - แถวแรกไม่มีผลตอบแทน จึงเป็น 0
+        returns = np.zeros_like(values)
+        returns[1:] = values[1:] / values[:-1] - 1
+
+        self._pair_cross = OrderedDict()  # (i, j) -> prefix ของ cross-product ที่ center แล้ว
+        self._pair_lock = threading.Lock()
+        self._rows = {
+            'values': _GrowableRows(values),
+            'sum': _GrowableRows(_prefix(centered)),
+            'sumsq': _GrowableRows(_prefix(centered ** 2)),
+            'ret_sum': _GrowableRows(_prefix(returns)),
+            'ret_sumsq': _GrowableRows(_prefix(returns ** 2)),
+        }
+
+        # sparse table: ระดับ j เก็บ min/max ของช่วงยาว 2^j ที่เริ่มที่แต่ละแถว
+        self._min_rows = [self._rows['values']]
+        self._max_rows = [self._rows['values']]
+        self._extend_sparse_tables()
+        self._refresh_views()
+
+    def _extend_sparse_tables(self, old_size=0):
+        # ต่อข้อมูล n แถวใหม่ เพิ่ม entry ใหม่ระดับละ n ตัวเท่านั้น (ระดับใหม่สร้างเมื่อข้อมูลยาวพอ)
+        size = self._rows['values'].size
+        level, span = 1, 1
+        while span * 2 <= size:
+            prev_min, prev_max = self._min_rows[level - 1].array, self._max_rows[level - 1].array
+            if level < len(self._min_rows):
+                first = max(old_size - 2 * span + 1, 0)
+                self._min_rows[level].append(np.minimum(prev_min[first:-span], prev_min[first + span:]))
+                self._max_rows[level].append(np.maximum(prev_max[first:-span], prev_max[first + span:]))
+            else:
+                self._min_rows.append(_GrowableRows(np.minimum(prev_min[:-span], prev_min[span:])))
+                self._max_rows.append(_GrowableRows(np.maximum(prev_max[:-span], prev_max[span:])))
+            level, span = level + 1, span * 2
+
+    def _refresh_views(self):
+        self.values = self._rows['values'].array
+        self._sum = self._rows['sum'].array
+        self._sumsq = self._rows['sumsq'].array
+        self._ret_sum = self._rows['ret_sum'].array
+        self._ret_sumsq = self._rows['ret_sumsq'].array
+        self._min_table = [rows.array for rows in self._min_rows]
+        self._max_table = [rows.array for rows in self._max_rows]
+
+    def copy(self):
+        """Index to append to while this one keeps answering; row buffers are shared until they grow."""
+        # copy ต่อท้ายใน buffer เดิมหลังแถวสุดท้ายของ index นี้ - ส่วนที่ index นี้อ่านไม่ถูกแก้
+        other = copy.copy(self)
+        other._rows = {name: copy.copy(rows) for name, rows in self._rows.items()}
+        other._min_rows = [other._rows['values']] + [copy.copy(rows) for rows in self._min_rows[1:]]
+        other._max_rows = [other._rows['values']] + [copy.copy(rows) for rows in self._max_rows[1:]]
+        with self._pair_lock:
+            other._pair_cross = OrderedDict(self._pair_cross)
+        other._pair_lock = threading.Lock()
+        return other
+
+    def append(self, values):
+        """Add new rows at the end; cost depends on the new rows, not the history."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(values):
+            return
+        if not np.isfinite(values).all():
+            raise ValueError("RangeStatsIndex requires finite values")
+        old_size = len(self.values)
+        centered = values - self._offset
+        returns = np.zeros_like(values)
+        if old_size:
+            returns[0] = values[0] / self.values[-1] - 1
+        returns[1:] = values[1:] / values[:-1] - 1
+
+        self._rows['values'].append(values)
+        self._rows['sum'].append(_prefix(centered, self._sum[-1]))
+        self._rows['sumsq'].append(_prefix(centered ** 2, self._sumsq[-1]))
+        self._rows['ret_sum'].append(_prefix(returns, self._ret_sum[-1]))
+        self._rows['ret_sumsq'].append(_prefix(returns ** 2, self._ret_sumsq[-1]))
+        # prefix รายคู่จะคำนวณใหม่เมื่อถูกเรียกใช้ครั้งถัดไป
+        with self._pair_lock:
+            self._pair_cross.clear()
+        self._extend_sparse_tables(old_size)
+        self._refresh_views()
+
+    def __len__(self):
+        return len(self.values)
+
+    def _columns(self, columns):
+        if columns is None:
+            return np.arange(len(self.columns))
+        return np.array([self._positions[column] for column in columns], dtype=np.intp)
+
+    def _bounds(self, start, end):
+        start, end = max(int(start), 0), min(int(end), len(self.values) - 1)
+        if start > end:
+            raise ValueError(f"Empty window [{start}, {end}]")
+        return start, end
+
+    def count(self, start, end):
+        start, end = self._bounds(start, end)
+        return end - start + 1
+
+    def mean(self, start, end, columns=None):
+        start, end = self._bounds(start, end)
+        cols = self._columns(columns)
+        n = end - start + 1
+        return (self._sum[end + 1, cols] - self._sum[start, cols]) / n + self._offset[cols]
+
+    def _centered_moments(self, start, end, cols):
+        n = end - start + 1
+        s = self._sum[end + 1, cols] - self._sum[start, cols]
+        ss = self._sumsq[end + 1, cols] - self._sumsq[start, cols]
+        return n, s, ss
+
+    def _sum_of_squares(self, start, end, cols):
+        # ค่าที่เล็กกว่าความคลาดเคลื่อนของการลบ prefix sum ถือเป็น 0 (เช่นช่วงที่ค่าเงินถูก peg ไว้)
+        n, s, ss = self._centered_moments(start, end, cols)
+        m2 = ss - s * s / n
+        tolerance = 64 * np.finfo(np.float64).eps * (self._sumsq[end + 1, cols] + self._sumsq[start, cols])
+        return n, s, np.where(m2 > tolerance, m2, 0.0)
+
+    def var(self, start, end, columns=None, ddof=1):
+        start, end = self._bounds(start, end)
+        n, _, m2 = self._sum_of_squares(start, end, self._columns(columns))
+        if n - ddof <= 0:
+            return np.full(len(m2), np.nan)
+        return m2 / (n - ddof)
+
+    def std(self, start, end, columns=None, ddof=1):
+        return np.sqrt(self.var(start, end, columns, ddof))
+
+    def _sparse_query(self, table, reduce, start, end, columns):
+        start, end = self._bounds(start, end)
+        cols = self._columns(columns)
+        level = (end - start + 1).bit_length() - 1
+        span = 1 << level
+        return reduce(table[level][start, cols], table[level][end - span + 1, cols])
+
+    def min(self, start, end, columns=None):
+        return self._sparse_query(self._min_table, np.minimum, start, end, columns)
+
+    def max(self, start, end, columns=None):
+        return self._sparse_query(self._max_table, np.maximum, start, end, columns)
+
+    def latest(self, start, end, columns=None):
+        start, end = self._bounds(start, end)
+        return self.values[end, self._columns(columns)]
+
+    def _cross_sums(self, start, end, cols):
+        out = np.empty((len(cols), len(cols)))
+        for a, i in enumerate(cols):
+            for b in range(a, len(cols)):
+                prefix = self._pair_prefix(i, cols[b])
+                out[a, b] = out[b, a] = prefix[end + 1] - prefix[start]
+        return out
+
+    def _pair_prefix(self, i, j):
+        key = (min(i, j), max(i, j))
+        with self._pair_lock:
+            prefix = self._pair_cross.get(key)
+            if prefix is not None:
+                self._pair_cross.move_to_end(key)
+                return prefix
+        centered = self.values[:, key] - self._offset[list(key)]
+        prefix = _prefix(centered[:, 0] * centered[:, 1])
+        with self._pair_lock:
+            self._pair_cross[key] = prefix
+            while len(self._pair_cross) > PAIR_CACHE_SIZE:
+                self._pair_cross.popitem(last=False)
+        return prefix
+
+    def corr(self, start, end, columns=None):
+        """Pearson correlation matrix of the window (same as ``DataFrame.corr``)."""
+        start, end = self._bounds(start, end)
+        cols = self._columns(columns)
+        n, s, m2 = self._sum_of_squares(start, end, cols)
+        cov = self._cross_sums(start, end, cols) - np.outer(s, s) / n
+        scale = np.sqrt(m2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.clip(cov / np.outer(scale, scale), -1.0, 1.0)
+        # คอลัมน์ที่ค่าไม่เปลี่ยนเลยในช่วงนี้ไม่มีค่า correlation (เหมือน pandas)
+        corr[scale == 0, :] = np.nan
+        corr[:, scale == 0] = np.nan
+        np.fill_diagonal(corr, np.where(scale == 0, np.nan, 1.0))
+        return corr
+
+    def _return_window(self, start, end, tail):
+        # pct_change().dropna() ของช่วง [start, end] คือผลตอบแทนของแถว start+1..end
+        first = start + 1
+        if tail is not None:
+            first = max(first, end - tail + 1)
+        return first, end
+
+    def return_mean(self, start, end, columns=None, tail=None):
+        """Mean daily return in the window, optionally over its last ``tail`` returns."""
+        start, end = self._bounds(start, end)
+        first, last = self._return_window(start, end, tail)
+        cols = self._columns(columns)
+        n = last - first + 1
+        if n <= 0:
+            return np.full(len(cols), np.nan)
+        return (self._ret_sum[last + 1, cols] - self._ret_sum[first, cols]) / n
+
+    def return_std(self, start, end, columns=None, ddof=1):
+        """Standard deviation of daily returns in the window."""
+        start, end = self._bounds(start, end)
+        first, last = self._return_window(start, end, None)
+        cols = self._columns(columns)
+        n = last - first + 1
+        if n - ddof <= 0:
+            return np.full(len(cols), np.nan)
+        s = self._ret_sum[last + 1, cols] - self._ret_sum[first, cols]
+        ss = self._ret_sumsq[last + 1, cols] - self._ret_sumsq[first, cols]
+        return np.sqrt(np.maximum(ss - s * s / n, 0.0) / (n - ddof))
+
+    def describe(self, start, end, columns=None):
+        """Count, mean, std, min, max and latest value per column as a dict of arrays."""
+        return {
+            'count': self.count(start, end),
+            'mean': self.mean(start, end, columns),
+            'std': self.std(start, end, columns),
+            'min': self.min(start, end, columns),
+            'max': self.max(start, end, columns),
+            'latest': self.latest(start, end, columns),
+        }
@@ -0,0 +1,228 @@
+"""Precomputed rolling correlations of daily returns for every currency pair.
+
+For each window length (30/90/250 rows by default) ``compute_rolling``
+produces a ``(rows, pairs)`` float32 matrix: row ``t`` holds the
+correlation of the daily returns over the ``window`` rows ending at ``t``
+for every pair ``i < j`` (upper triangle, ``np.triu_indices`` order).
+Rows without a full window are NaN. Blocks of rows are computed one after
+another from windowed prefix sums, so the cost does not grow with the
+window length (the whole real table takes about 0.1 s; a process pool was
+twice as slow, from pickling the returns into every task).
+
+Storage grows with the square of the column count (500 columns would be
+about 2.5 GB per window for the real table), so ``load_rolling`` keeps only
+the first ``MAX_COLUMNS`` columns (``MAX_COLUMNS * (MAX_COLUMNS - 1) / 2``
+pairs). The matrices are saved as ``.npy`` files in a directory per source
+revision and memory-mapped by ``RollingCorrelations``, which turns pair
+series, correlation matrices and pair rankings into array lookups. Build
+them ahead of a deploy with::
+
+    python rolling_corr.py [Foreign_Exchange_Rates.csv] [output_dir]
+"""
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from analytics import top_k_correlations
+
+WINDOWS = (30, 90, 250)
+BLOCK_ROWS = 1024
+# จำนวนคอลัมน์สูงสุดที่เก็บ correlation (496 คู่) - หน่วยความจำโตตามกำลังสองของจำนวนคอลัมน์
+MAX_COLUMNS = 32
+
+_META_FILE = 'meta.json'
+
+
+def _returns(values):
+    # แถวแรกไม่มีผลตอบแทน (NaN) เหมือน pct_change()
+    returns = np.full(values.shape, np.nan)
+    returns[1:] = values[1:] / values[:-1] - 1
+    return returns
+
+
+def _rolling_block(returns, window, lo, hi):
+    """Correlations of all pairs for output rows ``[lo, hi)`` as a float32 block."""
+    first = max(lo - window + 1, 1)
+    segment = returns[first:hi]
+    # เลื่อนด้วยค่าเฉลี่ยของช่วง ลด cancellation ในสูตร E[xy] - E[x]E[y]
+    segment = segment - segment.mean(axis=0)
+    rows_i, cols_j = np.triu_indices(returns.shape[1], k=1)
+
+    def prefix(array):
+        out = np.zeros((len(array) + 1,) + array.shape[1:])
+        np.cumsum(array, axis=0, out=out[1:])
+        return out
+
+    sums = prefix(segment)
+    sumsq = prefix(segment ** 2)
+    cross = prefix(segment[:, rows_i] * segment[:, cols_j])
+
+    t = np.arange(lo, hi)
+    start = t - window + 1
+    valid = start >= 1
+    a = np.clip(start - first, 0, None)
+    b = t + 1 - first
+
+    s = sums[b] - sums[a]
+    ss = sumsq[b] - sumsq[a]
+    var = ss - s * s / window
+    # คอลัมน์ที่คงที่ในช่วงนั้น (ค่าเงินผูกติด) ไม่มี correlation
+    var = np.where(var <= 64 * np.finfo(np.float64).eps * ss, np.nan, var)
+    cov = cross[b] - cross[a] - s[:, rows_i] * s[:, cols_j] / window
+    with np.errstate(invalid='ignore'):
+        corr = np.clip(cov / np.sqrt(var[:, rows_i] * var[:, cols_j]), -1.0, 1.0)
+    corr[~valid] = np.nan
+    return corr.astype(np.float32)
+
+
+def compute_rolling(values, windows=WINDOWS, block_rows=BLOCK_ROWS):
+    """Rolling correlation matrices ``{window: (rows, pairs) float32}`` of a rate matrix."""
+    values = np.asarray(values, dtype=np.float64)
+    returns = _returns(values)
+    n_pairs = values.shape[1] * (values.shape[1] - 1) // 2
+    result = {window: np.full((len(values), n_pairs), np.nan, dtype=np.float32) for window in windows}
+    for window in windows:
+        for lo in range(0, len(values), block_rows):
+            hi = min(lo + block_rows, len(values))
+            result[window][lo:hi] = _rolling_block(returns, window, lo, hi)
+    return result
+
+
+def save_rolling(path, matrices, columns):
+    """Write the matrices to ``path`` atomically (tmp directory + rename)."""
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.build-', dir=parent)
+    try:
+        for window, matrix in matrices.items():
+            np.save(os.path.join(tmp_dir, f"corr_{window}.npy"), matrix)
+        rows = len(next(iter(matrices.values()))) if matrices else 0
+        with open(os.path.join(tmp_dir, _META_FILE), 'w') as f:
+            json.dump({'columns': list(columns), 'windows': list(matrices), 'rows': rows}, f)
+        try:
+            os.rename(tmp_dir, path)
+        except OSError:
+            # worker อื่นเขียนชุดเดียวกันเสร็จก่อนแล้ว
+            if not os.path.exists(os.path.join(path, _META_FILE)):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    for name in os.listdir(parent):
+        if name != os.path.basename(path) and not name.startswith('.'):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+class RollingCorrelations:
+    """Lookups over rolling pairwise correlation matrices.
+
+    ``matrices`` maps window length to a ``(rows, pairs)`` array; ``values``
+    is the rate matrix the rows belong to (its tail is kept so ``append`` can
+    extend every window with just the new rows).
+    """
+
+    def __init__(self, matrices, columns, values):
+        self.columns = list(columns)
+        self.windows = sorted(matrices)
+        self._matrices = dict(matrices)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        n = len(self.columns)
+        self._pair_index = np.full((n, n), -1, dtype=np.intp)
+        rows_i, cols_j = np.triu_indices(n, k=1)
+        self._pair_index[rows_i, cols_j] = self._pair_index[cols_j, rows_i] = np.arange(len(rows_i))
+        self._recent = np.asarray(values, dtype=np.float64)[-(max(self.windows) + 1):].copy()
+
+    def __len__(self):
+        return len(self._matrices[self.windows[0]])
+
+    def _pairs(self, columns):
+        positions = [self._positions[column] for column in columns]
+        i, j = np.triu_indices(len(positions), k=1)
+        return np.asarray(positions)[i], np.asarray(positions)[j]
+
+    def series(self, window, column_a, column_b, start, end):
+        """Correlation of one pair for rows ``[start, end]`` (inclusive)."""
+        pair = self._pair_index[self._positions[column_a], self._positions[column_b]]
+        return np.asarray(self._matrices[window][start:end + 1, pair], dtype=np.float64)
+
+    def matrix(self, window, row, columns=None):
+        """``(k, k)`` correlation matrix of ``columns`` at ``row`` (diagonal 1)."""
+        columns = self.columns if columns is None else list(columns)
+        a, b = self._pairs(columns)
+        values = np.asarray(self._matrices[window][row], dtype=np.float64)[self._pair_index[a, b]]
+        result = np.eye(len(columns))
+        i, j = np.triu_indices(len(columns), k=1)
+        result[i, j] = result[j, i] = values
+        return result
+
+    def ranking(self, window, row, columns=None, k=5):
+        """Strongest ``k`` pairs at ``row`` as ``(column_a, column_b, corr)``."""
+        columns = self.columns if columns is None else list(columns)
+        return [(columns[i], columns[j], value)
+                for i, j, value in top_k_correlations(self.matrix(window, row, columns), k)]
+
+    def copy(self):
+        """Correlations to append to while these keep answering."""
+        other = copy.copy(self)
+        other._matrices = dict(self._matrices)
+        return other
+
+    def append(self, values):
+        """Extend every window with new rows of the rate matrix."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(values):
+            return
+        combined = np.concatenate([self._recent, values])
+        returns = _returns(combined)
+        for window in self.windows:
+            block = _rolling_block(returns, window, len(self._recent), len(combined))
+            self._matrices[window] = np.concatenate([self._matrices[window], block])
+        self._recent = combined[-(max(self.windows) + 1):]
+
+
+def load_rolling(path, values, columns, windows=WINDOWS, max_columns=MAX_COLUMNS):
+    """Open the matrices of the first ``max_columns`` columns at ``path`` or compute (and try to save) them.
+
+    Files are reused only when they cover the same columns, windows and
+    row count as ``values``; ``path=None`` computes without saving.
+    """
+    columns = list(columns)[:max_columns]
+    values = np.asarray(values, dtype=np.float64)[:, :len(columns)]
+    if path is None:
+        return RollingCorrelations(compute_rolling(values, windows), columns, values)
+    try:
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        if meta['columns'] == list(columns) and meta['windows'] == list(windows) and meta['rows'] == len(values):
+            matrices = {
+                window: np.load(os.path.join(path, f"corr_{window}.npy"), mmap_mode='r') for window in windows
+            }
+            return RollingCorrelations(matrices, columns, values)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    matrices = compute_rolling(values, windows)
+    try:
+        save_rolling(path, matrices, columns)
+    except OSError as e:
+        print(f"Rolling correlations not saved ({e})", file=sys.stderr)
+    return RollingCorrelations(matrices, columns, values)
+
+
+if __name__ == '__main__':
+    from data_store import load_exchange_data, source_fingerprint
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, "Foreign_Exchange_Rates.csv")
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(here, "fx_cache", "rolling_corr")
+
+    frame = load_exchange_data(csv_path, os.environ.get('FX_STORE_DIR', os.path.join(here, "fx_store")))
+    columns = list(frame.columns[2:2 + MAX_COLUMNS])
+    path = os.path.join(output_dir, source_fingerprint(csv_path))
+    matrices = compute_rolling(frame[columns].to_numpy(), WINDOWS)
+    save_rolling(path, matrices, columns)
+    print(f"Built {path}: {len(frame)} rows, {len(columns) * (len(columns) - 1) // 2} pairs, windows {WINDOWS}")
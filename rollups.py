@@ -0,0 +1,135 @@
+"""Weekly, monthly and yearly OHLC rollups of the rate columns.
+
+``Rollups`` splits the (date-sorted) rows into calendar periods once per
+resolution and keeps each period's first row and its high/low per
+currency, plus prefix sums of the values. Open, high, low, close and mean
+of every period overlapping a slider window ``[start, end]`` then come
+from array lookups; only the two periods cut by the window edges are
+re-reduced from their rows, so the results match grouping the window's
+rows by period. ``append`` recomputes only from the last (possibly
+incomplete) period onwards.
+"""
+import copy
+
+import numpy as np
+
+# ความละเอียดเรียงจากละเอียดไปหยาบ
+RESOLUTIONS = {'W': 'Weekly', 'M': 'Monthly', 'Y': 'Yearly'}
+
+
+def period_keys(dates, resolution):
+    """First day of the period (``'W'``, ``'M'`` or ``'Y'``) containing each date."""
+    # วันแรกของคาบ: สัปดาห์เริ่มวันจันทร์ (1970-01-01 เป็นวันพฤหัสบดี), เดือน, ปี
+    days = np.asarray(dates).astype('datetime64[D]')
+    if resolution == 'W':
+        n = days.astype(np.int64)
+        return (n - (n + 3) % 7).astype('datetime64[D]')
+    return days.astype(f'datetime64[{resolution}]').astype('datetime64[D]')
+
+
+class Rollups:
+    """Period aggregates of a ``(rows, columns)`` matrix with sorted ``dates``."""
+
+    def __init__(self, dates, values, columns):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(columns) or len(dates) != len(values):
+            raise ValueError("values must be a (rows, columns) matrix matching dates and columns")
+        self.columns = list(columns)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        self.dates = np.asarray(dates).astype('datetime64[D]')
+        self.values = values
+        self._sum = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=self._sum[1:])
+
+        empty = np.empty((0, values.shape[1]))
+        self._labels = {resolution: np.empty(0, dtype='datetime64[D]') for resolution in RESOLUTIONS}
+        self._starts = {resolution: np.empty(0, dtype=np.int64) for resolution in RESOLUTIONS}
+        self._high = {resolution: empty for resolution in RESOLUTIONS}
+        self._low = {resolution: empty for resolution in RESOLUTIONS}
+        for resolution in RESOLUTIONS:
+            self._extend(resolution)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _extend(self, resolution):
+        # คำนวณใหม่ตั้งแต่คาบสุดท้ายเดิม (อาจยังไม่ครบคาบ) จนถึงแถวล่าสุด
+        starts = self._starts[resolution]
+        keep = max(len(starts) - 1, 0)
+        first_row = int(starts[keep]) if len(starts) else 0
+        if first_row >= len(self.values):
+            return
+        keys = period_keys(self.dates[first_row:], resolution)
+        relative = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+        block = self.values[first_row:]
+        self._labels[resolution] = np.concatenate([self._labels[resolution][:keep], keys[relative]])
+        self._starts[resolution] = np.concatenate([starts[:keep], relative + first_row])
+        self._high[resolution] = np.concatenate([self._high[resolution][:keep], np.maximum.reduceat(block, relative, axis=0)])
+        self._low[resolution] = np.concatenate([self._low[resolution][:keep], np.minimum.reduceat(block, relative, axis=0)])
+
+    def copy(self):
+        """Rollups to append to while these keep answering."""
+        other = copy.copy(self)
+        for name in ('_labels', '_starts', '_high', '_low'):
+            setattr(other, name, dict(getattr(self, name)))
+        return other
+
+    def append(self, dates, values):
+        """Add rows (dated on or after the last row) and update every resolution."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(values):
+            return
+        self.dates = np.concatenate([self.dates, np.asarray(dates).astype('datetime64[D]')])
+        self.values = np.concatenate([self.values, values])
+        self._sum = np.concatenate([self._sum, self._sum[-1] + np.cumsum(values, axis=0)])
+        for resolution in RESOLUTIONS:
+            self._extend(resolution)
+
+    def _period_range(self, resolution, start, end):
+        starts = self._starts[resolution]
+        return (int(np.searchsorted(starts, start, 'right')) - 1,
+                int(np.searchsorted(starts, end, 'right')))
+
+    def count(self, resolution, start, end):
+        """Number of periods overlapping rows ``[start, end]``."""
+        first, stop = self._period_range(resolution, start, end)
+        return stop - first
+
+    def choose(self, start, end, max_periods):
+        """Finest resolution with at most ``max_periods`` periods in the window (else the coarsest)."""
+        for resolution in RESOLUTIONS:
+            if self.count(resolution, start, end) <= max_periods:
+                return resolution
+        return resolution
+
+    def window(self, resolution, start, end, columns=None):
+        """Aggregates of each period overlapping rows ``[start, end]``.
+
+        Returns a dict with ``period`` (first day of each period) and
+        ``open``, ``high``, ``low``, ``close``, ``mean`` as ``(periods,
+        columns)`` arrays, computed from the window's rows only.
+        """
+        positions = np.arange(len(self.columns)) if columns is None else np.array(
+            [self._positions[column] for column in columns], dtype=np.intp)
+        first, stop = self._period_range(resolution, start, end)
+        starts = self._starts[resolution]
+        lo = np.maximum(starts[first:stop], start)
+        hi = np.minimum(np.append(starts[first + 1:stop], end + 1) - 1, end)
+
+        high = self._high[resolution][first:stop][:, positions]
+        low = self._low[resolution][first:stop][:, positions]
+        # คาบที่ถูกขอบของช่วงตัด - คำนวณ high/low ใหม่จากแถวในช่วงเท่านั้น
+        for i in {0, len(lo) - 1} if len(lo) else ():
+            if lo[i] != starts[first + i] or hi[i] != (starts[first + i + 1] - 1 if first + i + 1 < len(starts) else len(self.values) - 1):
+                rows = self.values[lo[i]:hi[i] + 1][:, positions]
+                high[i], low[i] = rows.max(axis=0), rows.min(axis=0)
+
+        mean = (self._sum[hi + 1][:, positions] - self._sum[lo][:, positions]) / (hi - lo + 1)[:, None]
+        return {
+            'period': self._labels[resolution][first:stop],
+            'open': self.values[lo][:, positions],
+            'high': high,
+            'low': low,
+            'close': self.values[hi][:, positions],
+            'mean': mean,
+        }
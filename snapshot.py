@@ -0,0 +1,98 @@
+"""The exchange-rate table and every index built from it, as one value.
+
+A ``DataSnapshot`` is not modified once built: ``extend`` appends new rows
+to copies of the indexes and returns a new snapshot while this one keeps
+answering. The dashboard binds the current snapshot to a single global
+and each callback reads that global once, so the frame, the indexes and
+the cache generation a callback works with always cover the same rows.
+"""
+from anomaly import load_detector
+from cross_rates import CrossRates
+from histogram_index import HistogramIndex
+from inflation import RealRates
+from quantile_index import QuantileIndex
+from range_index import RangeStatsIndex
+from rolling_corr import load_rolling
+from rollups import Rollups
+
+
+class DataSnapshot:
+    """Rate table ``frame`` (``Date`` and ``columns``) with the indexes of exactly its rows.
+
+    ``generation`` (``"<revision>:<rows>"``) keys everything cached from
+    the snapshot: new rows give a new generation, and ``revision`` stands
+    for the source files and code the table was loaded with.
+    """
+
+    def __init__(self, frame, columns, revision, window_stats, histogram_index, quantile_index, rollups,
+                 cross_rates, real_rates, rolling_correlations, anomaly_detector):
+        self.frame = frame
+        self.dates = frame['Date'].to_numpy()
+        self.columns = list(columns)
+        self.revision = revision
+        self.generation = f"{revision}:{len(frame)}"
+        self.window_stats = window_stats
+        self.histogram_index = histogram_index
+        self.quantile_index = quantile_index
+        self.rollups = rollups
+        self.cross_rates = cross_rates
+        self.real_rates = real_rates
+        self.rolling_correlations = rolling_correlations
+        self.anomaly_detector = anomaly_detector
+
+    @classmethod
+    def build(cls, frame, columns, revision, inflation_table, rolling_path=None, anomaly_path=None):
+        """Index every row of ``frame``.
+
+        Rolling correlations and the anomaly detector are loaded from (or
+        saved to) ``rolling_path`` and ``anomaly_path`` when they cover the
+        same rows; a ``None`` path computes them without saving.
+        """
+        values = frame[columns].to_numpy()
+        dates = frame['Date'].to_numpy()
+        # อัตราข้ามคู่ (cross rate) ของสองสกุลใดก็ได้ หารจากคอลัมน์ที่เทียบกับ US$
+        cross_rates = CrossRates(values, columns)
+        return cls(
+            frame, columns, revision,
+            # prefix-sum สำหรับคำนวณสถิติของช่วงวันที่ใดก็ได้ในเวลาคงที่
+            RangeStatsIndex(values, columns),
+            # จำนวนสะสมของ bin ละเอียด - histogram ของช่วงใดก็ได้คือผลต่างของ checkpoint
+            HistogramIndex(values, columns),
+            # wavelet matrix สำหรับ quartile/whisker ของ box plot ในช่วงวันที่ใดก็ได้
+            QuantileIndex(values, columns),
+            # OHLC/ค่าเฉลี่ยรายสัปดาห์ รายเดือน และรายปี
+            Rollups(dates, values, columns),
+            cross_rates,
+            # อัตราแลกเปลี่ยนที่หักเงินเฟ้อ (real) - คำนวณทั้งตารางครั้งแรกที่ใช้ series นั้น
+            RealRates(inflation_table, dates, values, columns, cross_rates.codes),
+            # correlation แบบ rolling ของทุกคู่ (ไม่เกิน MAX_COLUMNS คอลัมน์แรก) จากไฟล์ .npy
+            load_rolling(rolling_path, values, columns),
+            # สถานะการตรวจ jump และการเปลี่ยน regime ของความผันผวน
+            load_detector(anomaly_path, values, columns),
+        )
+
+    def extend(self, frame):
+        """Snapshot of ``frame``: the rows of this one followed by new rows.
+
+        The new rows are appended to copies of the indexes; if an append
+        fails, nothing has changed and the rows can be retried later.
+        """
+        values = frame[self.columns].to_numpy()[len(self.frame):]
+        new_dates = frame['Date'].to_numpy()[len(self.frame):]
+        stats, histograms, quantiles, periods, pairs, real, correlations, detector = indexes = [
+            index.copy() for index in (self.window_stats, self.histogram_index, self.quantile_index, self.rollups,
+                                       self.cross_rates, self.real_rates, self.rolling_correlations,
+                                       self.anomaly_detector)]
+        stats.append(values)
+        histograms.append(values)
+        quantiles.append(values)
+        periods.append(new_dates, values)
+        pairs.append(values)
+        real.append(new_dates, values, self.columns)
+        correlations.append(values[:, :len(correlations.columns)])  # เฉพาะคอลัมน์ที่เก็บ correlation ไว้
+        detector.append(values)
+        return DataSnapshot(frame, self.columns, self.revision, *indexes)
+
+    def series(self, name):
+        """Every row of column or cross pair ``name``."""
+        return self.cross_rates.series(name) if self.cross_rates.parse(name) else self.frame[name].to_numpy()
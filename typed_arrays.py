@@ -0,0 +1,116 @@
+"""Compact figure payloads: numeric trace arrays as base64 typed arrays.
+
+``encode_figure`` turns a Plotly figure into its JSON-ready dict in which
+every numeric data array (``x``, ``y``, ``open`` ... ``close``, box
+quartiles, marker sizes and colours) is ``{'dtype': ..., 'bdata': ...}``,
+modelled on the typed-array form plotly.js reads natively from v2.28. Floats
+are sent as float32 (about 7 significant digits, more than the rates carry)
+and dates as int32 days since the epoch (``'unit': 'day'``, or float64
+milliseconds when not whole days) with the axis typed ``'date'``; an ``x``
+array identical to an earlier trace's becomes ``{'same_as': index}``.
+
+The base64 uses the URL-safe alphabet because Dash escapes every ``/`` in a
+response as ``\u002f``. ``assets/typed_arrays.js`` decodes all of this in
+the browser before plotly.js sees the figure. ``FX_TYPED_ARRAYS=0`` turns
+the encoding off (plain JSON lists, e.g. for debugging payloads).
+"""
+import base64
+import os
+
+import numpy as np
+
+# attribute ที่เป็นข้อมูลตัวเลข (data_array หรือ number แบบ arrayOk) - แปลงเป็น typed array ได้
+ARRAY_KEYS = frozenset({
+    'x', 'y', 'z', 'open', 'high', 'low', 'close',
+    'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'sd',
+    'base', 'width', 'size', 'color', 'customdata',
+})
+
+ENABLED = os.environ.get('FX_TYPED_ARRAYS', '1') != '0'
+
+# array สั้นกว่านี้ส่งเป็น JSON ปกติ (typed array ไม่ได้เล็กกว่า)
+MIN_LENGTH = 8
+
+_INT32 = np.iinfo(np.int32)
+_DAY_MS = 86400000
+
+
+def _typed(array, dtype, **extra):
+    data = base64.urlsafe_b64encode(np.ascontiguousarray(array, dtype='<' + dtype).tobytes()).decode('ascii')
+    return dict(dtype=dtype, bdata=data, **extra)
+
+
+def encode_array(values):
+    """``values`` as a typed-array dict, or ``None`` if it is not numeric or date data."""
+    array = np.asarray(values)
+    if array.ndim != 1 or len(array) < MIN_LENGTH:
+        return None
+    kind = array.dtype.kind
+    if kind == 'M':
+        if np.isnat(array).any():
+            return None
+        ms = array.astype('datetime64[ms]').astype(np.int64)
+        if (ms % _DAY_MS == 0).all():
+            # ข้อมูลรายวัน - ส่งเป็นจำนวนวัน (4 byte) แทน millisecond (8 byte)
+            return _typed(ms // _DAY_MS, 'i4', unit='day')
+        return _typed(ms, 'f8')
+    if kind == 'f':
+        return _typed(array, 'f4')
+    if kind in 'iu':
+        if len(array) and (array.min() < _INT32.min or array.max() > _INT32.max):
+            return _typed(array, 'f8')
+        return _typed(array, 'i4')
+    if kind == 'b':
+        return _typed(array, 'u1')
+    return None
+
+
+def _encode(props, dates):
+    # แปลงเฉพาะ ARRAY_KEYS (รวม dict ย่อย เช่น marker) - dates เก็บชื่อ attribute ที่เป็นวันที่
+    encoded = {}
+    for key, value in props.items():
+        if isinstance(value, dict):
+            encoded[key] = _encode(value, set())
+            continue
+        typed = encode_array(value) if key in ARRAY_KEYS and not isinstance(value, str) else None
+        if typed is not None and np.asarray(value).dtype.kind == 'M':
+            dates.add(key)
+        encoded[key] = value if typed is None else typed
+    return encoded
+
+
+def encode_traces(traces):
+    """Encode a list of trace dicts; returns ``(traces, {trace index: date attributes})``."""
+    if not ENABLED:
+        return list(traces), {i: set() for i in range(len(traces))}
+    result, date_keys, seen_x = [], {}, {}
+    for i, trace in enumerate(traces):
+        dates = set()
+        encoded = _encode(trace, dates)
+        x = encoded.get('x')
+        if isinstance(x, dict) and 'bdata' in x:
+            # แกน x เดียวกับ trace ก่อนหน้า - ส่งแค่ครั้งเดียว
+            key = (x['dtype'], x['bdata'])
+            if key in seen_x:
+                encoded['x'] = {'same_as': seen_x[key]}
+            else:
+                seen_x[key] = i
+        date_keys[i] = dates
+        result.append(encoded)
+    return result, date_keys
+
+
+def encode_figure(figure):
+    """JSON-ready dict of ``figure`` (a ``go.Figure`` or dict) with typed arrays."""
+    figure = figure.to_plotly_json() if hasattr(figure, 'to_plotly_json') else dict(figure)
+    data, date_keys = encode_traces(figure.get('data', []))
+    layout = dict(figure.get('layout', {}))
+    for trace, dates in zip(data, date_keys.values()):
+        for letter in ('x', 'y'):
+            if letter not in dates:
+                continue
+            # วันที่ถูกส่งเป็นตัวเลข จึงต้องบอกชนิดแกนเอง
+            axis = letter + 'axis' + trace.get(letter + 'axis', letter)[1:]
+            layout[axis] = dict(layout.get(axis, {}))
+            layout[axis].setdefault('type', 'date')
+    return dict(figure, data=data, layout=layout)
@@ -0,0 +1,82 @@
+"""Warm-up of a freshly started worker before it accepts traffic.
+
+``warm_up`` replays what a browser does on the first page load against the
+WSGI app in-process: it fetches the page, the layout and the callback
+graph, then posts every callback that fires on load with the layout's
+initial values. That fills the figure cache with the default view and loads
+the plotting code paths a first request would otherwise pay for.
+Background callbacks (the forecast) and callbacks that only follow another
+callback's output are skipped. ``gunicorn.conf.py`` runs it in each worker
+after the app is imported.
+"""
+import time
+
+UPDATE_PATH = '/_dash-update-component'
+
+
+def component_props(layout):
+    """``{id: props}`` of every component with a string id in a layout's JSON."""
+    found = {}
+    stack = [layout]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict) and 'props' in node:
+            props = node['props']
+            if isinstance(props.get('id'), str):
+                found[props['id']] = props
+            stack.extend(value for value in props.values() if isinstance(value, (dict, list)))
+    return found
+
+
+def initial_callbacks(dependencies):
+    """Server callbacks a page load triggers directly from layout values."""
+    return [
+        dependency for dependency in dependencies
+        if not dependency.get('prevent_initial_call')
+        and not dependency.get('clientside_function')
+        and dependency.get('long') is None
+        and '{' not in dependency['output']  # pattern-matching id
+    ]
+
+
+def _output_spec(output):
+    component_id, _, prop = output.partition('.')
+    return {'id': component_id, 'property': prop}
+
+
+def request_body(dependency, props):
+    """Body of the ``_dash-update-component`` request a browser sends on load."""
+    output = dependency['output']
+    outputs = ([_output_spec(part) for part in output[2:-2].split('...')] if output.startswith('..')
+               else _output_spec(output))
+
+    def values(items):
+        return [{**item, 'value': props.get(item['id'], {}).get(item['property'])} for item in items]
+
+    return {
+        'output': output,
+        'outputs': outputs,
+        'inputs': values(dependency['inputs']),
+        'state': values(dependency.get('state', [])),
+        'changedPropIds': [],
+    }
+
+
+def warm_up(server, path_prefix='/'):
+    """Load the default page once through ``server`` (a Flask app).
+
+    Returns ``[(output, status, seconds)]`` for each callback that was run.
+    """
+    client = server.test_client()
+    client.get(path_prefix)
+    props = component_props(client.get(f"{path_prefix}_dash-layout").get_json())
+    dependencies = client.get(f"{path_prefix}_dash-dependencies").get_json()
+
+    results = []
+    for dependency in initial_callbacks(dependencies):
+        started = time.perf_counter()
+        response = client.post(f"{path_prefix}{UPDATE_PATH.lstrip('/')}", json=request_body(dependency, props))
+        results.append((dependency['output'], response.status_code, time.perf_counter() - started))
+    return results